@@ -0,0 +1,108 @@
+# agents/batch_runner.py
+
+import os
+import json
+import time
+from llm.batch import custom_id, batch_line, write_jsonl, read_jsonl, manifest_path, result_content
+
+BATCH_DIR = "output/batch"
+
+# Each stage reads what the previous one wrote, so run collect → execute → ingest per stage, in order
+BATCH_STAGES = {
+    "fix": ("fix",),
+    "post": ("test", "swagger"),
+    "logger": ("logger",),
+}
+
+
+def default_batch_paths(stage, batch_dir=BATCH_DIR):
+    """:return: (requests path, results path) for a stage."""
+    return os.path.join(batch_dir, f"{stage}_requests.jsonl"), os.path.join(batch_dir, f"{stage}_results.jsonl")
+
+
+class BatchRunnerAgent:
+    """
+    Two-phase, offline counterpart of the interactive pipeline.
+    collect() builds every prompt of a stage through the normal agents and writes them as
+    OpenAI Batch API input lines with stable custom ids (plus a manifest mapping ids to targets);
+    ingest() reads a batch output file and hands each answer to the agent that asked for it.
+    """
+
+    def __init__(self, stitcher, fix_agent, tester, swagger, logger_refactor, history_logger):
+        self.stitcher = stitcher
+        self.history_logger = history_logger
+        self.agents = {
+            "fix": fix_agent,
+            "test": tester,
+            "swagger": swagger,
+            "logger": logger_refactor,
+        }
+
+    def _build(self, kind, target_path):
+        if kind == "fix":
+            context = self.stitcher.stitch_context(target_path)
+            source = os.path.join(self.agents["fix"].migrated_dir, target_path)
+            return self.agents["fix"].build_request(target_path, context), source
+        source = os.path.join(self.agents[kind].output_dir, target_path)
+        return self.agents[kind].build_request(target_path), source
+
+    def collect(self, targets, stage, batch_path):
+        """:return: Number of requests written to batch_path."""
+        kinds = BATCH_STAGES[stage]
+        lines, entries = [], {}
+        for target_path in targets:
+            for kind in kinds:
+                try:
+                    request, source = self._build(kind, target_path)
+                except Exception as e:
+                    print(f"❌ Could not build {kind} prompt for {target_path}: {e}")
+                    continue
+                if request is None:
+                    continue
+                request_id = custom_id(kind, target_path)
+                lines.append(batch_line(request_id, request))
+                entries[request_id] = {"kind": kind, "target": target_path, "source": source}
+
+        count = write_jsonl(batch_path, lines)
+        with open(manifest_path(batch_path), "w", encoding="utf-8") as f:
+            json.dump({"stage": stage, "created": int(time.time()), "requests": entries}, f, indent=2)
+        print(f"📤 Collected {count} {stage} request(s) into {batch_path}")
+        return count
+
+    def ingest(self, results_path, batch_path):
+        """
+        Writes every successful answer through its agent.
+        :return: {"applied": n, "failed": {custom_id: reason}}
+        """
+        with open(manifest_path(batch_path), "r", encoding="utf-8") as f:
+            entries = json.load(f)["requests"]
+
+        applied, failed, seen = 0, {}, set()
+        for record in read_jsonl(results_path):
+            request_id = record.get("custom_id")
+            seen.add(request_id)
+            entry = entries.get(request_id)
+            if entry is None:
+                failed[request_id] = "unknown custom_id"
+                continue
+
+            content, error = result_content(record)
+            if error:
+                print(f"❌ Batch {entry['kind']} request for {entry['target']} failed: {error}")
+                failed[request_id] = error
+                continue
+
+            try:
+                result = self.agents[entry["kind"]].apply_result(entry["target"], content)
+                if entry["kind"] == "fix":
+                    self.history_logger.log(entry["target"], result)
+                applied += 1
+            except Exception as e:
+                print(f"❌ Failed to apply {entry['kind']} result for {entry['target']}: {e}")
+                failed[request_id] = str(e)
+
+        missing = set(entries) - seen
+        for request_id in missing:
+            failed[request_id] = "no result"
+        print(f"📥 Ingested {applied} result(s) from {results_path}, {len(failed)} failed or missing")
+        return {"applied": applied, "failed": failed}
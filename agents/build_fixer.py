@@ -3,6 +3,8 @@
 import os
 from llm.prompt_loader import load_prompt
 from llm.markdown_utils import clean_markdown_code
+from utils.project_lock import write_project_file
+from utils.telemetry import traced
 
 GRADLE_PATH = "build.gradle"
 PROMPT_PATH = "prompts/gradle_fix_prompt.txt"
@@ -12,11 +14,12 @@ class BuildFixerAgent:
         self.client = client
         self.output_dir = output_dir
 
+    @traced("gradle_fix")
     def fix_gradle(self, build_log):
         gradle_file = os.path.join(self.output_dir, GRADLE_PATH)
         if not os.path.exists(gradle_file):
             print("⚠️  build.gradle not found, creating default...")
-            open(gradle_file, 'w', encoding='utf-8').write("plugins { id 'java' }")
+            write_project_file(self.output_dir, GRADLE_PATH, "plugins { id 'java' }")
 
         with open(gradle_file, 'r', encoding='utf-8') as f:
             gradle_content = f.read()
@@ -34,7 +37,6 @@ class BuildFixerAgent:
 
         fixed_gradle = clean_markdown_code(response.choices[0].message.content)
 
-        with open(gradle_file, 'w', encoding='utf-8') as f:
-            f.write(fixed_gradle)
+        write_project_file(self.output_dir, GRADLE_PATH, fixed_gradle)
 
         print("🛠️  Updated build.gradle based on build log errors.")
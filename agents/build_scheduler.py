@@ -0,0 +1,185 @@
+# agents/build_scheduler.py
+
+import os
+import re
+from utils.build_log_filter import BuildLogFilter
+from utils.project_lock import write_project_file
+from utils.telemetry import traced
+
+# javac stops listing errors at -Xmaxerrs (100 by default); a file missing from a truncated log proves nothing
+TRUNCATED_PATTERN = re.compile(r"only showing the first \d+ errors")
+# javac stops before attribution when any file fails to parse: files it does not mention were never type-checked
+PARSE_ERROR_PATTERN = re.compile(
+    r"expected$|^illegal (start|character)|^reached end of file while parsing|^unclosed |^not a statement$|"
+    r"^'(else|catch|finally)' without|^orphaned |^malformed |^class, interface")
+FAILURE_TAIL_LINES = 30  # log lines reported for a file that fails the build without a diagnostic
+
+
+class BuildSchedulerAgent:
+    """
+    Validates a batch of freshly fixed files with as few Gradle builds as possible.
+    All fixes are applied and built once; diagnostics are attributed to the batch files they point at.
+    Files the build cannot vouch for (failed build without parseable diagnostics, or a truncated
+    error list) are bisected: half of them are reverted to their pre-fix content and the other half
+    is rebuilt, recursively, so only the files that really fail go back for another attempt.
+    """
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.project_dir = validator.project_dir
+        self.builds = 0
+        self._before = {}
+
+    def snapshot(self, targets):
+        """Remembers the current content of targets (None if missing) before they are rewritten."""
+        for target in targets:
+            self._before[target] = self._read(target)
+
+    def _read(self, target):
+        path = os.path.join(self.project_dir, target)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _apply(self, target, content):
+        if content is not None:
+            write_project_file(self.project_dir, target, content)
+            return
+        path = os.path.join(self.project_dir, target)
+        with self.validator.lock:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _build(self):
+        with self.validator.lock:
+            success = self.validator.run_build()
+            build_log = self.validator.get_last_build_log()
+        self.builds += 1
+        return success, build_log
+
+    @staticmethod
+    def _matches(diagnostic_file, target):
+        reported = diagnostic_file.replace("\\", "/")
+        normalized = target.replace("\\", "/")
+        if "/" not in normalized:
+            return os.path.basename(reported) == normalized
+        return reported == normalized or reported.endswith("/" + normalized)
+
+    def _attribute(self, targets, success, build_log):
+        """
+        Splits targets by what one build says about them.
+        :return: (failed {target: error text}, passed [targets], ambiguous [targets])
+        """
+        if success:
+            return {}, list(targets), []
+
+        diagnostics = [d for d in BuildLogFilter.parse_diagnostics(build_log) if d["kind"] == "error"]
+        failed, unmentioned = {}, []
+        for target in targets:
+            own = [d["text"] for d in diagnostics if self._matches(d["file"], target)]
+            if own:
+                failed[target] = "\n".join(own)
+            else:
+                unmentioned.append(target)
+
+        if self._inconclusive(success, build_log, diagnostics):
+            return failed, [], unmentioned
+        return failed, unmentioned, []
+
+    @staticmethod
+    def _inconclusive(success, build_log, diagnostics=None):
+        """True when a failed build says nothing reliable about files it does not mention."""
+        if success:
+            return False
+        if diagnostics is None:
+            diagnostics = [d for d in BuildLogFilter.parse_diagnostics(build_log) if d["kind"] == "error"]
+        if not diagnostics or TRUNCATED_PATTERN.search(build_log):
+            return True
+        return any(PARSE_ERROR_PATTERN.search(d["message"]) for d in diagnostics)
+
+    @traced("batch_validation")
+    def validate(self, targets):
+        """
+        Builds the batch (already written to the project) and attributes failures per file.
+        :return: {target: error text}, "" for files that compile.
+        """
+        targets = list(targets)
+        fixed = {t: self._read(t) for t in targets}
+        results = {}
+        builds_before = self.builds
+
+        success, build_log = self._build()
+        failed, passed, ambiguous = self._attribute(targets, success, build_log)
+        results.update(failed)
+        results.update({t: "" for t in passed})
+
+        try:
+            if ambiguous:
+                self._resolve_ambiguous(ambiguous, fixed, build_log, results)
+        finally:
+            # Leave every fix in place, as the per-file flow does
+            for target in targets:
+                if self._read(target) != fixed[target]:
+                    self._apply(target, fixed[target])
+
+        failing = sum(1 for errors in results.values() if errors)
+        print(f"📦 Batch of {len(targets)}: {len(targets) - failing} compile, {failing} fail "
+              f"({self.builds - builds_before} build(s))")
+        return results
+
+    def _stage(self, applied, reverted, fixed, results):
+        """Writes the fixes of `applied` and the pre-fix content of `reverted` and of every file already known to fail."""
+        failing = {t for t, errors in results.items() if errors}
+        for target in applied:
+            if target not in failing:
+                self._apply(target, fixed[target])
+        for target in set(reverted) | failing:
+            before = self._before.get(target, fixed[target])
+            if self._read(target) != before:
+                self._apply(target, before)
+
+    def _resolve_ambiguous(self, ambiguous, fixed, build_log, results):
+        # Baseline without the ambiguous fixes (and without the files already known to fail): if the build
+        # is just as inconclusive, the failure is not theirs to find (broken build script, error list
+        # truncated by other files) and bisecting can't help
+        self._stage([], ambiguous, fixed, results)
+        success, baseline_log = self._build()
+
+        if self._inconclusive(success, baseline_log):
+            for target in ambiguous:
+                results[target] = BuildLogFilter.filter_log_for_file(build_log, target)
+            return
+
+        if any(results.values()):
+            # The failures found so far (e.g. a parse error stopping javac early) may be all that hid
+            # the ambiguous files' own errors: rebuild them without those before splitting the group
+            self._stage(ambiguous, [], fixed, results)
+            success, build_log = self._build()
+            failed, passed, ambiguous = self._attribute(ambiguous, success, build_log)
+            results.update(failed)
+            results.update({t: "" for t in passed})
+            if not ambiguous:
+                return
+
+        print(f"🔀 Build failure not attributable to {len(ambiguous)} file(s); bisecting...")
+        self._bisect(ambiguous, fixed, build_log, results)
+
+    def _bisect(self, group, fixed, build_log, results):
+        if len(group) == 1:
+            # Isolated: this file alone makes the build fail
+            target = group[0]
+            results[target] = BuildLogFilter.filter_log_for_file(build_log, target) or \
+                "\n".join(build_log.splitlines()[-FAILURE_TAIL_LINES:])
+            return
+
+        middle = len(group) // 2
+        for half, other in ((group[:middle], group[middle:]), (group[middle:], group[:middle])):
+            # Known failures stay reverted, otherwise every half build fails because of them
+            self._stage(half, other, fixed, results)
+            success, half_log = self._build()
+            failed, passed, ambiguous = self._attribute(half, success, half_log)
+            results.update(failed)
+            results.update({t: "" for t in passed})
+            if ambiguous:
+                self._bisect(ambiguous, fixed, half_log, results)
@@ -2,32 +2,94 @@
 
 import subprocess
 import os
+import time
+from utils.project_lock import project_lock
+from utils.telemetry import traced
+
+BUILD_MODES = ("full", "incremental", "compile")
 
 class BuildValidatorAgent:
-    def __init__(self, project_dir):
+    """
+    Runs Gradle against the output project.
+    Modes:
+      - full:        ./gradlew clean build (original behaviour, no daemon)
+      - incremental: ./gradlew build --daemon (no clean, reuses up-to-date task outputs)
+      - compile:     ./gradlew compileJava --daemon (incremental compile only, no tests)
+    """
+
+    def __init__(self, project_dir, mode="full", stream_log=False):
+        if mode not in BUILD_MODES:
+            raise ValueError(f"Unsupported build mode: {mode}")
         self.project_dir = project_dir
+        self.mode = mode
+        self.stream_log = stream_log
         self.log_path = "logs/build_logs/latest_build.log"
+        self.lock = project_lock(project_dir)
+        self.last_duration = None
+        self.build_durations = []
+
+    def _build_command(self):
+        if self.mode == "full":
+            return ["./gradlew", "clean", "build"]
+        if self.mode == "incremental":
+            return ["./gradlew", "build", "--daemon"]
+        return ["./gradlew", "compileJava", "--daemon"]
+
+    def warm_up(self):
+        """Starts the Gradle daemon ahead of the first build (no-op in full mode)."""
+        if self.mode == "full":
+            return
+        print("🔥 Warming up Gradle daemon...")
+        subprocess.run(
+            ["./gradlew", "help", "--daemon", "-q"],
+            cwd=self.project_dir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
 
+    def stop_daemon(self):
+        if self.mode == "full":
+            return
+        subprocess.run(["./gradlew", "--stop"], cwd=self.project_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    @traced("build")
     def run_build(self):
-        print("🛠️  Running gradle clean build...")
-        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
-        with open(self.log_path, "w", encoding="utf-8") as log_file:
-            result = subprocess.run(
-                ["./gradlew", "clean", "build"],
-                cwd=self.project_dir,
-                stdout=log_file,
-                stderr=subprocess.STDOUT
-            )
-
-        build_success = result.returncode == 0
+        command = self._build_command()
+
+        # Only one Gradle build may run against the shared output project at a time
+        with self.lock:
+            print(f"🛠️  Running gradle {' '.join(command[1:])}...")
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            start = time.perf_counter()
+            with open(self.log_path, "w", encoding="utf-8") as log_file:
+                process = subprocess.Popen(
+                    command,
+                    cwd=self.project_dir,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace"
+                )
+                for line in process.stdout:
+                    log_file.write(line)
+                    log_file.flush()
+                    if self.stream_log:
+                        print(f"   │ {line.rstrip()}")
+                returncode = process.wait()
+            self.last_duration = time.perf_counter() - start
+            self.build_durations.append(self.last_duration)
+
+        build_success = returncode == 0
         if build_success:
-            print("✅ Gradle build successful")
+            print(f"✅ Gradle build successful ({self.last_duration:.1f}s)")
         else:
-            print("❌ Gradle build failed. See logs/build_logs/latest_build.log")
+            print(f"❌ Gradle build failed after {self.last_duration:.1f}s. See logs/build_logs/latest_build.log")
         return build_success
 
     def get_last_build_log(self):
-        if os.path.exists(self.log_path):
-            with open(self.log_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        return ""
\ No newline at end of file
+        with self.lock:
+            if os.path.exists(self.log_path):
+                with open(self.log_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+        return ""
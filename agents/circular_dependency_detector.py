@@ -1,74 +1,41 @@
 # agents/circular_dependency_detector.py
 
-import os
-import re
-from collections import defaultdict
+from utils.symbol_index import get_symbol_index
+from utils.dependency_graph import ClassDependencyGraph
+from utils.telemetry import traced
 
 class CircularDependencyDetectorAgent:
-    def __init__(self, project_dir):
+    def __init__(self, project_dir, symbol_index=None):
         self.project_dir = project_dir
-        self.dependency_graph = defaultdict(set)
+        self.symbol_index = symbol_index
+        self.graph = None
 
-    def _collect_java_files(self):
-        java_files = []
-        for root, _, files in os.walk(self.project_dir):
-            for f in files:
-                if f.endswith(".java"):
-                    java_files.append(os.path.join(root, f))
-        return java_files
-
-    def _extract_class_and_dependencies(self, file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
-
-        package_match = re.search(r'package\s+([\w\.]+);', code)
-        class_match = re.search(r'(public\s+)?(class|interface)\s+(\w+)', code)
-        if not class_match:
-            return None, []
-
-        full_class_name = class_match.group(3)
-        if package_match:
-            full_class_name = f"{package_match.group(1)}.{full_class_name}"
-
-        dependencies = re.findall(r'(private|protected|public)?\s+(\w+)\s+\w+;', code)
-        referenced_classes = [cls for _, cls in dependencies if cls[0].isupper()]
-        return full_class_name, referenced_classes
-
-    def detect_cycles(self):
-        files = self._collect_java_files()
-
-        for file in files:
-            source_class, deps = self._extract_class_and_dependencies(file)
-            if source_class:
-                for dep in deps:
-                    self.dependency_graph[source_class].add(dep)
-
-        visited = set()
-        rec_stack = set()
-        cycles = []
-
-        def dfs(node):
-            visited.add(node)
-            rec_stack.add(node)
-            for neighbor in self.dependency_graph.get(node, []):
-                if neighbor not in visited:
-                    if dfs(neighbor):
-                        return True
-                elif neighbor in rec_stack:
-                    cycles.append((node, neighbor))
-                    return True
-            rec_stack.remove(node)
-            return False
-
-        for class_name in self.dependency_graph:
-            if class_name not in visited:
-                dfs(class_name)
+    def _graph(self):
+        if self.graph is None:
+            symbol_index = self.symbol_index or get_symbol_index(self.project_dir).build()
+            self.graph = ClassDependencyGraph(symbol_index).build()
+        return self.graph
 
+    def _report(self, cycles):
         if cycles:
-            print("❌ Circular dependencies detected:")
-            for a, b in cycles:
-                print(f" - {a} ↔ {b}")
+            print(f"❌ Circular dependencies detected ({len(cycles)} cycle group(s)):")
+            for cycle in cycles:
+                print(f" - {len(cycle['classes'])} classes: {' → '.join(cycle['cycle'])}")
         else:
             print("✅ No circular dependencies detected.")
 
+    @traced("cycle_detection")
+    def detect_cycles(self):
+        """
+        Finds every strongly connected component of the field/constructor/setter injection graph.
+        :return: list of {"classes": [fqcn...], "cycle": [fqcn, ..., fqcn]} (shortest witness cycle).
+        """
+        cycles = self._graph().cycles()
+        self._report(cycles)
+        return cycles
+
+    def recheck(self, rel_path):
+        """Re-checks only the components a single changed file (relative to the source root) can affect."""
+        cycles = self._graph().recheck(rel_path)
+        self._report(cycles)
         return cycles
@@ -1,40 +1,107 @@
 import os
+import math
 import subprocess
 import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from utils.build_log_filter import BuildLogFilter
+
+MIN_FILES_PER_SHARD = 200
 
 class CompilationScannerAgent:
-    def __init__(self, source_root="output/fixed_codebase/src/main/java", log_dir="logs"):
+    def __init__(self, source_root="output/fixed_codebase/src/main/java", log_dir="logs",
+                 classpath=None, batched=True, shards=None):
         self.source_root = source_root
         self.log_path = os.path.join(log_dir, "compilation_report.json")
+        self.classpath = classpath
+        self.batched = batched
+        self.shards = shards
         os.makedirs(log_dir, exist_ok=True)
 
     def scan(self):
-        report = {}
+        java_files = self._collect_java_files()
+        if self.batched:
+            report = self._scan_batched(java_files)
+        else:
+            report = self._scan_per_file(java_files)
+
+        with open(self.log_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
 
+        print(f"✅ Compilation report saved to {self.log_path} ({len(report)} files with errors)")
+        return report
+
+    def _collect_java_files(self):
+        java_files = []
         for root, _, files in os.walk(self.source_root):
             for file in files:
                 if file.endswith(".java"):
-                    full_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(full_path, self.source_root)
+                    java_files.append(os.path.abspath(os.path.join(root, file)))
+        return sorted(java_files)
 
-                    # Attempt to compile this file
-                    cmd = ["javac", full_path]
-                    result = subprocess.run(cmd, capture_output=True, text=True)
+    def _scan_per_file(self, java_files):
+        # Legacy mode: one javac per file (still compiled into a throwaway directory)
+        output = []
+        for full_path in java_files:
+            output.append(self._run_javac([full_path]))
+        return self._build_report("\n".join(output))
 
-                    if result.returncode != 0:
-                        report[rel_path] = result.stderr.strip()
+    def _scan_batched(self, java_files):
+        if not java_files:
+            return {}
 
-        with open(self.log_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2)
+        shard_count = self.shards or min(os.cpu_count() or 1, math.ceil(len(java_files) / MIN_FILES_PER_SHARD))
+        shard_count = max(1, min(shard_count, len(java_files)))
+        shard_size = math.ceil(len(java_files) / shard_count)
+        shards = [java_files[i:i + shard_size] for i in range(0, len(java_files), shard_size)]
 
-        print(f"✅ Compilation report saved to {self.log_path}")
-        return report
+        print(f"🔎 Compiling {len(java_files)} files in {len(shards)} javac invocation(s)...")
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            outputs = list(executor.map(self._run_javac, shards))
+        return self._build_report("\n".join(outputs))
+
+    def _run_javac(self, files):
+        with tempfile.TemporaryDirectory(prefix="javac_scan_") as class_dir:
+            args_file = os.path.join(class_dir, "sources.txt")
+            with open(args_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(f'"{path}"' for path in files).replace("\\", "/"))
+
+            cmd = [
+                "javac",
+                "-d", class_dir,
+                "-sourcepath", os.path.abspath(self.source_root),
+                "-implicit:none",
+                "-proc:none",
+                "-encoding", "UTF-8",
+                "-Xmaxerrs", "100000",
+                "-nowarn",
+            ]
+            if self.classpath:
+                cmd += ["-cp", self.classpath]
+            cmd.append(f"@{args_file}")
+
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            return result.stderr
 
-# Integration in main.py (add this to the end of the migrate_all block):
-# from agents.compilation_scanner_agent import CompilationScannerAgent
-# ...
-# if args.migrate_all:
-#     ...
-#     print("\n🔎 Scanning individual files for compilation errors...")
-#     scanner = CompilationScannerAgent(source_root=os.path.join(OUTPUT_DIR, "src/main/java"))
-#     scanner.scan()
+    def _build_report(self, javac_output):
+        diagnostics = BuildLogFilter.parse_diagnostics(javac_output)
+        grouped = BuildLogFilter.group_by_file(diagnostics, base_dir=self.source_root)
+
+        report = {}
+        for rel_path, file_diagnostics in sorted(grouped.items()):
+            # Deduplicate diagnostics reported by several shards that pulled the same file in via -sourcepath
+            unique = {}
+            for d in file_diagnostics:
+                unique.setdefault((d["line"], d["column"], d["kind"], d["message"]), d)
+            if not any(d["kind"] == "error" for d in unique.values()):
+                continue
+
+            ordered = sorted(unique.values(), key=lambda d: (d["line"], d["column"] or 0))
+            report[rel_path] = {
+                "stderr": "\n".join(d["text"] for d in ordered).strip(),  # pre-batching format: the file's javac stderr
+                "diagnostics": [
+                    {"line": d["line"], "column": d["column"], "kind": d["kind"], "message": d["message"]}
+                    for d in ordered
+                ]
+            }
+        return report
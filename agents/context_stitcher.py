@@ -1,18 +1,59 @@
 # agents/context_stitcher.py
 
 import os
+import re
 import json
+import threading
+from utils.relationship_store import RelationshipStore, DEFAULT_DB_PATH
+from utils.context_budget import context_part, fill_budget, compression_stats
+from utils.token_counter import count_tokens, DEFAULT_MODEL
+from utils.java_skeleton import skeletonize
+from utils.telemetry import traced
+
+REFERENCE_DIR = "reference_pairs/migrated"
+DEFAULT_TOKEN_BUDGET = 12000
+MANIFEST_DIR = "logs/context"
+
+# Lower is kept first when the budget runs out
+PRIORITY_PRIMARY = 0
+PRIORITY_RELATED = 1
+PRIORITY_FRAMEWORK = 2
+PRIORITY_REFERENCE = 3
+
+PART_MODES = ("full", "skeleton")
+# Only the target and its legacy source need method bodies; the rest is there for signatures
+DEFAULT_PART_MODES = {"legacy": "full", "migrated": "full", "related": "skeleton", "framework": "skeleton",
+                      "reference": "skeleton"}
 
 class ContextStitcherAgent:
-    def __init__(self, legacy_dir, migrated_dir, framework_dir=None, reference_promoter=None, mapping_agent=None):
+    def __init__(self, legacy_dir, migrated_dir, framework_dir=None, reference_promoter=None, mapping_agent=None,
+                 reference_chunks=False, relationship_store=None, token_budget=DEFAULT_TOKEN_BUDGET,
+                 model=DEFAULT_MODEL, manifest_dir=MANIFEST_DIR, part_modes=None):
         self.legacy_dir = legacy_dir
         self.migrated_dir = migrated_dir
         self.framework_dir = framework_dir
         self.promoter = reference_promoter
         self.mapping_agent = mapping_agent
+        self.reference_chunks = reference_chunks
         self.relationship_dir = os.path.join(migrated_dir, "../relationships")
+        if relationship_store is None and RelationshipStore.exists_at(DEFAULT_DB_PATH):
+            relationship_store = RelationshipStore(DEFAULT_DB_PATH)
+        self.relationship_store = relationship_store
+        self.token_budget = token_budget
+        self.model = model
+        self.manifest_dir = manifest_dir
+        self.part_modes = {**DEFAULT_PART_MODES, **(part_modes or {})}
+        self.manifests = {}  # target path -> manifest of the last stitch
+        self.references = {}  # target path -> reference paths the promoter chose in the last stitch
+        self._manifest_lock = threading.Lock()
 
-    def stitch_context(self, target_path):
+    @traced("stitch")
+    def stitch_context(self, target_path, reserved_tokens=0):
+        """
+        Builds the reference context for one target within the token budget.
+        :param reserved_tokens: tokens to leave free for other prompt content (e.g. build errors)
+        :return: Stitched context string.
+        """
         parts = []
 
         # Load relationship file if available
@@ -21,49 +62,128 @@ class ContextStitcherAgent:
         # Add legacy code
         legacy_paths = relationship.get("legacySources", []) if relationship else [self._map_to_legacy_path(target_path)]
         for legacy_path in legacy_paths:
-            legacy_code = self._read_file(self.legacy_dir, legacy_path, label="Legacy")
-            if legacy_code:
-                parts.append(legacy_code)
+            part = self._file_part("legacy", "Legacy", self.legacy_dir, legacy_path, PRIORITY_PRIMARY)
+            if part:
+                parts.append(part)
 
         # Add target file
-        migrated_code = self._read_file(self.migrated_dir, target_path, label="Migrated")
-        if migrated_code:
-            parts.append(migrated_code)
+        migrated_part = self._file_part("migrated", "Migrated", self.migrated_dir, target_path, PRIORITY_PRIMARY)
+        migrated_code = migrated_part["text"] if migrated_part else ""
+        if migrated_part:
+            parts.append(migrated_part)
         else:
             print(f"⚠️ Skipping {target_path} due to missing migrated content")
 
         # Add related co-migrated files
         if relationship:
             for related in relationship.get("relatedMigratedTargets", []):
-                related_code = self._read_file(self.migrated_dir, related, label="Related Target")
-                if related_code:
-                    parts.append(related_code)
+                # Related targets the file actually mentions are more useful than the rest
+                class_name = os.path.splitext(os.path.basename(related))[0]
+                score = 1.0 if migrated_code and class_name in migrated_code else 0.0
+                part = self._file_part("related", "Related Target", self.migrated_dir, related, PRIORITY_RELATED, score)
+                if part:
+                    parts.append(part)
 
         # Optionally add framework context
         if self.framework_dir:
             framework_code = self._try_read_framework_file(target_path)
             if framework_code:
-                parts.append(framework_code)
+                parts.append(self._code_part("framework", "Framework", target_path, framework_code, PRIORITY_FRAMEWORK))
 
         # Add reference files if promoter is present and valid
+        chosen_references = set()
         if self.promoter:
             try:
-                similar_refs = self.promoter.get_similar_files(migrated_code or "")
-                for ref_path in similar_refs:
-                    ref_code = self._read_file("reference_pairs/migrated", ref_path, label="Reference")
-                    if ref_code:
-                        parts.append(ref_code)
+                if self.reference_chunks and self.promoter.has_chunk_index():
+                    # Only the most relevant reference methods instead of whole files
+                    for chunk in self.promoter.get_similar_chunks(migrated_code or ""):
+                        chosen_references.add(chunk["path"])
+                        chunk_code = self._read_chunk(REFERENCE_DIR, chunk)
+                        if chunk_code:
+                            parts.append(context_part("Reference Chunk", chunk["path"], chunk_code,
+                                                      PRIORITY_REFERENCE, chunk["score"]))
+                else:
+                    similar_refs = self.promoter.get_similar_files(migrated_code or "")
+                    chosen_references.update(similar_refs)
+                    for rank, ref_path in enumerate(similar_refs):
+                        # Results come best first
+                        part = self._file_part("reference", "Reference", REFERENCE_DIR, ref_path, PRIORITY_REFERENCE, -rank)
+                        if part:
+                            parts.append(part)
             except Exception as e:
                 print(f"⚠️ Reference promoter failed: {e}")
+        with self._manifest_lock:
+            self.references[target_path] = sorted(chosen_references)
+
+        if not self.token_budget:
+            included = [{"mode": p["mode"], "tokens": count_tokens(p["text"], self.model),
+                         "original_tokens": p["original_tokens"]} for p in parts if p["mode"] == "skeleton"]
+            self._report_compression(target_path, compression_stats(included))
+            return "\n\n".join(p["text"] for p in parts if p["text"])
+
+        texts, manifest = fill_budget(parts, max(0, self.token_budget - reserved_tokens), model=self.model)
+        self._record_manifest(target_path, manifest)
+        self._report_compression(target_path, manifest["compression"])
+        return "\n\n".join(t for t in texts if t)
+
+    def _report_compression(self, target_path, stats):
+        if stats["skeleton_parts"]:
+            print(f"🦴 {target_path}: {stats['skeleton_parts']} skeleton part(s), {stats['original_tokens']} → "
+                  f"{stats['skeleton_tokens']} tokens (ratio {stats['ratio']:.2f}, saved {stats['saved_tokens']})")
+
+    def _file_part(self, kind, label, base_dir, relative_path, priority, score=0.0):
+        code = self._read_file(base_dir, relative_path, label=label, header=False)
+        if not code:
+            return None
+        return self._code_part(kind, label, relative_path, code, priority, score)
+
+    def _code_part(self, kind, label, relative_path, code, priority, score=0.0):
+        """
+        Context part for one source file in the mode configured for its kind. Skeleton parts fall back
+        to the full text when the file does not parse; full non-primary parts can still be
+        skeletonized later if they do not fit the budget.
+        """
+        full_text = f"// --- {label} File: {relative_path} ---\n" + code
+
+        def skeleton():
+            compact = skeletonize(code)
+            return f"// --- {label} File: {relative_path} (skeleton) ---\n" + compact if compact else None
 
-        return "\n\n".join(p for p in parts if p)
+        if self.part_modes.get(kind, "full") == "skeleton":
+            text = skeleton()
+            if text:
+                return context_part(label, relative_path, text, priority, score, mode="skeleton",
+                                    original_tokens=count_tokens(full_text, self.model))
+        compact = skeleton if priority > PRIORITY_PRIMARY else None
+        return context_part(label, relative_path, full_text, priority, score, compact=compact)
 
-    def _read_file(self, base_dir, relative_path, label=""):
+    def _record_manifest(self, target_path, manifest):
+        manifest = {"target": target_path, **manifest}
+        with self._manifest_lock:
+            self.manifests[target_path] = manifest
+        if manifest["dropped"] or any(p["mode"] != "full" for p in manifest["included"]):
+            print(f"✂️  Context for {target_path}: {manifest['used']}/{manifest['budget']} tokens, "
+                  f"{len(manifest['included'])} parts kept, {len(manifest['dropped'])} dropped")
+        try:
+            os.makedirs(self.manifest_dir, exist_ok=True)
+            path = self.manifest_path(target_path)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+        except Exception as e:
+            print(f"❌ Failed to write context manifest for {target_path}: {e}")
+
+    def manifest_path(self, target_path):
+        """logs/context/<package path with dots>.json, so same-named files in other packages don't collide."""
+        name = re.sub(r"[^\w.-]+", "_", target_path.replace("\\", "/").strip("/").replace("/", "."))
+        return os.path.join(self.manifest_dir, name + ".json")
+
+    def _read_file(self, base_dir, relative_path, label="", header=True):
         full_path = os.path.join(base_dir, relative_path)
         if os.path.exists(full_path):
             try:
                 with open(full_path, "r", encoding="utf-8") as f:
-                    return f"// --- {label} File: {relative_path} ---\n" + f.read()
+                    code = f.read()
+                return f"// --- {label} File: {relative_path} ---\n" + code if header else code
             except Exception as e:
                 print(f"❌ Error reading {label} file {relative_path}: {e}")
                 return ""
@@ -71,6 +191,20 @@ class ContextStitcherAgent:
             print(f"⚠️ {label} file not found: {full_path}")
             return ""
 
+    def _read_chunk(self, base_dir, chunk):
+        full_path = os.path.join(base_dir, chunk["path"])
+        try:
+            with open(full_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except Exception as e:
+            print(f"❌ Error reading Reference chunk {chunk['path']}: {e}")
+            return ""
+        member = chunk["class_name"] if chunk["kind"] == "class" else f"{chunk['class_name']}.{chunk['name']}"
+        if chunk["kind"] == "file":
+            member = "whole file"
+        body = "".join(lines[chunk["start_line"] - 1:chunk["end_line"]])
+        return f"// --- Reference {chunk['kind'].title()}: {chunk['path']} ({member}) ---\n" + body
+
     def _map_to_legacy_path(self, target_path):
         if self.mapping_agent:
             return self.mapping_agent.get_source_for_target(target_path) or os.path.basename(target_path)
@@ -80,6 +214,14 @@ class ContextStitcherAgent:
         return None
 
     def _load_relationship(self, target_path):
+        if self.relationship_store is not None:
+            try:
+                return self.relationship_store.get(target_path)
+            except Exception as e:
+                print(f"❌ Error loading relationship for {target_path}: {e}")
+                return None
+
+        # Legacy per-target JSON files
         filename = os.path.basename(target_path).replace(".java", "") + "_relationship.json"
         rel_path = os.path.join(self.relationship_dir, filename)
         if os.path.exists(rel_path):
@@ -1,13 +1,16 @@
 import os
-import javalang
-import difflib
-from utils.accurate_class_indexer import AccurateClassIndexer
+from utils.symbol_index import extract_symbols
+from utils.fuzzy_class_index import get_fuzzy_class_index
+from utils.project_lock import write_project_file
+from utils.telemetry import traced
 
 class CrossReferenceResolverAgent:
     def __init__(self, migrated_dir, class_index):
         self.migrated_dir = migrated_dir
-        self.class_index = class_index  # AccurateClassIndexer instance
+        self.class_index = class_index  # SymbolIndex instance
+        self.fuzzy_index = get_fuzzy_class_index(class_index)
 
+    @traced("cross_reference")
     def resolve(self, target_path):
         file_path = os.path.join(self.migrated_dir, target_path)
         if not os.path.exists(file_path):
@@ -17,42 +20,38 @@ class CrossReferenceResolverAgent:
         with open(file_path, 'r', encoding='utf-8') as f:
             code = f.read()
 
-        try:
-            tree = javalang.parse.parse(code)
-        except Exception as e:
-            print(f"❌ Failed to parse {target_path}: {e}")
+        symbols = extract_symbols(code)
+        if not symbols["parsed"]:
+            print(f"❌ Failed to parse {target_path}")
             return
 
         # Extract imports and types used
-        imports = [imp.path for imp in tree.imports]
-        type_refs = self._extract_type_references(tree)
-        defined_types = [t.name for t in tree.types if hasattr(t, 'name')]
+        imports = {imp.rsplit(".", 1)[-1] for imp in symbols["imports"]}
+        type_refs = self._extract_type_references(symbols)
+        defined_types = {t["name"] for t in symbols["types"]}
 
         undefined_types = [t for t in type_refs if t not in imports and t not in defined_types and not self._is_java_builtin(t)]
         corrections = {}
 
         for t in undefined_types:
-            best_match = difflib.get_close_matches(t, self.class_index.index.keys(), n=1, cutoff=0.7)
-            if best_match:
-                match = best_match[0]
-                full_path = self.class_index.resolve(match)
-                if full_path:
-                    package = full_path.replace("/", ".").rsplit(".java", 1)[0]
-                    corrections[t] = (match, f"import {package};")
+            # Same-named classes are ranked by package proximity to this file
+            best = self.fuzzy_index.best(t, package=symbols["package"], cutoff=0.7)
+            if best:
+                match, fqcn = best["name"], best["fqcn"]
+                if fqcn.rsplit(".", 1)[0] != symbols["package"]:
+                    corrections[t] = (match, f"import {fqcn};")
+                elif match != t:
+                    corrections[t] = (match, None)
 
         updated_code = self._apply_fixes(code, corrections)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(updated_code)
+        write_project_file(self.migrated_dir, target_path, updated_code)
 
         print(f"✅ Cross-reference resolved for {target_path}: {list(corrections.keys())}")
 
-    def _extract_type_references(self, tree):
-        refs = set()
-        for path, node in tree.filter(javalang.tree.ReferenceType):
-            if isinstance(node.name, str):
-                refs.add(node.name)
-        return refs
+    def _extract_type_references(self, symbols):
+        # Fully qualified references (containing a dot) need no import
+        return {name for name in symbols["referenced_types"] if name and "." not in name}
 
     def _is_java_builtin(self, name):
         java_builtins = {'String', 'List', 'Map', 'Integer', 'Boolean', 'Object'}
@@ -75,7 +74,7 @@ class CrossReferenceResolverAgent:
 
         # Add new imports
         for _, (_, import_stmt) in corrections.items():
-            if import_stmt not in existing_imports:
+            if import_stmt and import_stmt not in existing_imports:
                 inserted_imports.add(import_stmt)
 
         # Insert imports after package
@@ -1,43 +1,188 @@
 # agents/embedding_indexer.py
 
 import os
-import json
+import hashlib
+import argparse
+import numpy as np
 from sentence_transformers import SentenceTransformer
+from utils.embedding_store import EmbeddingStore, normalize_rows
+from utils.java_chunker import chunk_java_source, embedding_text
+from utils.ann_index import IVFIndex, default_list_count
+from utils.telemetry import traced
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BATCH_SIZE = 64
+INDEX_PATH = "data/embedding_index.json"
+CHUNK_INDEX_PATH = "data/chunk_index.json"
+IVF_SUFFIX = ".ivf"
 
 class EmbeddingIndexerAgent:
-    def __init__(self, source_dir, index_path="data/embedding_index.json"):
-        self.source_dir = source_dir
-        self.index_path = index_path
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    """
+    Builds the reference embedding index.
+    File mode (default) embeds each whole file; chunked mode embeds class headers and individual
+    methods/constructors and additionally builds an IVF approximate nearest-neighbour index over them.
+    """
 
-    def build_index(self):
-        print(f"🔍 Indexing files from: {self.source_dir}")
+    def __init__(self, source_dir, index_path=None, batch_size=DEFAULT_BATCH_SIZE, model_name=MODEL_NAME, chunked=False):
+        self.source_dir = source_dir
+        self.chunked = chunked
+        self.index_path = index_path or (CHUNK_INDEX_PATH if chunked else INDEX_PATH)
+        self.batch_size = batch_size
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.store = EmbeddingStore(self.index_path)
+        self.ivf_dir = self.store.base_path + IVF_SUFFIX
 
-        embedding_index = {}
+    def _collect_files(self):
+        files_by_path = {}
         for root, _, files in os.walk(self.source_dir):
             for file in files:
                 if file.endswith(".java"):
                     full_path = os.path.join(root, file)
                     rel_path = os.path.relpath(full_path, self.source_dir)
-                    try:
-                        with open(full_path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            embedding = self.model.encode(content, convert_to_tensor=False)
-                            if embedding is not None and len(embedding) > 0:
-                                embedding_index[rel_path] = {
-                                    "content": content,
-                                    "embedding": embedding
-                                }
-                            else:
-                                print(f"⚠️ Skipped file with empty embedding: {rel_path}")
-                    except Exception as e:
-                        print(f"❌ Failed to embed {rel_path}: {e}")
-
-        if not embedding_index:
+                    files_by_path[rel_path] = full_path
+        return dict(sorted(files_by_path.items()))
+
+    def _load_previous(self):
+        """Returns (matrix, {path: [entries]}) of the last build, or (None, {}) if it can't be reused."""
+        if not self.store.exists():
+            return None, {}
+        try:
+            matrix, manifest = self.store.load(mmap=True)
+        except Exception as e:
+            print(f"⚠️ Previous index unreadable, rebuilding from scratch: {e}")
+            return None, {}
+        if manifest.get("model") != self.model_name or manifest.get("chunked", False) != self.chunked:
+            print("ℹ️  Embedding model or index mode changed, rebuilding from scratch.")
+            return None, {}
+        by_path = {}
+        for entry in manifest["entries"]:
+            by_path.setdefault(entry["path"], []).append(entry)
+        return matrix, by_path
+
+    def _units(self, content):
+        """(metadata, text to embed) pairs for one file: the whole file, or one per chunk."""
+        if not self.chunked:
+            return [({}, content)]
+        units = []
+        for chunk in chunk_java_source(content):
+            metadata = {k: chunk[k] for k in ("kind", "name", "class_name", "start_line", "end_line")}
+            units.append((metadata, embedding_text(chunk)))
+        return units
+
+    @staticmethod
+    def _hash(content):
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @traced("embedding_index")
+    def build_index(self, incremental=True):
+        print(f"🔍 Indexing files from: {self.source_dir}")
+
+        files = self._collect_files()
+        previous_matrix, previous_entries = self._load_previous() if incremental else (None, {})
+
+        entries = []
+        reused_rows = {}   # new row -> old row
+        to_embed = []      # (new row, content)
+        skipped = 0
+
+        for rel_path, full_path in files.items():
+            try:
+                with open(full_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"❌ Failed to read {rel_path}: {e}")
+                skipped += 1
+                continue
+
+            content_hash = self._hash(content)
+            previous = previous_entries.get(rel_path)
+            if previous and previous[0].get("hash") == content_hash:
+                for entry in previous:
+                    row = len(entries)
+                    entries.append({**entry, "row": row})
+                    reused_rows[row] = entry["row"]
+                continue
+
+            for metadata, text in self._units(content):
+                row = len(entries)
+                entries.append({"path": rel_path, "hash": content_hash, "row": row, **metadata})
+                to_embed.append((row, text))
+
+        if not entries:
             print("⚠️ No embeddings generated. Index will not be written.")
             return
 
-        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-        with open(self.index_path, "w", encoding="utf-8") as f:
-            json.dump(embedding_index, f, indent=2)
-            print(f"✅ Embedding index written to {self.index_path}")
\ No newline at end of file
+        dim = previous_matrix.shape[1] if previous_matrix is not None else None
+        new_vectors = {}
+        for start in range(0, len(to_embed), self.batch_size):
+            batch = to_embed[start:start + self.batch_size]
+            try:
+                vectors = normalize_rows(self.model.encode(
+                    [content for _, content in batch],
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                ))
+            except Exception as e:
+                print(f"❌ Failed to embed batch starting at {entries[batch[0][0]]['path']}: {e}")
+                continue
+            dim = vectors.shape[1]
+            for (row, _), vector in zip(batch, vectors):
+                new_vectors[row] = vector
+            print(f"   embedded {min(start + self.batch_size, len(to_embed))}/{len(to_embed)} changed {'chunks' if self.chunked else 'files'}")
+
+        # Drop entries whose batch failed, then compact rows
+        kept = [e for e in entries if e["row"] in reused_rows or e["row"] in new_vectors]
+        if not kept or dim is None:
+            print("⚠️ No embeddings generated. Index will not be written.")
+            return
+
+        matrix = np.zeros((len(kept), dim), dtype=np.float32)
+        for new_row, entry in enumerate(kept):
+            old_row = entry["row"]
+            if old_row in new_vectors:
+                matrix[new_row] = new_vectors[old_row]
+            else:
+                matrix[new_row] = previous_matrix[reused_rows[old_row]]
+            entry["row"] = new_row
+
+        # Release the memory map before the store file is replaced
+        previous_matrix = None
+        self.store.save(matrix, kept, model=self.model_name, chunked=self.chunked)
+
+        removed = len(set(previous_entries) - set(files))
+        print(f"✅ Embedding index written to {self.store.matrix_path} "
+              f"({len(new_vectors)} embedded, {len(reused_rows)} unchanged, {removed} removed, {skipped} unreadable)")
+
+        if self.chunked:
+            self._build_ann_index(matrix)
+
+    def _build_ann_index(self, matrix):
+        # Re-use trained centroids while the corpus hasn't doubled; only vectors get re-assigned
+        centroids = None
+        if IVFIndex.exists(self.ivf_dir):
+            previous = IVFIndex.load(self.ivf_dir, mmap=True)
+            same_shape = previous.centroids.shape[1] == matrix.shape[1]
+            same_mode = (previous.centroids.shape[0] > 1) == (default_list_count(matrix.shape[0]) > 1)
+            if same_shape and same_mode and matrix.shape[0] <= 2 * len(previous):
+                centroids = np.array(previous.centroids)
+            previous = None
+
+        index = IVFIndex.build(matrix, centroids=centroids)
+        index.save(self.ivf_dir)
+        print(f"✅ ANN index written to {self.ivf_dir} ({len(index)} chunks in {index.centroids.shape[0]} lists"
+              f"{', centroids re-used' if centroids is not None else ''})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the reference embedding index")
+    parser.add_argument("--source-dir", default="reference_pairs/migrated")
+    parser.add_argument("--index-path", default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--full", action="store_true", help="Re-embed every file instead of only changed ones")
+    parser.add_argument("--chunks", action="store_true", help="Index class/method chunks with an ANN index instead of whole files")
+    args = parser.parse_args()
+
+    indexer = EmbeddingIndexerAgent(args.source_dir, args.index_path, batch_size=args.batch_size, chunked=args.chunks)
+    indexer.build_index(incremental=not args.full)
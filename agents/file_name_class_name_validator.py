@@ -1,17 +1,20 @@
 # agents/file_name_class_name_validator.py
 
 import os
-import re
 import json
+from utils.symbol_index import get_symbol_index
+from utils.telemetry import traced
 
 MAPPING_PATH = "data/mapping.json"
 MISMATCH_LOG_PATH = "logs/filename_mismatches.json"
 
 class FileNameClassNameValidatorAgent:
-    def __init__(self, migrated_dir):
+    def __init__(self, migrated_dir, symbol_index=None):
         self.migrated_dir = migrated_dir
+        self.symbol_index = symbol_index
         self.mismatches = []
 
+    @traced("filename_validation")
     def run(self):
         print("🔍 Running FileName-ClassName Validator...")
         self._load_mapping()
@@ -31,18 +34,24 @@ class FileNameClassNameValidatorAgent:
             json.dump(self.mapping, f, indent=2)
 
     def _scan_and_fix(self):
-        for root, _, files in os.walk(self.migrated_dir):
-            for file in files:
-                if file.endswith(".java"):
-                    path = os.path.join(root, file)
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    match = re.search(r'public\s+class\s+(\w+)', content)
-                    if match:
-                        declared_class = match.group(1)
-                        file_base = os.path.splitext(file)[0]
-                        if declared_class != file_base:
-                            self._fix(path, file, declared_class)
+        symbol_index = self.symbol_index or get_symbol_index(self.migrated_dir).build()
+        for rel_path, symbols in list(symbol_index.files.items()):
+            declared_class = self._public_class(symbols)
+            if declared_class:
+                file = os.path.basename(rel_path)
+                file_base = os.path.splitext(file)[0]
+                if declared_class != file_base:
+                    path = os.path.join(self.migrated_dir, rel_path)
+                    self._fix(path, file, declared_class)
+                    symbol_index.move_file(rel_path, os.path.join(os.path.dirname(rel_path), f"{declared_class}.java"))
+        symbol_index.save()
+
+    @staticmethod
+    def _public_class(symbols):
+        for declared in symbols["types"]:
+            if declared["kind"] == "class" and "public" in declared["modifiers"] and declared["qualified_name"] == declared["name"]:
+                return declared["name"]
+        return None
 
     def _fix(self, full_path, old_file_name, class_name):
         old_name = os.path.basename(full_path)
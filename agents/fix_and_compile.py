@@ -1,50 +1,74 @@
 # agents/fix_and_compile.py
 
 import os
-from utils.prompt_loader import load_prompt
-from utils.markdown_cleaner import clean_markdown_code
+from llm.prompt_loader import load_prompt
+from llm.markdown_utils import clean_markdown_code
+from llm.streaming import request_completion, default_validators, StreamAborted
+from utils.project_lock import write_project_file
+from utils.telemetry import traced
 
 PROMPT_PATH = "prompts/fix_and_compile_prompt.txt"
+FIX_MODEL = "gpt-4o"
+FIX_TEMPERATURE = 0.3
 
 class FixAndCompileAgent:
-    def __init__(self, client, legacy_dir, migrated_dir, output_dir):
+    def __init__(self, client, legacy_dir, migrated_dir, output_dir, stream=False):
         self.client = client
+        self.stream = stream  # stream the answer and abort as soon as it is clearly not the fixed class
         self.legacy_dir = legacy_dir
         self.migrated_dir = migrated_dir
         self.output_dir = output_dir
 
-    def fix_file(self, target_path, context_stitcher):
+    def build_request(self, target_path, context, build_errors=None):
+        """
+        Builds the chat completion request for one fix, without sending it.
+        :return: Request kwargs, or None if the migrated file is missing.
+        """
         assert self.legacy_dir not in target_path, "❌ Attempted to write to legacy directory. Aborting."
 
         migrated_file_path = os.path.join(self.migrated_dir, target_path)
         if not os.path.exists(migrated_file_path):
             print(f"❌ File not found: {migrated_file_path}")
-            return {"fix_log": {"file_missing": True}, "fixed_code": ""}
+            return None
 
         with open(migrated_file_path, "r", encoding="utf-8") as f:
             original_code = f.read()
 
-        context = context_stitcher.stitch_context(target_path)
+        references = context or ""
+        if build_errors:
+            references += f"\n\n// --- Build Errors: {target_path} ---\n{build_errors}"
 
         prompt = load_prompt(PROMPT_PATH, {
             "broken_code": original_code,
-            "references": context
+            "references": references
         })
+        return {
+            "model": FIX_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": FIX_TEMPERATURE,
+        }
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-
-        fixed_code = clean_markdown_code(response.choices[0].message.content)
+    def apply_result(self, target_path, content):
+        """Writes the model's answer for target_path into the output project."""
+        fixed_code = clean_markdown_code(content)
 
-        output_path = os.path.join(self.output_dir, target_path)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(fixed_code)
+        write_project_file(self.output_dir, target_path, fixed_code)
 
         return {
             "success": True,
             "fixed_code": fixed_code
         }
+
+    @traced("fix")
+    def fix_file(self, target_path, context, build_errors=None):
+        request = self.build_request(target_path, context, build_errors)
+        if request is None:
+            return {"fix_log": {"file_missing": True}, "fixed_code": ""}
+
+        class_name = os.path.splitext(os.path.basename(target_path))[0]
+        try:
+            content = request_completion(self.client, request, self.stream, default_validators(class_name))
+        except StreamAborted as e:
+            print(f"✂️  Aborted fix generation for {target_path} after {len(e.partial)} chars: {e.reason}")
+            return {"success": False, "fixed_code": "", "fix_log": {"stream_aborted": e.reason}}
+        return self.apply_result(target_path, content)
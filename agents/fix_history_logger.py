@@ -1,6 +1,7 @@
 # agents/fix_history_logger.py
 
 import os
+import re
 import json
 
 class FixHistoryLogger:
@@ -8,9 +9,13 @@ class FixHistoryLogger:
         self.log_dir = log_dir
         os.makedirs(self.log_dir, exist_ok=True)
 
+    def history_path(self, target_path):
+        """<log_dir>/<package path with dots>.json, so same-named classes in other packages don't collide."""
+        name = re.sub(r"[^\w.-]+", "_", target_path.replace("\\", "/").strip("/").replace("/", "."))
+        return os.path.join(self.log_dir, name + ".json")
+
     def log(self, target_path, result):
-        file_name = os.path.basename(target_path)
-        log_path = os.path.join(self.log_dir, f"{file_name}.json")
+        log_path = self.history_path(target_path)
 
         history_entry = {
             "file": target_path,
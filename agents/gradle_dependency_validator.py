@@ -1,9 +1,10 @@
 # agents/gradle_dependency_validator.py
 
-import os
 import subprocess
 from llm.prompt_loader import load_prompt
 from llm.markdown_utils import clean_markdown_code
+from utils.project_lock import project_lock, write_project_file
+from utils.telemetry import traced
 
 PROMPT_PATH = "prompts/gradle_dependency_tree_prompt.txt"
 
@@ -12,17 +13,19 @@ class GradleDependencyValidatorAgent:
         self.client = client
         self.project_dir = project_dir
 
+    @traced("gradle_dependencies")
     def analyze_and_fix_conflicts(self):
         print("🔍 Running Gradle dependency insight...")
 
         try:
-            result = subprocess.run(
-                ["./gradlew", "dependencies", "--configuration", "runtimeClasspath"],
-                cwd=self.project_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
-            )
+            with project_lock(self.project_dir):
+                result = subprocess.run(
+                    ["./gradlew", "dependencies", "--configuration", "runtimeClasspath"],
+                    cwd=self.project_dir,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True
+                )
             dep_tree = result.stdout
 
             if "FAILED" in dep_tree or result.returncode != 0:
@@ -38,10 +41,7 @@ class GradleDependencyValidatorAgent:
             )
 
             updated_gradle = clean_markdown_code(response.choices[0].message.content)
-            gradle_file = os.path.join(self.project_dir, "build.gradle")
-
-            with open(gradle_file, "w", encoding="utf-8") as f:
-                f.write(updated_gradle)
+            write_project_file(self.project_dir, "build.gradle", updated_gradle)
 
             print("✅ build.gradle updated to resolve dependency conflicts.")
             return True
@@ -0,0 +1,208 @@
+# agents/incremental_planner.py
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import deque
+from agents.fix_and_compile import PROMPT_PATH, FIX_MODEL, FIX_TEMPERATURE
+from agents.context_stitcher import REFERENCE_DIR
+from utils.dependency_graph import ClassDependencyGraph
+
+FINGERPRINT_PATH = "data/fingerprints.json"
+FINGERPRINT_VERSION = 1
+
+# Component -> reason shown when it changed
+COMPONENT_REASONS = {
+    "migrated": "migrated file changed",
+    "legacy": "legacy sources changed",
+    "related": "related targets changed",
+    "references": "chosen references changed",
+    "prompt": "fix prompt template changed",
+    "settings": "model or context settings changed",
+}
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class IncrementalPlannerAgent:
+    """
+    Decides which targets need a new fix after the inputs changed. A target's fingerprint hashes
+    everything its fix prompt is built from: the migrated file, its legacy sources and co-migrated
+    targets from mapping.json, the references the promoter chose last time, the fix prompt template
+    and the model/context settings. Fingerprints are stored in data/fingerprints.json after each
+    successful fix; plan() returns the targets whose fingerprint changed plus everything depending on
+    them, transitively (classes injecting a changed class, co-migrated targets), each with the reasons.
+    """
+
+    def __init__(self, mapping_agent, migrated_dir, legacy_dir, context_stitcher, output_dir, symbol_index=None,
+                 store_path=FINGERPRINT_PATH):
+        self.mapping_agent = mapping_agent
+        self.migrated_dir = migrated_dir
+        self.legacy_dir = legacy_dir
+        self.stitcher = context_stitcher
+        self.output_dir = output_dir
+        self.symbol_index = symbol_index
+        self.store_path = store_path
+        self.fingerprints = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # ---- persistence -------------------------------------------------------------------
+
+    def _load(self):
+        if not os.path.exists(self.store_path):
+            return
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == FINGERPRINT_VERSION:
+                self.fingerprints = data.get("targets", {})
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable fingerprint store {self.store_path}: {e}")
+
+    def save(self):
+        with self._lock:
+            targets = dict(self.fingerprints)
+        directory = os.path.dirname(self.store_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": FINGERPRINT_VERSION, "targets": targets}, f)
+        os.replace(tmp_path, self.store_path)
+
+    # ---- fingerprints ------------------------------------------------------------------
+
+    @staticmethod
+    def _file_hash(path, cache):
+        if path not in cache:
+            try:
+                with open(path, "rb") as f:
+                    cache[path] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                cache[path] = None
+        return cache[path]
+
+    def _settings(self):
+        return {
+            "provider": os.getenv("LLM_PROVIDER", "azure").lower(),
+            "model": FIX_MODEL,
+            "temperature": FIX_TEMPERATURE,
+            "token_budget": self.stitcher.token_budget,
+            "part_modes": self.stitcher.part_modes,
+            "reference_chunks": self.stitcher.reference_chunks,
+        }
+
+    def _chosen_references(self, target):
+        # What the promoter returned, whether or not the token budget kept all of it
+        return self.stitcher.references.get(target)
+
+    def fingerprint(self, target, references, cache=None):
+        """
+        :param references: reference paths (relative to the reference dir) the target's context used
+        :param cache: optional {path: hash} shared across targets while the files can't change
+        :return: {component: hash} for target's current inputs.
+        """
+        cache = {} if cache is None else cache
+        legacy = self.mapping_agent.get_sources_by_target(target)
+        related = self.mapping_agent.get_related_targets(target)
+        return {
+            "migrated": self._file_hash(os.path.join(self.migrated_dir, target), cache),
+            "legacy": _digest([(p, self._file_hash(os.path.join(self.legacy_dir, p), cache)) for p in legacy]),
+            "related": _digest([(p, self._file_hash(os.path.join(self.migrated_dir, p), cache)) for p in related]),
+            "references": _digest([(p, self._file_hash(os.path.join(REFERENCE_DIR, p), cache)) for p in references]),
+            "prompt": self._file_hash(PROMPT_PATH, cache),
+            "settings": _digest(self._settings()),
+        }
+
+    def record(self, target):
+        """Stores target's fingerprint after a successful fix (references from the stitch that fed it)."""
+        previous = self.fingerprints.get(target, {})
+        references = self._chosen_references(target)
+        if references is None:
+            references = previous.get("references", [])
+        components = self.fingerprint(target, references)
+        with self._lock:
+            self.fingerprints[target] = {"components": components, "references": references,
+                                         "time": round(time.time(), 3)}
+
+    def record_resumed(self, target):
+        """
+        Fingerprints a target the journal reports as fixed by an interrupted run, unless that run
+        already stored its fingerprint (which, unlike one taken now, matches the inputs it was fixed from).
+        """
+        if target not in self.fingerprints:
+            self.record(target)
+
+    # ---- planning ----------------------------------------------------------------------
+
+    def _changes(self, target, cache):
+        stored = self.fingerprints.get(target)
+        if stored is None:
+            return ["never fixed"]
+        if not os.path.exists(os.path.join(self.output_dir, target)):
+            return ["output file missing"]
+        current = self.fingerprint(target, stored.get("references", []), cache)
+        return [COMPONENT_REASONS[name] for name, digest in current.items()
+                if stored["components"].get(name) != digest]
+
+    def _direct_dependents(self, target, graph):
+        found = list(self.mapping_agent.get_related_targets(target))
+        if graph is not None:
+            for fqcn in graph.file_classes.get(target, ()):
+                found.extend(self.symbol_index.file_for_class(user) for user in graph.reverse.get(fqcn, ()))
+        return found
+
+    def _dependents(self, changed, targets):
+        """
+        Walks dependents transitively (breadth-first, each target once).
+        :return: {dependent target: ([changed targets it depends on or was co-migrated with], target it was reached through)}
+        """
+        known = set(targets)
+        dependents = {}
+        causes_of = {target: [target] for target in changed}
+        graph = ClassDependencyGraph(self.symbol_index).build() if self.symbol_index is not None else None
+        queue = deque(changed)
+        while queue:
+            target = queue.popleft()
+            for dependent in self._direct_dependents(target, graph):
+                if dependent not in known or dependent in changed:
+                    continue
+                if dependent not in dependents:
+                    dependents[dependent] = ([], target)
+                    causes_of[dependent] = dependents[dependent][0]
+                    queue.append(dependent)
+                causes = dependents[dependent][0]
+                causes.extend(c for c in causes_of[target] if c not in causes)
+        return dependents
+
+    def plan(self, targets):
+        """:return: {target: [reasons]} for every target to reprocess, in mapping order."""
+        cache = {}
+        changed = {}
+        for target in targets:
+            reasons = self._changes(target, cache)
+            if reasons:
+                changed[target] = reasons
+
+        roots = set(changed)
+        for dependent, (causes, via) in self._dependents(changed, targets).items():
+            shown = ", ".join(causes[:3]) + (f" (+{len(causes) - 3} more)" if len(causes) > 3 else "")
+            changed[dependent] = [f"depends on changed {shown}" + ("" if via in roots else f" via {via}")]
+
+        # Targets dropped from mapping.json no longer need a fingerprint
+        mapped = set(targets)
+        with self._lock:
+            for target in [t for t in self.fingerprints if t not in mapped]:
+                del self.fingerprints[target]
+        return {t: changed[t] for t in targets if t in changed}
+
+    @staticmethod
+    def print_plan(plan, total):
+        print(f"🧮 Incremental plan: {len(plan)}/{total} target(s) to reprocess")
+        for target, reasons in plan.items():
+            print(f"   - {target}: {'; '.join(reasons)}")
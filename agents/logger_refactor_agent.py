@@ -4,15 +4,20 @@ import os
 import re
 from llm.prompt_loader import load_prompt
 from llm.markdown_utils import clean_markdown_code
+from llm.streaming import request_completion, default_validators, StreamAborted
+from utils.project_lock import write_project_file
+from utils.telemetry import traced
 
 PROMPT_PATH = "prompts/logger_refactor_prompt.txt"
 
 class LoggerRefactorAgent:
-    def __init__(self, client, output_dir):
+    def __init__(self, client, output_dir, stream=False):
         self.client = client
+        self.stream = stream
         self.output_dir = output_dir
 
-    def inject_logger(self, file_path):
+    def build_request(self, file_path):
+        """:return: Chat completion request kwargs, or None if the file is missing or needs no change."""
         full_path = os.path.join(self.output_dir, file_path)
         if not os.path.exists(full_path):
             print(f"⚠️  File not found for logger enhancement: {file_path}")
@@ -25,20 +30,34 @@ class LoggerRefactorAgent:
             return None  # skip if no print/log statements found
 
         prompt = load_prompt(PROMPT_PATH, {"java_code": original_code})
+        return {
+            "model": "gpt-4o",
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2
+        }
+
+    def apply_result(self, file_path, content):
+        refactored_code = clean_markdown_code(content)
+
+        write_project_file(self.output_dir, file_path, refactored_code)
+
+        print(f"✅ Logging enhanced in: {file_path}")
+        return refactored_code
+
+    @traced("logger_refactor")
+    def inject_logger(self, file_path):
+        request = self.build_request(file_path)
+        if request is None:
+            return None
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2
-            )
-            refactored_code = clean_markdown_code(response.choices[0].message.content)
-
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(refactored_code)
-
-            print(f"✅ Logging enhanced in: {file_path}")
-            return refactored_code
+            class_name = os.path.splitext(os.path.basename(file_path))[0]
+            content = request_completion(self.client, request, self.stream, default_validators(class_name))
+            return self.apply_result(file_path, content)
+
+        except StreamAborted as e:
+            print(f"✂️  Aborted logger refactor for {file_path}: {e.reason}")
+            return None
 
         except Exception as e:
             print(f"❌ Failed to refactor logger in {file_path}: {e}")
@@ -3,40 +3,114 @@
 import json
 import os
 
+READ_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+def iter_mapping_entries(mapping_path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Streams the entries of a top-level JSON array one object at a time,
+    so a very large mapping.json is never held in memory as text and parsed objects at once.
+    """
+    decoder = json.JSONDecoder()
+    with open(mapping_path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        pos = 0
+        eof = not buffer
+        started = False
+
+        while True:
+            # Skip whitespace and separators, pulling in more text when the buffer runs dry
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    if started:
+                        raise ValueError(f"{mapping_path}: unterminated JSON array")
+                    return
+                buffer, pos = buffer[pos:] + f.read(chunk_size), 0
+                eof = pos >= len(buffer)
+                continue
+
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"{mapping_path} must contain a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+
+            try:
+                entry, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Entry spans the chunk boundary: drop consumed text and read more
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+
+            yield entry
+
 class MappingLoaderAgent:
     def __init__(self, mapping_path):
         self.mapping_path = mapping_path
         self._load()
 
     def _load(self):
+        self.mapping = []
         if os.path.exists(self.mapping_path):
-            with open(self.mapping_path, 'r', encoding='utf-8') as f:
-                self.mapping = json.load(f)
-        else:
-            self.mapping = []
+            self.mapping = list(iter_mapping_entries(self.mapping_path))
+        self._build_indexes()
+
+    def _build_indexes(self):
+        # dicts double as insertion-ordered sets, so lookups return targets in mapping order
+        self._targets = {}
+        self._targets_by_source = {}
+        self._sources_by_target = {}
+        self._siblings_by_target = {}
 
-    def get_all_targets(self):
-        targets = []
         for entry in self.mapping:
-            targets.extend(entry.get("targetPath", []))
-        return list(set(targets))
+            sources = _as_list(entry.get("sourcePath"))
+            targets = _as_list(entry.get("targetPath"))
+            for tgt in targets:
+                self._targets[tgt] = None
+                target_sources = self._sources_by_target.setdefault(tgt, {})
+                for src in sources:
+                    target_sources[src] = None
+                siblings = self._siblings_by_target.setdefault(tgt, {})
+                for other in targets:
+                    if other != tgt:
+                        siblings[other] = None
+            for src in sources:
+                source_targets = self._targets_by_source.setdefault(src, {})
+                for tgt in targets:
+                    source_targets[tgt] = None
+
+    def get_all_targets(self):
+        return list(self._targets)
 
     def get_targets_by_source(self, source_path):
-        results = []
-        for entry in self.mapping:
-            if source_path in entry.get("sourcePath", []):
-                results.extend(entry.get("targetPath", []))
-        return list(set(results))
+        return list(self._targets_by_source.get(source_path, {}))
 
     def get_sources_by_target(self, target_path):
-        results = []
-        for entry in self.mapping:
-            if target_path in entry.get("targetPath", []):
-                results.extend(entry.get("sourcePath", []))
-        return list(set(results))
+        return list(self._sources_by_target.get(target_path, {}))
+
+    def get_source_for_target(self, target_path):
+        sources = self._sources_by_target.get(target_path)
+        return next(iter(sources), None) if sources else None
+
+    def get_related_targets(self, target_path):
+        """Targets co-migrated with target_path (sharing a mapping entry), excluding itself."""
+        return list(self._siblings_by_target.get(target_path, {}))
 
     def reload(self):
         self._load()
 
     def get_mapping(self):
-        return self.mapping
\ No newline at end of file
+        return self.mapping
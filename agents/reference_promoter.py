@@ -1,54 +1,111 @@
 # agents/reference_promoter.py
 
 import os
-import json
-from sentence_transformers import SentenceTransformer, util
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from utils.embedding_store import EmbeddingStore, normalize_rows
+from utils.ann_index import IVFIndex
+from utils.telemetry import traced
 
 INDEX_PATH = "data/embedding_index.json"
+CHUNK_INDEX_PATH = "data/chunk_index.json"
+QUERY_BLOCK_SIZE = 256
 
 class ReferencePromoterAgent:
-    def __init__(self, reference_dirs, model_name="all-MiniLM-L6-v2"):
+    def __init__(self, reference_dirs, model_name="all-MiniLM-L6-v2", index_path=INDEX_PATH, chunk_index_path=CHUNK_INDEX_PATH):
         self.model = SentenceTransformer(model_name)
         self.reference_dirs = reference_dirs
-        self.embedding_index = self._load_index()  # ✅ Assign the loaded index
+        self.index_path = index_path
+        self.embeddings, self.file_refs = self._load_index()  # ✅ Loaded once, memory-mapped
+        self.chunk_index, self.chunk_refs = self._load_chunk_index(chunk_index_path)
 
     def _load_index(self):
-        if not os.path.exists(INDEX_PATH):
-            print(f"ℹ️  Index file not found at {INDEX_PATH}, proceeding without reference.")
-            return {}
+        store = EmbeddingStore(self.index_path)
         try:
-            with open(INDEX_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            # Legacy JSON index: convert once into the binary store, then memory-map that
+            if os.path.exists(self.index_path) and store.is_stale(self.index_path):
+                print(f"🔄 Converting {self.index_path} to binary embedding store...")
+                store.convert_from_json(self.index_path)
+
+            if not store.exists():
+                print(f"ℹ️  Index file not found at {self.index_path}, proceeding without reference.")
+                return None, []
+
+            matrix, manifest = store.load(mmap=True)
+            return matrix, [entry["path"] for entry in manifest["entries"]]
         except Exception as e:
             print(f"❌ Failed to load embedding index: {e}")
-            return {}
+            return None, []
+
+    def _load_chunk_index(self, chunk_index_path):
+        store = EmbeddingStore(chunk_index_path)
+        ivf_dir = store.base_path + ".ivf"
+        if not store.exists() or not IVFIndex.exists(ivf_dir):
+            return None, []
+        try:
+            matrix, manifest = store.load(mmap=True)
+            return IVFIndex.load(ivf_dir, matrix, mmap=True), manifest["entries"]
+        except Exception as e:
+            print(f"❌ Failed to load chunk index: {e}")
+            return None, []
+
+    def has_chunk_index(self):
+        return self.chunk_index is not None and bool(self.chunk_refs)
+
+    def _encode(self, texts):
+        embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return normalize_rows(embeddings)
 
+    def _top_k(self, scores, top_k):
+        k = min(top_k, scores.shape[0])
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [self.file_refs[i] for i in ranked]
+
+    @traced("embedding_query")
     def get_similar_files(self, input_code, top_k=5):
-        if not self.embedding_index:
+        if self.embeddings is None or not self.file_refs:
             print("⚠️ No embedding index found or it's empty. Skipping similarity check.")
             return []
 
-        input_embedding = self.model.encode(input_code, convert_to_tensor=False)
+        query = self._encode([input_code])[0]
+        scores = self.embeddings @ query
+        return self._top_k(scores, top_k)
 
-        index_embeddings = []
-        file_refs = []
+    @traced("embedding_query")
+    def get_similar_files_batch(self, input_codes, top_k=5):
+        """
+        Scores many inputs against the index with one matrix multiply per block of queries.
+        :return: One list of reference paths per input, in input order.
+        """
+        if self.embeddings is None or not self.file_refs:
+            print("⚠️ No embedding index found or it's empty. Skipping similarity check.")
+            return [[] for _ in input_codes]
 
-        for file_path, data in self.embedding_index.items():
-            embedding = data.get("embedding")
-            if embedding:
-                index_embeddings.append(embedding)
-                file_refs.append(file_path)
+        queries = self._encode(list(input_codes))
+        results = []
+        for start in range(0, queries.shape[0], QUERY_BLOCK_SIZE):
+            block_scores = queries[start:start + QUERY_BLOCK_SIZE] @ self.embeddings.T
+            results.extend(self._top_k(row, top_k) for row in block_scores)
+        return results
 
-        if not index_embeddings:
-            print("⚠️ No valid reference embeddings found in the index. Skipping reference promotion.")
-            return []
-
-        try:
-            similarities = cosine_similarity([input_embedding], index_embeddings)[0]
-        except Exception as e:
-            print(f"❌ Failed to compute cosine similarity: {e}")
+    @traced("embedding_query")
+    def get_similar_chunks(self, input_code, top_k=8, n_probe=16):
+        """
+        Approximate nearest class/method chunks from the chunk index.
+        :return: list of dicts with path, kind, name, class_name, start_line, end_line and score, best first.
+        """
+        if not self.has_chunk_index():
+            print("⚠️ No chunk index found. Skipping chunk similarity check.")
             return []
 
-        scored = sorted(zip(file_refs, similarities), key=lambda x: x[1], reverse=True)
-        return [path for path, score in scored[:top_k]]
+        query = self._encode([input_code])[0]
+        ids, scores = self.chunk_index.search(query, top_k=top_k, n_probe=n_probe)
+        results = []
+        for row, score in zip(ids, scores):
+            entry = self.chunk_refs[int(row)]
+            results.append({**{k: entry.get(k) for k in ("path", "kind", "name", "class_name", "start_line", "end_line")},
+                            "score": float(score)})
+        return results
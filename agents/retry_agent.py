@@ -1,49 +1,148 @@
-import os
-from agents.context_stitcher import ContextStitcherAgent
 from agents.cross_reference_resolver import CrossReferenceResolverAgent
-from agents.fix_and_compile import FixAndCompileAgent
-from agents.build_validator import BuildValidatorAgent
-from agents.gradle_dependency_validator import GradleDependencyValidatorAgent
-from agents.build_fixer import BuildFixerAgent
-from agents.fix_history_logger import FixHistoryLogger
+from agents.build_scheduler import BuildSchedulerAgent
 from utils.build_log_filter import BuildLogFilter
-from utils.project_structure_scanner import ProjectStructureScanner
+from utils.symbol_index import get_symbol_index
+from utils.token_counter import count_tokens
+from utils.telemetry import telemetry
 
 class RetryAgent:
     def __init__(self, max_retries=3):
         self.max_retries = max_retries
 
     def retry_fix(self, target_file, fix_agent, validator, context_stitcher, gradle_fixer, dep_validator, logger):
-        scanner = ProjectStructureScanner(fix_agent.output_dir)
-        project_structure = scanner.collect_structure()
+        """:return: The last fix result; validated=True only when the build accepted it."""
+        file_errors = ""
+        class_index = get_symbol_index(context_stitcher.migrated_dir)
 
         for attempt in range(1, self.max_retries + 1):
             print(f"\n🔁 Attempt {attempt}/{self.max_retries} for: {target_file}")
 
-            stitched_context = context_stitcher.stitch_context(target_file)
-            build_log = validator.get_last_build_log()
-            file_errors = BuildLogFilter.filter_log_for_file(build_log, target_file)
+            # Leave room in the budget for the build errors appended to the prompt
+            stitched_context = context_stitcher.stitch_context(target_file, reserved_tokens=count_tokens(file_errors))
 
             # 🔍 Pre-fix wiring: run cross reference resolver first
             if attempt == 1:
-                cross_resolver = CrossReferenceResolverAgent(fix_agent.output_dir, context_stitcher.promoter.class_index)
+                cross_resolver = CrossReferenceResolverAgent(fix_agent.output_dir, class_index)
                 cross_resolver.resolve(target_file)
 
             result = fix_agent.fix_file(target_file, stitched_context, file_errors)
-            logger.log_fix_result(target_file, result)
+            logger.log(target_file, result)
 
             if result.get("success"):
-                print(f"✅ Fix succeeded on attempt {attempt} for: {target_file}")
-                return result
+                file_errors = self._build_and_collect_errors(validator, target_file)
+                if not file_errors:
+                    print(f"✅ Fix succeeded on attempt {attempt} for: {target_file}")
+                    return {**result, "validated": True}
+                result = {**result, "success": False, "fix_log": {"build_errors": file_errors}}
 
             # Optional post-fix: retry resolver again if final attempt fails
             if attempt == self.max_retries:
                 print(f"🛠️ Final post-fix wiring check on: {target_file}")
-                cross_resolver = CrossReferenceResolverAgent(fix_agent.output_dir, context_stitcher.promoter.class_index)
+                cross_resolver = CrossReferenceResolverAgent(fix_agent.output_dir, class_index)
                 cross_resolver.resolve(target_file)
 
                 result = fix_agent.fix_file(target_file, stitched_context, file_errors)
-                logger.log_fix_result(target_file, result)
+                if result.get("success"):
+                    # The last answer is only a success if the build accepts it too
+                    file_errors = self._build_and_collect_errors(validator, target_file)
+                    if file_errors:
+                        result = {**result, "success": False, "fix_log": {"build_errors": file_errors}}
+                    else:
+                        print(f"✅ Fix succeeded after the final wiring check for: {target_file}")
+                        result = {**result, "validated": True}
+                logger.log(target_file, result)
                 return result
 
         return {"success": False, "reason": "All fix attempts failed."}
+
+    def retry_fix_batch(self, target_files, fix_agent, validator, context_stitcher, gradle_fixer, dep_validator, logger,
+                        scheduler=None):
+        """
+        Batched variant of retry_fix: every attempt fixes all pending files, then validates them with
+        one scheduled build (bisected only when failures can't be attributed). Files that compile drop
+        out; the rest go back for another attempt with their own errors.
+        :return: {target_file: result}; results the build accepted carry validated=True
+        """
+        scheduler = scheduler or BuildSchedulerAgent(validator)
+        class_index = get_symbol_index(context_stitcher.migrated_dir)
+        file_errors = {t: "" for t in target_files}
+        results = {}
+        pending = list(target_files)
+
+        for attempt in range(1, self.max_retries + 1):
+            print(f"\n🔁 Attempt {attempt}/{self.max_retries} for a batch of {len(pending)} file(s)")
+            scheduler.snapshot(pending)
+
+            for target_file in pending:
+                try:
+                    with telemetry.bind_target(target_file):
+                        stitched_context = context_stitcher.stitch_context(
+                            target_file, reserved_tokens=count_tokens(file_errors[target_file]))
+                        if attempt == 1:
+                            CrossReferenceResolverAgent(fix_agent.output_dir, class_index).resolve(target_file)
+                        results[target_file] = fix_agent.fix_file(target_file, stitched_context, file_errors[target_file])
+                except Exception as e:
+                    # One broken target must not cost the rest of the batch its attempt
+                    results[target_file] = self._exception_result(target_file, e)
+
+            fixed = [t for t in pending if results[t].get("success")]
+            build_errors = scheduler.validate(fixed) if fixed else {}
+
+            still_failing = []
+            for target_file in pending:
+                result = results[target_file]
+                if result.get("success") and not build_errors.get(target_file):
+                    print(f"✅ Fix succeeded on attempt {attempt} for: {target_file}")
+                    result = results[target_file] = {**result, "validated": True}
+                else:
+                    if result.get("success"):
+                        file_errors[target_file] = build_errors[target_file]
+                        result = {**result, "success": False, "fix_log": {"build_errors": file_errors[target_file]}}
+                        results[target_file] = result
+                    still_failing.append(target_file)
+                logger.log(target_file, result)
+            pending = still_failing
+            if not pending:
+                break
+
+        # Final post-fix wiring for whatever is still failing, as in retry_fix; these fixes are validated too
+        if pending:
+            scheduler.snapshot(pending)
+        for target_file in pending:
+            print(f"🛠️ Final post-fix wiring check on: {target_file}")
+            try:
+                with telemetry.bind_target(target_file):
+                    CrossReferenceResolverAgent(fix_agent.output_dir, class_index).resolve(target_file)
+                    stitched_context = context_stitcher.stitch_context(
+                        target_file, reserved_tokens=count_tokens(file_errors[target_file]))
+                    results[target_file] = fix_agent.fix_file(target_file, stitched_context, file_errors[target_file])
+            except Exception as e:
+                results[target_file] = self._exception_result(target_file, e)
+
+        fixed = [t for t in pending if results[t].get("success")]
+        build_errors = scheduler.validate(fixed) if fixed else {}
+        for target_file in pending:
+            result = results[target_file]
+            if result.get("success") and build_errors.get(target_file):
+                results[target_file] = {**result, "success": False,
+                                        "fix_log": {"build_errors": build_errors[target_file]}}
+            elif result.get("success"):
+                print(f"✅ Fix succeeded after the final wiring check for: {target_file}")
+                results[target_file] = {**result, "validated": True}
+            logger.log(target_file, results[target_file])
+
+        print(f"📊 {scheduler.builds} build(s) so far for batched validation")
+        return results
+
+    @staticmethod
+    def _exception_result(target_file, error):
+        print(f"❌ Fixing {target_file} failed: {error}")
+        return {"success": False, "fixed_code": "", "fix_log": {"exception": f"{type(error).__name__}: {error}"}}
+
+    def _build_and_collect_errors(self, validator, target_file):
+        # Build and read the log under the project lock so a parallel worker's build
+        # can't overwrite the log before this file's errors are extracted.
+        with validator.lock:
+            validator.run_build()
+            build_log = validator.get_last_build_log()
+        return BuildLogFilter.filter_log_for_file(build_log, target_file)
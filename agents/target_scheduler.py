@@ -0,0 +1,48 @@
+# agents/target_scheduler.py
+
+from utils.dependency_graph import ClassDependencyGraph, topological_levels
+from utils.telemetry import traced
+
+class TargetSchedulerAgent:
+    """
+    Orders fix targets leaf-first: repositories and DTOs before the services that use them, so a
+    target's build sees its dependencies already fixed. The dependency DAG comes from every type
+    each migrated file mentions (resolved through the symbol index), restricted to the mapped
+    targets; dependency cycles are collapsed into one group whose members share a level.
+    Targets on the same level don't depend on each other and can be fixed in parallel.
+    """
+
+    def __init__(self, symbol_index):
+        self.symbol_index = symbol_index
+
+    def _target_graph(self, targets):
+        graph = ClassDependencyGraph(self.symbol_index, references=True).build()
+        mapped = set(targets)
+        successors = {}
+        for target in targets:
+            deps = set()
+            for fqcn in graph.file_classes.get(target, ()):
+                for dep in graph.edges.get(fqcn, ()):
+                    rel_path = self.symbol_index.file_for_class(dep)
+                    if rel_path in mapped and rel_path != target:
+                        deps.add(rel_path)
+            successors[target] = sorted(deps)
+        return successors
+
+    @traced("fix_scheduling")
+    def levels(self, targets):
+        """
+        :return: List of levels, each a list of targets in mapping order; level 0 depends on no other target.
+        """
+        successors = self._target_graph(targets)
+        position = {t: i for i, t in enumerate(targets)}
+        levels = []
+        cycle_groups = 0
+        for components in topological_levels(targets, lambda t: successors.get(t, ())):
+            cycle_groups += sum(1 for c in components if len(c) > 1)
+            levels.append(sorted((t for c in components for t in c), key=position.get))
+
+        widest = max((len(level) for level in levels), default=0)
+        print(f"📐 {len(targets)} targets in {len(levels)} dependency level(s), widest {widest}, "
+              f"{cycle_groups} cycle group(s)")
+        return levels
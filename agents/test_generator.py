@@ -3,33 +3,38 @@
 import os
 from llm.prompt_loader import load_prompt
 from llm.markdown_utils import clean_markdown_code
+from llm.streaming import request_completion, default_validators, StreamAborted
+from utils.telemetry import traced
 
 TEST_PROMPT_PATH = "prompts/test_generation_prompt.txt"
 
 class TestGeneratorAgent:
-    def __init__(self, client, output_dir):
+    def __init__(self, client, output_dir, stream=False):
         self.client = client
+        self.stream = stream
         self.output_dir = output_dir
         self.test_output_dir = os.path.join(output_dir, "../test_cases")
         os.makedirs(self.test_output_dir, exist_ok=True)
 
-    def generate_test_case(self, target_path):
+    def build_request(self, target_path):
+        """:return: Chat completion request kwargs for target_path's test, or None if the class is missing."""
         class_path = os.path.join(self.output_dir, target_path)
         if not os.path.exists(class_path):
             print(f"⚠️  Cannot generate test: file not found {class_path}")
-            return
+            return None
 
         with open(class_path, "r", encoding="utf-8") as f:
             code = f.read()
 
         prompt = load_prompt(TEST_PROMPT_PATH, {"code": code})
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
-        )
-
-        test_code = clean_markdown_code(response.choices[0].message.content)
+        return {
+            "model": "gpt-4o",
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2
+        }
+
+    def apply_result(self, target_path, content):
+        test_code = clean_markdown_code(content)
         test_file_name = os.path.basename(target_path).replace(".java", "Test.java")
         test_file_path = os.path.join(self.test_output_dir, test_file_name)
 
@@ -37,3 +42,18 @@ class TestGeneratorAgent:
             f.write(test_code)
 
         print(f"✅ Generated test case: {test_file_path}")
+        return test_file_path
+
+    @traced("test_generation")
+    def generate_test_case(self, target_path):
+        request = self.build_request(target_path)
+        if request is None:
+            return
+
+        test_class = os.path.splitext(os.path.basename(target_path))[0] + "Test"
+        try:
+            content = request_completion(self.client, request, self.stream, default_validators(test_class))
+        except StreamAborted as e:
+            print(f"✂️  Aborted test generation for {target_path}: {e.reason}")
+            return
+        self.apply_result(target_path, content)
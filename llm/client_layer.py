@@ -0,0 +1,76 @@
+# llm/client_layer.py
+
+from types import SimpleNamespace
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner._create(**kwargs)
+
+
+class ClientLayer:
+    """
+    Base of the wrappers stacked by llm_client.get_llm_client(): `chat.completions.create(...)` goes to
+    the subclass's _create(), anything else to the wrapped client.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def _create(self, **kwargs):
+        raise NotImplementedError
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class ObservedStream:
+    """
+    Passes a streamed response through and calls on_done(content, ok) exactly once with the content
+    streamed so far: when the stream is exhausted (ok), fails (not ok) or is closed early (ok).
+    The id, model (`meta`) and finish_reason of the chunks seen are kept for the callback.
+    """
+
+    def __init__(self, stream, on_done):
+        self._stream = stream
+        self._on_done = on_done
+        self._parts = []
+        self._finished = False
+        self.meta = {}
+        self.finish_reason = None
+
+    def _finish(self, ok):
+        if not self._finished:
+            self._finished = True
+            self._on_done("".join(self._parts), ok)
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                self.meta.setdefault("id", getattr(chunk, "id", None))
+                self.meta.setdefault("model", getattr(chunk, "model", None))
+                choices = getattr(chunk, "choices", None)
+                if choices:
+                    if getattr(choices[0].delta, "content", None):
+                        self._parts.append(choices[0].delta.content)
+                    self.finish_reason = getattr(choices[0], "finish_reason", None) or self.finish_reason
+                yield chunk
+        except BaseException:
+            self._finish(False)
+            raise
+        self._finish(True)
+
+    def close(self):
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish(True)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
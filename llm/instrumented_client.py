@@ -0,0 +1,65 @@
+# llm/instrumented_client.py
+
+import os
+import time
+from llm.client_layer import ClientLayer, ObservedStream
+from utils.telemetry import telemetry
+from utils.token_counter import count_tokens
+
+# USD per 1k tokens, gpt-4o list prices by default; set both to 0 to report tokens only
+DEFAULT_PROMPT_COST_PER_1K = 0.0025
+DEFAULT_COMPLETION_COST_PER_1K = 0.01
+
+
+def _cost_rate(name, default):
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+class InstrumentedLLMClient(ClientLayer):
+    """
+    Outermost client layer: times every chat completion as an "llm" span and counts prompt/completion
+    tokens, cache hits and estimated cost against the calling stage and target (see utils.telemetry).
+    """
+
+    def __init__(self, client):
+        super().__init__(client)
+        self.prompt_rate = _cost_rate("LLM_PROMPT_COST_PER_1K", DEFAULT_PROMPT_COST_PER_1K) / 1000.0
+        self.completion_rate = _cost_rate("LLM_COMPLETION_COST_PER_1K", DEFAULT_COMPLETION_COST_PER_1K) / 1000.0
+
+    def _record(self, stage, target, prompt_tokens, completion_tokens, cached):
+        telemetry.count("llm_requests", stage=stage, target=target)
+        telemetry.count("llm_cache_hits" if cached else "llm_cache_misses", stage=stage, target=target)
+        if cached:
+            return  # replayed answers cost nothing
+        telemetry.count("llm_prompt_tokens", prompt_tokens, stage=stage, target=target)
+        telemetry.count("llm_completion_tokens", completion_tokens, stage=stage, target=target)
+        telemetry.count("llm_cost_usd", prompt_tokens * self.prompt_rate + completion_tokens * self.completion_rate,
+                        stage=stage, target=target)
+
+    def _create(self, **kwargs):
+        if not telemetry.enabled:
+            return self.client.chat.completions.create(**kwargs)
+
+        stage, target = telemetry.current_stage(), telemetry.current_target()
+        start = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+        except BaseException:
+            telemetry.record_span("llm", time.perf_counter() - start, ok=False, offset=start)
+            telemetry.count("llm_errors", stage=stage, target=target)
+            raise
+
+        cached = getattr(response, "cached", False)
+        if kwargs.get("stream"):
+            def on_done(content, ok):
+                telemetry.record_span("llm", time.perf_counter() - start, ok=ok, target=target, offset=start)
+                model = kwargs.get("model") or "gpt-4o"
+                prompt = sum(count_tokens(str(m.get("content") or ""), model) for m in kwargs.get("messages", []))
+                self._record(stage, target, prompt, count_tokens(content, model), cached)
+            return ObservedStream(response, on_done)
+
+        telemetry.record_span("llm", time.perf_counter() - start, offset=start)
+        usage = getattr(response, "usage", None)
+        self._record(stage, target, getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0, cached)
+        return response
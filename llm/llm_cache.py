@@ -0,0 +1,219 @@
+# llm/llm_cache.py
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from llm.client_layer import ClientLayer, ObservedStream
+
+DEFAULT_CACHE_DIR = "data/llm_cache"
+DEFAULT_MAX_MB = 512
+
+
+def cache_key(request):
+    """
+    Content-addressed key for a chat completion request: a SHA-256 over the
+    model, temperature, messages and any other generation parameters.
+    """
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedCompletion:
+    """Minimal stand-in for an OpenAI ChatCompletion rebuilt from a cache entry."""
+
+    def __init__(self, entry):
+        self.id = entry.get("id")
+        self.model = entry.get("model")
+        self.cached = True
+        self.choices = [SimpleNamespace(
+            index=0,
+            finish_reason=entry.get("finish_reason", "stop"),
+            message=SimpleNamespace(role="assistant", content=entry.get("content", ""))
+        )]
+        usage = entry.get("usage") or {}
+        self.usage = SimpleNamespace(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0)
+        )
+
+
+class LLMResponseCache:
+    """
+    Persistent on-disk cache of chat completions, one JSON file per request hash.
+    Size-bounded with LRU eviction (recency is tracked via file mtimes, so it survives restarts).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    found.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        data = json.dumps(entry, ensure_ascii=False)
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            self._forget(key)
+            size = os.path.getsize(path)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes
+            }
+
+
+def _chunk(entry, content=None, finish_reason=None):
+    return SimpleNamespace(
+        id=entry.get("id"),
+        model=entry.get("model"),
+        choices=[SimpleNamespace(index=0, delta=SimpleNamespace(role="assistant", content=content),
+                                 finish_reason=finish_reason)]
+    )
+
+
+class CachedStream:
+    """Replays a cache entry as a stream: one chunk with the content, one with the finish reason."""
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.cached = True
+
+    def __iter__(self):
+        yield _chunk(self.entry, content=self.entry.get("content", ""))
+        yield _chunk(self.entry, finish_reason=self.entry.get("finish_reason", "stop"))
+
+    def close(self):
+        pass
+
+
+class CachedLLMClient(ClientLayer):
+    """
+    Wraps an OpenAI/AzureOpenAI client so `client.chat.completions.create(...)` is served
+    from LLMResponseCache when the exact same request was answered before.
+    Streams are replayed from the cache on a hit and stored once they complete on a miss.
+    With bypass=True the cache is not read, but fresh responses are still stored.
+    """
+
+    def __init__(self, client, cache=None, bypass=False):
+        super().__init__(client)
+        self.cache = cache or LLMResponseCache()
+        self.bypass = bypass
+
+    def _create(self, **kwargs):
+        # Multi-choice requests are passed straight through
+        if kwargs.get("n", 1) != 1:
+            return self.client.chat.completions.create(**kwargs)
+
+        # Streamed and plain requests share entries: the key ignores the transport options
+        stream = kwargs.get("stream")
+        key = cache_key({k: v for k, v in kwargs.items() if k not in ("stream", "stream_options")})
+        if not self.bypass:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return CachedStream(entry) if stream else CachedCompletion(entry)
+
+        if stream:
+            def on_done(content, ok):
+                # Aborted or truncated generations never reach the cache
+                if ok and tee.finish_reason == "stop":
+                    self.cache.put(key, {"id": tee.meta.get("id"), "model": tee.meta.get("model") or kwargs.get("model"),
+                                         "finish_reason": "stop", "content": content, "usage": {}})
+            tee = ObservedStream(self.client.chat.completions.create(**kwargs), on_done)
+            return tee
+
+        response = self.client.chat.completions.create(**kwargs)
+        choice = response.choices[0]
+        finish_reason = getattr(choice, "finish_reason", "stop")
+        # Like streams: a truncated ("length") or filtered answer would be replayed on every rerun
+        if choice.message.content is not None and finish_reason == "stop":
+            usage = getattr(response, "usage", None)
+            self.cache.put(key, {
+                "id": getattr(response, "id", None),
+                "model": getattr(response, "model", kwargs.get("model")),
+                "finish_reason": finish_reason,
+                "content": choice.message.content,
+                "usage": {
+                    "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                    "completion_tokens": getattr(usage, "completion_tokens", 0),
+                    "total_tokens": getattr(usage, "total_tokens", 0)
+                } if usage else {}
+            })
+        return response
+
+    def stats(self):
+        return self.cache.stats()
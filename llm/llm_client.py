@@ -4,25 +4,102 @@ import os
 from openai import OpenAI
 from openai import AzureOpenAI
 from dotenv import load_dotenv
+from llm.llm_cache import CachedLLMClient, LLMResponseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_MB
+from llm.rate_limiter import RateLimitedLLMClient
+from llm.instrumented_client import InstrumentedLLMClient
 
 load_dotenv()  # Load variables from .env if present
 
-def get_llm_client():
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = 120.0
+
+def _env_flag(name, default="0"):
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+def _env_number(name, default):
+    value = os.getenv(name)
+    return type(default)(float(value)) if value not in (None, "") else default
+
+def get_llm_client(use_cache=None, cache_bypass=None):
     """
     Returns the correct LLM client instance based on environment variables.
+    The provider client sits behind the rate-limited scheduler (LLM_RPM, LLM_TPM, LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES), which is wrapped in the on-disk response cache unless LLM_CACHE=off
+    (or use_cache=False), so cache hits never wait for quota. The outermost layer records
+    latency, tokens and cost in utils.telemetry.
+    Create it once and share it between agents: the limits and the connection pool are per instance.
+    """
+    client = RateLimitedLLMClient(
+        _create_provider_client(),
+        rpm=_env_number("LLM_RPM", 0),
+        tpm=_env_number("LLM_TPM", 0),
+        max_concurrency=_env_number("LLM_MAX_CONCURRENCY", 32),
+        initial_concurrency=_env_number("LLM_INITIAL_CONCURRENCY", 4),
+        max_retries=_env_number("LLM_MAX_RETRIES", 6)
+    )
+
+    if use_cache is None:
+        use_cache = os.getenv("LLM_CACHE", "on").lower() != "off"
+    if not use_cache:
+        return InstrumentedLLMClient(client)
+
+    if cache_bypass is None:
+        cache_bypass = _env_flag("LLM_CACHE_BYPASS")
+
+    cache = LLMResponseCache(
+        cache_dir=os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+        max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+    )
+    return InstrumentedLLMClient(CachedLLMClient(client, cache=cache, bypass=cache_bypass))
+
+def find_layer(client, layer_class):
+    """:return: The layer of type layer_class in a get_llm_client() stack, or None."""
+    while client is not None:
+        if isinstance(client, layer_class):
+            return client
+        client = client.__dict__.get("client")
+    return None
+
+def _http_options():
     """
+    One keep-alive connection pool sized for the concurrency limit. The SDK's own retries are turned
+    off because RateLimitedLLMClient owns the retry policy.
+    """
+    options = {"max_retries": 0, "timeout": _env_number("LLM_TIMEOUT", DEFAULT_TIMEOUT)}
+    try:
+        import httpx
+    except ImportError:
+        return options
+
+    pool_size = _env_number("LLM_POOL_SIZE", DEFAULT_POOL_SIZE)
+    options["http_client"] = httpx.Client(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=options["timeout"]
+    )
+    return options
+
+def _create_provider_client():
     provider = os.getenv("LLM_PROVIDER", "azure").lower()
 
     if provider == "openai":
         return OpenAI(
             api_key=os.getenv("OPENAI_API_KEY"),
-            organization=os.getenv("OPENAI_ORG")  # Optional
+            organization=os.getenv("OPENAI_ORG"),  # Optional
+            **_http_options()
         )
     elif provider == "azure":
         return AzureOpenAI(
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2023-07-01-preview"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            **_http_options()
         )
+    elif provider == "fake":
+        # Offline/benchmark runs: an external `python -m llm.fake_server` at LLM_BASE_URL, else an in-process one
+        base_url = os.getenv("LLM_BASE_URL")
+        if not base_url:
+            from llm.fake_server import get_fake_server
+            base_url = get_fake_server().base_url
+        return OpenAI(api_key="fake", base_url=base_url, **_http_options())
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
@@ -0,0 +1,236 @@
+# llm/rate_limiter.py
+
+import time
+import random
+import threading
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+from llm.client_layer import ClientLayer, ObservedStream
+from utils.token_counter import count_tokens
+from utils.telemetry import telemetry
+
+DEFAULT_COMPLETION_TOKENS = 1024  # reserved per request when max_tokens is not set
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute` units per minute.
+    A rate of 0 (or None) means unlimited.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = (per_minute or 0) / 60.0
+        self.capacity = capacity or per_minute or 0
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """Blocks until `amount` units are available and takes them. :return: seconds waited."""
+        if not self.rate:
+            return 0.0
+        amount = min(amount, self.capacity)  # a single oversized request must still get through
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - start
+                self._cond.wait((amount - self.tokens) / self.rate)
+
+    def adjust(self, delta):
+        """Gives back (positive) or charges (negative) units once a request's real cost is known."""
+        if not self.rate:
+            return
+        with self._cond:
+            self._refill()
+            self.tokens = max(-self.capacity, min(self.capacity, self.tokens + delta))
+            self._cond.notify_all()
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit: every successful request grows
+    the limit by 1/limit (about +1 per round of requests), a throttle cuts it by `decrease`.
+    Only throttles of requests started after the last cut count, so one burst of 429s is one signal.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Blocks until a slot is free. :return: start marker to hand back to release()."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, succeeded=True, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                if started > self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = time.monotonic()
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms headers), or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _status(error):
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+class RateLimitedLLMClient(ClientLayer):
+    """
+    Wraps an OpenAI/AzureOpenAI client so every `chat.completions.create(...)` goes through
+    requests/minute and tokens/minute buckets and an AIMD concurrency limit, and is retried with
+    exponential backoff (honouring Retry-After) on throttling, timeouts and transient server errors.
+    One instance is meant to be shared by all agents.
+    """
+
+    def __init__(self, client, rpm=0, tpm=0, max_concurrency=32, initial_concurrency=4, max_retries=6,
+                 base_delay=1.0, max_delay=60.0):
+        super().__init__(client)
+        self.requests_bucket = TokenBucket(rpm)
+        self.tokens_bucket = TokenBucket(tpm)
+        self.concurrency = AIMDController(initial=min(initial_concurrency, max_concurrency), maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.throttle_events = 0
+        self.tokens_used = 0
+        self.wait_seconds = 0.0
+
+    def _prompt_tokens(self, kwargs):
+        return sum(count_tokens(str(m.get("content") or ""), kwargs.get("model") or "gpt-4o")
+                   for m in kwargs.get("messages", []))
+
+    def _estimate_tokens(self, kwargs):
+        completion = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+        return self._prompt_tokens(kwargs) + completion
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _delay(self, attempt, error):
+        backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+        backoff = random.uniform(backoff / 2, backoff)  # jitter so workers don't retry in lockstep
+        retry_after = _retry_after(error)
+        return max(backoff, retry_after) if retry_after is not None else backoff
+
+    def _create(self, **kwargs):
+        estimate = self._estimate_tokens(kwargs)
+        attempt = 0
+        while True:
+            self._count("queue_depth")
+            start = time.monotonic()
+            try:
+                started = self.concurrency.acquire()
+                self.requests_bucket.acquire(1)
+                self.tokens_bucket.acquire(estimate)
+            finally:
+                self._count("queue_depth", -1)
+            self._count("wait_seconds", time.monotonic() - start)
+            telemetry.count("llm_queue_seconds", time.monotonic() - start)
+
+            error = None
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+            except (APIStatusError, APITimeoutError, APIConnectionError) as e:
+                error = e
+            except BaseException:
+                self.concurrency.release(started, succeeded=False)
+                self.tokens_bucket.adjust(estimate)
+                raise
+            status = _status(error) if error is not None else None
+            throttled = status == 429
+            if error is not None or not kwargs.get("stream"):
+                self.concurrency.release(started, succeeded=error is None, throttled=throttled)
+
+            if error is not None:
+                self.tokens_bucket.adjust(estimate)  # nothing was generated; the retry is charged again
+                retryable = throttled or status in RETRYABLE_STATUS or isinstance(error, (APITimeoutError, APIConnectionError))
+                if throttled:
+                    self._count("throttle_events")
+                    telemetry.count("llm_throttles")
+                if not retryable or attempt >= self.max_retries:
+                    self._count("failures")
+                    raise error
+                delay = self._delay(attempt, error)
+                print(f"⏳ LLM request {'throttled' if throttled else 'failed'} ({status or type(error).__name__}); "
+                      f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                attempt += 1
+                self._count("retries")
+                telemetry.count("llm_retries")
+                time.sleep(delay)
+                continue
+
+            if kwargs.get("stream"):
+                # The slot and the token estimate stay taken until the stream is consumed or closed
+                return ObservedStream(response, lambda content, ok: self._stream_done(kwargs, estimate, started, content, ok))
+
+            self._count("requests")
+            usage = getattr(response, "usage", None)
+            actual = getattr(usage, "total_tokens", None) if usage else None
+            if actual:
+                self.tokens_bucket.adjust(estimate - actual)
+                self._count("tokens_used", actual)
+            return response
+
+    def _stream_done(self, kwargs, estimate, started, content, succeeded):
+        self.concurrency.release(started, succeeded=succeeded)
+        self._count("requests")
+        # Streams carry no usage block; charge what was actually generated (less, if it was aborted)
+        actual = self._prompt_tokens(kwargs) + count_tokens(content, kwargs.get("model") or "gpt-4o")
+        self.tokens_bucket.adjust(estimate - actual)
+        self._count("tokens_used", actual)
+
+    def metrics(self):
+        """Snapshot for tuning rpm/tpm/concurrency against the deployment quota."""
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "in_flight": self.concurrency.in_flight,
+                "concurrency_limit": int(self.concurrency.limit),
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "throttle_events": self.throttle_events,
+                "tokens": self.tokens_used,
+                "wait_seconds": round(self.wait_seconds, 2),
+            }
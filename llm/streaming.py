@@ -0,0 +1,194 @@
+# llm/streaming.py
+
+import re
+
+PREAMBLE_PREFIX = "here's the"  # clean_markdown_code strips this line, like the fences
+FIRST_WORD_PATTERN = re.compile(r"[\w@-]+")
+COMMENT_PATTERN = re.compile(r"//[^\n]*(?:\n|$)|/\*.*?\*/", re.DOTALL)
+JAVA_START_PATTERN = re.compile(
+    r"(package|import|public|protected|private|abstract|final|sealed|non-sealed|strictfp|static|"
+    r"class|interface|enum|record)\b|@\w")
+TYPE_DECLARATION_PATTERN = re.compile(r"(?:^|[\s;{}])(?:@interface|class|interface|enum|record)\s+(\w+)(?=\W)")
+
+DECIDE_AFTER_CHARS = 4096   # no declaration this far in: let the build judge it
+REPEAT_COUNT = 5            # identical consecutive blocks that count as a loop
+REPEAT_MAX_PERIOD = 8       # longest repeated block (in lines) looked for
+REPEAT_MIN_CHARS = 24       # blocks shorter than this (closing braces, blank lines) may repeat legitimately
+MAX_LINE_CHARS = 4000       # one line this long is a degenerate generation
+
+
+class StreamAborted(Exception):
+    """Raised when a streaming validator rejects a generation before it completes."""
+
+    def __init__(self, reason, partial=""):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial = partial
+
+
+def skip_preamble(text):
+    """:return: text after fences, comments and a "Here's the ..." line, or None while one is incomplete."""
+    while True:
+        text = text.lstrip()
+        lowered = text.lower()
+        if text.startswith(("```", "//")) or lowered.startswith(PREAMBLE_PREFIX):
+            if "\n" not in text:
+                return None
+            text = text[text.index("\n") + 1:]
+        elif text.startswith("/*"):
+            if "*/" not in text:
+                return None
+            text = text[text.index("*/") + 2:]
+        elif any(prefix.startswith(lowered) for prefix in ("```", "/", PREAMBLE_PREFIX)):
+            return None  # could still become one of the above
+        else:
+            return text
+
+
+class LeadingCodeValidator:
+    """The first meaningful token must start a Java compilation unit, not prose."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+
+    def feed(self, delta):
+        if self.done:
+            return None
+        self.buffer += delta
+        text = skip_preamble(self.buffer)
+        word = FIRST_WORD_PATTERN.match(text or "")
+        if not text or (word and word.end() == len(text)):
+            return None  # first word not complete yet
+
+        self.done = True
+        if not JAVA_START_PATTERN.match(text):
+            return f"output does not start with Java code: {text[:40]!r}"
+        return None
+
+
+class ClassNameValidator:
+    """The first declared type must be the one the target file is named after."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.buffer = ""
+        self.done = False
+
+    def feed(self, delta):
+        if self.done:
+            return None
+        self.buffer += delta
+        # Only the code counts: prose like "Here's the updated class that ..." must not look like a declaration
+        text = skip_preamble(self.buffer)
+        if text is None:
+            if len(self.buffer) > DECIDE_AFTER_CHARS:
+                self.done = True
+            return None
+        text = COMMENT_PATTERN.sub("\n", text)
+        open_comment = text.find("/*")
+        if open_comment != -1:
+            text = text[:open_comment]
+        match = TYPE_DECLARATION_PATTERN.search(text)
+        if not match:
+            if len(self.buffer) > DECIDE_AFTER_CHARS:
+                self.done = True
+            return None
+
+        self.done = True
+        if match.group(1) != self.expected:
+            return f"declares {match.group(1)} instead of {self.expected}"
+        return None
+
+
+class RepetitionValidator:
+    """Detects runaway loops: the same block of lines repeated REPEAT_COUNT times in a row."""
+
+    def __init__(self, count=REPEAT_COUNT, max_period=REPEAT_MAX_PERIOD, min_chars=REPEAT_MIN_CHARS):
+        self.count = count
+        self.max_period = max_period
+        self.min_chars = min_chars
+        self.lines = []
+        self.partial = ""
+
+    def feed(self, delta):
+        self.partial += delta
+        if "\n" not in self.partial:
+            if len(self.partial) > MAX_LINE_CHARS:
+                return f"a single line exceeds {MAX_LINE_CHARS} characters"
+            return None
+
+        *complete, self.partial = self.partial.split("\n")
+        for line in complete:
+            self.lines.append(line.strip())
+            reason = self._check()
+            if reason:
+                return reason
+        return None
+
+    def _check(self):
+        lines = self.lines
+        for period in range(1, self.max_period + 1):
+            span = period * self.count
+            if len(lines) < span:
+                break
+            block = lines[-period:]
+            if sum(len(line) for line in block) < self.min_chars:
+                continue
+            if all(lines[-span + i] == block[i % period] for i in range(span - period)):
+                return f"block of {period} line(s) repeated {self.count} times"
+        return None
+
+
+def default_validators(class_name):
+    """Validators for an answer that must be the Java source of class_name."""
+    return [LeadingCodeValidator(), ClassNameValidator(class_name), RepetitionValidator()]
+
+
+def _close(stream):
+    close = getattr(stream, "close", None)
+    if close is not None:
+        try:
+            close()  # drops the HTTP response, which cancels the generation server-side
+        except Exception:
+            pass
+
+
+def stream_completion(client, request, validators=()):
+    """
+    Sends request with stream=True and feeds every content delta to the validators.
+    The stream is closed as soon as one of them objects.
+    :return: The full response content.
+    :raises StreamAborted: With the validator's reason and the partial content.
+    """
+    stream = client.chat.completions.create(**{**request, "stream": True})
+    parts = []
+    try:
+        for chunk in stream:
+            if not getattr(chunk, "choices", None):
+                continue
+            delta = getattr(chunk.choices[0].delta, "content", None)
+            if not delta:
+                continue
+            parts.append(delta)
+            for validator in validators:
+                reason = validator.feed(delta)
+                if reason:
+                    _close(stream)
+                    raise StreamAborted(reason, "".join(parts))
+    except StreamAborted:
+        raise
+    except BaseException:
+        _close(stream)
+        raise
+    return "".join(parts)
+
+
+def request_completion(client, request, stream=False, validators=()):
+    """
+    One chat completion, streamed with early abort when stream=True.
+    :return: The response content.
+    """
+    if stream:
+        return stream_completion(client, request, validators)
+    return client.chat.completions.create(**request).choices[0].message.content
@@ -1,22 +1,37 @@
 # main.py
 
 import os
+import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from agents.file_name_class_name_validator import FileNameClassNameValidatorAgent
 from agents.mapping_loader import MappingLoaderAgent
-from agents.context_stitcher import ContextStitcherAgent
+from agents.context_stitcher import ContextStitcherAgent, DEFAULT_TOKEN_BUDGET, DEFAULT_PART_MODES, PART_MODES
 from agents.fix_and_compile import FixAndCompileAgent
-from agents.build_validator import BuildValidatorAgent
+from agents.build_validator import BuildValidatorAgent, BUILD_MODES
 from agents.build_fixer import BuildFixerAgent
+from agents.build_scheduler import BuildSchedulerAgent
 from agents.gradle_dependency_validator import GradleDependencyValidatorAgent
 from agents.retry_agent import RetryAgent
 from agents.test_generator import TestGeneratorAgent
 from agents.fix_history_logger import FixHistoryLogger
 from agents.circular_dependency_detector import CircularDependencyDetectorAgent
+from agents.compilation_scanner_agent import CompilationScannerAgent
 from agents.swagger_completer_agent import SwaggerCompleterAgent
 from agents.logger_refactor_agent import LoggerRefactorAgent
 from agents.reference_promoter import ReferencePromoterAgent
-from llm.llm_client import get_llm_client
+from agents.incremental_planner import IncrementalPlannerAgent
+from agents.target_scheduler import TargetSchedulerAgent
+from agents.batch_runner import BatchRunnerAgent, BATCH_STAGES, default_batch_paths
+from llm.batch import LocalBatchExecutor
+from llm.llm_client import get_llm_client, find_layer
+from llm.llm_cache import CachedLLMClient
+from llm.rate_limiter import RateLimitedLLMClient
+from utils.worker_output import TargetOutputRouter
+from utils.symbol_index import get_symbol_index
+from utils.run_journal import RunJournal, DONE_STAGE
+from utils.telemetry import telemetry
+from utils.profiler import StageProfiler, STAGE_GROUPS, DEFAULT_INTERVAL_MS, DEFAULT_TOP_N, resolve_stages
 
 LEGACY_DIR = "legacy_codebase"
 MIGRATED_DIR = "migrated_codebase"
@@ -25,63 +40,316 @@ REFERENCE_DIR = "reference_pairs"
 FRAMEWORK_DIR = "enterprise_framework_codebase"
 MAPPING_PATH = "data/mapping.json"
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--migrate-all', action='store_true', help='Run full fix pipeline on all mapped files')
-    args = parser.parse_args()
+def fix_validated(result):
+    """True only for a fix the build accepted: an LLM answer alone is not a fix."""
+    return bool(result.get("success") and result.get("validated"))
+
+def process_target(target_file, agents):
+    print(f"\n🔧 Processing: {target_file}")
+    journal = agents["journal"]
+    with telemetry.bind_target(target_file):
+        if journal.finished(target_file, "fix"):
+            print(f"⏩ Fix already journaled for {target_file}, resuming post-processing")
+            agents["planner"].record_resumed(target_file)
+            result = {"success": True, "validated": True, "resumed": True}
+        else:
+            result = agents["retry"].retry_fix(
+                target_file,
+                fix_agent=agents["fix"],
+                validator=agents["validator"],
+                context_stitcher=agents["stitcher"],
+                gradle_fixer=agents["fixer"],
+                dep_validator=agents["dep_validator"],
+                logger=agents["logger"]
+            )
+            journal.record(target_file, "fix", ok=fix_validated(result))
+            if fix_validated(result):
+                agents["planner"].record(target_file)
+        if fix_validated(result):
+            post_process(target_file, agents)
+    return result
+
+def post_process(target_file, agents):
+    journal = agents["journal"]
+    stages = [
+        ("test", agents["tester"].generate_test_case),
+        ("swagger", agents["swagger"].add_swagger_annotations),
+        ("logger", agents["logger_refactor"].inject_logger),
+    ]
+    for stage, run in stages:
+        if not journal.finished(target_file, stage):
+            run(target_file)
+            journal.record(target_file, stage)
+    journal.record(target_file, DONE_STAGE)
+
+def run_batched(targets, agents, batch_size):
+    """
+    Fixes targets in batches of batch_size, validating each batch attempt with one scheduled build
+    instead of one build per file.
+    """
+    scheduler = BuildSchedulerAgent(agents["validator"])
+    journal = agents["journal"]
+    results = {}
+    resumed = [t for t in targets if journal.finished(t, "fix")]
+    for target_file in resumed:
+        agents["planner"].record_resumed(target_file)
+        with telemetry.bind_target(target_file):
+            post_process(target_file, agents)
+        results[target_file] = {"success": True, "validated": True, "resumed": True}
+    targets = [t for t in targets if t not in results]
+
+    for start in range(0, len(targets), batch_size):
+        batch = targets[start:start + batch_size]
+        batch_results = agents["retry"].retry_fix_batch(
+            batch,
+            fix_agent=agents["fix"],
+            validator=agents["validator"],
+            context_stitcher=agents["stitcher"],
+            gradle_fixer=agents["fixer"],
+            dep_validator=agents["dep_validator"],
+            logger=agents["logger"],
+            scheduler=scheduler
+        )
+        for target_file, result in batch_results.items():
+            journal.record(target_file, "fix", ok=fix_validated(result))
+            if fix_validated(result):
+                agents["planner"].record(target_file)
+                with telemetry.bind_target(target_file):
+                    post_process(target_file, agents)
+        results.update(batch_results)
+
+    succeeded = sum(1 for r in results.values() if r.get("success"))
+    print(f"📊 {succeeded}/{len(results)} targets fixed with {scheduler.builds} builds (batches of {batch_size}).")
+    return results
+
+def run_parallel(targets, agents, workers):
+    """
+    Keeps up to `workers` targets in flight. Each worker's output goes to logs/targets/<target>.log;
+    Gradle builds and writes to the output project are serialized by the project lock.
+    """
+    router = TargetOutputRouter(sys.stdout)
+    sys.stdout = router
+
+    def run_one(target_file):
+        with router.bind(target_file):
+            try:
+                return process_target(target_file, agents)
+            except Exception as e:
+                print(f"❌ Pipeline failed for {target_file}: {e}")
+                return {"success": False, "reason": str(e)}
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_one, target): target for target in targets}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+    finally:
+        sys.stdout = router.stream
+
+    succeeded = sum(1 for r in results.values() if r.get("success"))
+    print(f"📊 {succeeded}/{len(results)} targets fixed with {workers} workers.")
+    return results
+
+def run_batch(action, stage, agents, client, batch_file, results_file, offline, workers):
+    """One step of the offline Batch API flow: collect prompts, execute them, or ingest the answers."""
+    default_requests, default_results = default_batch_paths(stage)
+    batch_file = batch_file or default_requests
+    results_file = results_file or default_results
+
+    if action == "execute":
+        LocalBatchExecutor(client=None if offline else client, workers=workers).execute(batch_file, results_file)
+        return
 
+    runner = BatchRunnerAgent(agents["stitcher"], agents["fix"], agents["tester"], agents["swagger"],
+                              agents["logger_refactor"], agents["logger"])
+    if action == "collect":
+        runner.collect(MappingLoaderAgent(MAPPING_PATH).get_all_targets(), stage, batch_file)
+    else:
+        runner.ingest(results_file, batch_file)
+
+def run_pipeline(args, part_modes):
+    """Builds the agents and runs the selected mode (batch step or full migration)."""
     print("🚀 Initializing agents...")
-    FileNameClassNameValidatorAgent(MIGRATED_DIR).run()
+    migrated_symbols = get_symbol_index(MIGRATED_DIR).build()
+    FileNameClassNameValidatorAgent(MIGRATED_DIR, symbol_index=migrated_symbols).run()
 
     mapping_agent = MappingLoaderAgent(MAPPING_PATH)
-    client = get_llm_client()
+    client = get_llm_client(
+        use_cache=False if args.no_llm_cache else None,
+        cache_bypass=True if args.llm_cache_bypass else None
+    )
 
     reference_promoter = ReferencePromoterAgent(reference_dirs=os.path.join(REFERENCE_DIR, "migrated"))
     context_stitcher = ContextStitcherAgent(
         legacy_dir=LEGACY_DIR,
         migrated_dir=MIGRATED_DIR,
         framework_dir=FRAMEWORK_DIR,
-        reference_promoter=reference_promoter
+        reference_promoter=reference_promoter,
+        reference_chunks=args.reference_chunks,
+        token_budget=args.context_tokens,
+        part_modes=part_modes
     )
 
-    fix_agent = FixAndCompileAgent(client, LEGACY_DIR, MIGRATED_DIR, OUTPUT_DIR)
-    validator = BuildValidatorAgent(OUTPUT_DIR)
-    fixer = BuildFixerAgent(client, OUTPUT_DIR)
-    dep_validator = GradleDependencyValidatorAgent(client, OUTPUT_DIR)
-    retry_agent = RetryAgent(max_retries=3)
-    tester = TestGeneratorAgent(client, OUTPUT_DIR)
-    swagger_agent = SwaggerCompleterAgent(client, OUTPUT_DIR)
-    logger_agent = LoggerRefactorAgent(client, OUTPUT_DIR)
-    logger = FixHistoryLogger()
-
-    if args.migrate_all:
+    agents = {
+        "stitcher": context_stitcher,
+        "fix": FixAndCompileAgent(client, LEGACY_DIR, MIGRATED_DIR, OUTPUT_DIR, stream=args.stream_llm),
+        "validator": BuildValidatorAgent(OUTPUT_DIR, mode=args.build_mode, stream_log=args.stream_build_log),
+        "fixer": BuildFixerAgent(client, OUTPUT_DIR),
+        "dep_validator": GradleDependencyValidatorAgent(client, OUTPUT_DIR),
+        "retry": RetryAgent(max_retries=3),
+        "tester": TestGeneratorAgent(client, OUTPUT_DIR, stream=args.stream_llm),
+        "swagger": SwaggerCompleterAgent(client, OUTPUT_DIR, stream=args.stream_llm),
+        "logger_refactor": LoggerRefactorAgent(client, OUTPUT_DIR, stream=args.stream_llm),
+        "logger": FixHistoryLogger(),
+    }
+
+    if args.batch:
+        run_batch(args.batch, args.batch_stage, agents, client, args.batch_file, args.batch_results,
+                  args.batch_offline, max(args.workers, 1))
+    elif args.migrate_all:
+        targets = mapping_agent.get_all_targets()
+        planner = IncrementalPlannerAgent(mapping_agent, MIGRATED_DIR, LEGACY_DIR, context_stitcher, OUTPUT_DIR,
+                                          symbol_index=migrated_symbols)
+        if args.incremental:
+            plan = planner.plan(targets)
+            planner.print_plan(plan, len(targets))
+            if args.dry_run:
+                return
+            targets = list(plan)
+
         print("🧠 Starting full migration fix pipeline...")
-        for target_file in mapping_agent.get_all_targets():
-            print(f"\n🔧 Processing: {target_file}")
-            result = retry_agent.retry_fix(
-                target_file,
-                fix_agent=fix_agent,
-                validator=validator,
-                context_stitcher=context_stitcher,
-                gradle_fixer=fixer,
-                dep_validator=dep_validator,
-                logger=logger
-            )
-            if result.get("success"):
-                tester.generate_test_case(target_file)
-                swagger_agent.add_swagger_annotations(target_file)
-                logger_agent.inject_logger(target_file)
+        agents["planner"] = planner
+        agents["journal"] = RunJournal(OUTPUT_DIR, resume=args.resume)
+        pending = agents["journal"].pending(targets)
+        remaining = set(pending)
+        for target_file in targets:
+            if target_file not in remaining:
+                planner.record_resumed(target_file)
+        targets = pending
+        agents["validator"].warm_up()
+        # Leaf-first levels: a level only starts once everything it depends on has been fixed
+        if args.dependency_order and args.workers <= 1 and args.build_batch <= 1:
+            print("⚠️ --dependency-order with 1 worker fixes each level sequentially; "
+                  "add --workers N or --build-batch N to run a level's targets in parallel")
+        levels = TargetSchedulerAgent(migrated_symbols).levels(targets) if args.dependency_order else [targets]
+        try:
+            for number, level in enumerate(levels):
+                if len(levels) > 1:
+                    print(f"\n📐 Level {number + 1}/{len(levels)}: {len(level)} target(s)")
+                if args.build_batch > 1:
+                    run_batched(level, agents, args.build_batch)
+                elif args.workers > 1:
+                    run_parallel(level, agents, args.workers)
+                else:
+                    for target_file in level:
+                        process_target(target_file, agents)
+        finally:
+            agents["validator"].stop_daemon()
+            planner.save()
+
+        durations = agents["validator"].build_durations
+        if durations:
+            print(f"⏱️  {len(durations)} builds, {sum(durations):.1f}s total, {sum(durations) / len(durations):.1f}s average")
 
         print("\n✅ All files processed.")
         print("🔍 Scanning for circular dependencies...")
-        cycle_detector = CircularDependencyDetectorAgent(OUTPUT_DIR)
+        cycle_detector = CircularDependencyDetectorAgent(OUTPUT_DIR, symbol_index=get_symbol_index(OUTPUT_DIR).build())
         cycles = cycle_detector.detect_cycles()
         if cycles:
             print("❗Circular dependencies found. Review required.")
         else:
             print("✅ No circular dependencies detected.")
 
+        if args.scan_compilation:
+            print("\n🔎 Scanning individual files for compilation errors...")
+            scanner = CompilationScannerAgent(source_root=os.path.join(OUTPUT_DIR, "src/main/java"))
+            scanner.scan()
+
+    cache = find_layer(client, CachedLLMClient)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"💾 LLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['evictions']} evictions")
+    limiter = find_layer(client, RateLimitedLLMClient)
+    if limiter is not None:
+        metrics = limiter.metrics()
+        print(f"🚦 LLM scheduler: {metrics['requests']} requests, {metrics['tokens']} tokens, {metrics['retries']} retries, "
+              f"{metrics['throttle_events']} throttles, concurrency limit {metrics['concurrency_limit']}, "
+              f"{metrics['wait_seconds']}s queued")
+
+    report = telemetry.write_report()
+    if report:
+        telemetry.print_summary()
+        print(f"📊 Run report: {report[0]} (Prometheus: {report[1]})")
+
     print("\n✅ Done. Check logs/ and output/ for results.")
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--migrate-all', action='store_true', help='Run full fix pipeline on all mapped files')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the last --migrate-all run from logs/run_journal.jsonl, skipping finished stages')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only reprocess targets whose inputs changed since their last fix, plus everything '
+                             'depending on them (transitively) and their co-migrated targets')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='With --incremental: list the targets that would be reprocessed and why, then exit')
+    parser.add_argument('--workers', type=int, default=1, help='Number of targets processed concurrently (default: 1)')
+    parser.add_argument('--dependency-order', action='store_true',
+                        help='Fix targets leaf-first by dependency level; a level only runs in parallel with '
+                             '--workers > 1 or --build-batch > 1, otherwise its targets are fixed one by one')
+    parser.add_argument('--build-mode', choices=BUILD_MODES, default='full',
+                        help="full = gradlew clean build; incremental = warm daemon, no clean; compile = compileJava only")
+    parser.add_argument('--build-batch', type=int, default=0, metavar='N',
+                        help='Fix N targets per attempt and validate them with one build, bisecting on ambiguous failures')
+    parser.add_argument('--scan-compilation', action='store_true',
+                        help='After --migrate-all, compile the output with batched javac and write logs/compilation_report.json')
+    parser.add_argument('--stream-build-log', action='store_true', help='Echo Gradle output while builds run')
+    parser.add_argument('--reference-chunks', action='store_true',
+                        help='Pull the most relevant reference methods (chunk index) instead of whole reference files')
+    parser.add_argument('--context-tokens', type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help=f'Token budget for the stitched fix context, 0 = unlimited (default: {DEFAULT_TOKEN_BUDGET})')
+    parser.add_argument('--context-mode', action='append', default=[], metavar='KIND=MODE',
+                        help=f"full or skeleton per context part kind ({', '.join(DEFAULT_PART_MODES)}); "
+                             "e.g. --context-mode reference=full")
+    parser.add_argument('--no-llm-cache', action='store_true', help='Disable the on-disk LLM response cache')
+    parser.add_argument('--llm-cache-bypass', action='store_true', help='Ignore cached LLM responses but store fresh ones')
+    parser.add_argument('--stream-llm', action='store_true',
+                        help='Stream code generations and cancel them early when the output is not the expected class')
+    parser.add_argument('--batch', choices=['collect', 'execute', 'ingest'],
+                        help='Offline Batch API flow: collect prompts to JSONL, execute them, ingest the results')
+    parser.add_argument('--batch-stage', choices=list(BATCH_STAGES), default='fix',
+                        help='Pipeline stage to batch: fix, post (tests + swagger) or logger (default: fix)')
+    parser.add_argument('--batch-file', help='Batch input file (default: output/batch/<stage>_requests.jsonl)')
+    parser.add_argument('--batch-results', help='Batch output file (default: output/batch/<stage>_results.jsonl)')
+    parser.add_argument('--batch-offline', action='store_true',
+                        help='Execute without calling the LLM: requests get the fake server\'s deterministic answers')
+    parser.add_argument('--profile', nargs='?', const='all', metavar='STAGES',
+                        help=f'Profile CPU (collapsed stacks) and allocations per stage into logs/profile/; optional comma '
+                             f'separated groups {list(STAGE_GROUPS)} or span stage names (default: all)')
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_INTERVAL_MS, metavar='MS',
+                        help=f'Stack sampling interval for --profile (default: {DEFAULT_INTERVAL_MS} ms)')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP_N, metavar='N',
+                        help=f'Rows in the per-stage allocation tables (default: {DEFAULT_TOP_N})')
+    args = parser.parse_args()
+    if args.dry_run and not args.incremental:
+        parser.error("--dry-run requires --incremental")
+
+    part_modes = {}
+    for option in args.context_mode:
+        kind, _, mode = option.partition("=")
+        if kind not in DEFAULT_PART_MODES or mode not in PART_MODES:
+            parser.error(f"--context-mode expects KIND=MODE with KIND in {list(DEFAULT_PART_MODES)} and MODE in {list(PART_MODES)}")
+        part_modes[kind] = mode
+
+    profiler = None
+    if args.profile is not None:
+        profiler = StageProfiler(resolve_stages(args.profile), interval_ms=args.profile_interval, top_n=args.profile_top).start()
+    try:
+        run_pipeline(args, part_modes)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
 if __name__ == "__main__":
     main()
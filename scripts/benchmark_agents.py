@@ -0,0 +1,333 @@
+# scripts/benchmark_agents.py
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import traceback
+import statistics
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from scripts.generate_corpus import CorpusGenerator, parse_size  # noqa: E402
+from utils.symbol_index import SymbolIndex  # noqa: E402
+
+LEGACY_DIR = "legacy_codebase"
+MIGRATED_DIR = "migrated_codebase"
+REFERENCE_DIR = "reference_pairs"
+MAPPING_PATH = "data/mapping.json"
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "scripts", "benchmark_baseline.json")
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "migration_assist_corpora")
+RESOLVE_SAMPLE = 500        # targets run through CrossReferenceResolverAgent per benchmark
+QUERY_SAMPLE = 200          # inputs scored by ReferencePromoterAgent per benchmark
+MIN_REGRESSION_SECONDS = 0.05  # smaller slowdowns are timer noise, whatever the ratio
+
+BENCHMARKS = {}
+
+
+class BenchmarkSkipped(Exception):
+    pass
+
+
+def benchmark(name, mutates=False, items=None):
+    """
+    Registers a benchmark. The function gets (workspace, scratch dir), may do untimed setup, and returns
+    the timed callable, which returns a dict of details. mutates=True runs it on a throwaway copy.
+    `items` names the details key counting the files the run processed (default: every corpus file).
+    """
+    def register(fn):
+        BENCHMARKS[name] = (fn, mutates, items)
+        return fn
+    return register
+
+
+def machine_info():
+    """What the timings depend on; baselines from another machine are only compared on memory."""
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def _symbol_index(scratch):
+    return SymbolIndex(MIGRATED_DIR, index_path=os.path.join(scratch, "symbols.json"))
+
+
+def _sample(items, size, seed=0):
+    items = list(items)
+    return items if len(items) <= size else random.Random(seed).sample(items, size)
+
+
+@benchmark("filename_validator", mutates=True)
+def bench_filename_validator(workspace, scratch):
+    from agents.file_name_class_name_validator import FileNameClassNameValidatorAgent
+
+    def run():
+        agent = FileNameClassNameValidatorAgent(MIGRATED_DIR, symbol_index=_symbol_index(scratch).build())
+        agent.run()
+        return {"renamed": len(agent.mismatches)}
+    return run
+
+
+@benchmark("relationship_builder", items="targets")
+def bench_relationship_builder(workspace, scratch):
+    from agents.relationship_builder import RelationshipBuilderAgent
+
+    def run():
+        agent = RelationshipBuilderAgent(LEGACY_DIR, MIGRATED_DIR, MAPPING_PATH, ".", symbol_index=_symbol_index(scratch).build(),
+                                         store_path=os.path.join(scratch, "relationships.db"))
+        agent.build()
+        return {"targets": len(agent.mapping_agent.get_all_targets())}
+    return run
+
+
+@benchmark("circular_dependency_detector")
+def bench_circular_dependency_detector(workspace, scratch):
+    from agents.circular_dependency_detector import CircularDependencyDetectorAgent
+
+    def run():
+        return {"cycles": len(CircularDependencyDetectorAgent(MIGRATED_DIR, symbol_index=_symbol_index(scratch).build()).detect_cycles())}
+    return run
+
+
+@benchmark("cross_reference_resolver", mutates=True, items="resolved")
+def bench_cross_reference_resolver(workspace, scratch):
+    from agents.cross_reference_resolver import CrossReferenceResolverAgent
+    from agents.mapping_loader import MappingLoaderAgent
+
+    targets = _sample(MappingLoaderAgent(MAPPING_PATH).get_all_targets(), RESOLVE_SAMPLE)
+
+    def run():
+        agent = CrossReferenceResolverAgent(MIGRATED_DIR, _symbol_index(scratch).build())
+        for target in targets:
+            agent.resolve(target)
+        return {"resolved": len(targets)}
+    return run
+
+
+@benchmark("embedding_indexer", items="files")
+def bench_embedding_indexer(workspace, scratch):
+    try:
+        from agents.embedding_indexer import EmbeddingIndexerAgent
+    except ImportError as e:
+        raise BenchmarkSkipped(str(e))
+
+    def run():
+        agent = EmbeddingIndexerAgent(os.path.join(REFERENCE_DIR, "migrated"), index_path=os.path.join(scratch, "embedding_index.json"))
+        agent.build_index(incremental=False)
+        return {"files": len(agent._collect_files())}
+    return run
+
+
+@benchmark("reference_promoter", items="queries")
+def bench_reference_promoter(workspace, scratch):
+    try:
+        from agents.embedding_indexer import EmbeddingIndexerAgent
+        from agents.reference_promoter import ReferencePromoterAgent
+        from agents.mapping_loader import MappingLoaderAgent
+    except ImportError as e:
+        raise BenchmarkSkipped(str(e))
+
+    index_path = os.path.join(scratch, "embedding_index.json")
+    EmbeddingIndexerAgent(os.path.join(REFERENCE_DIR, "migrated"), index_path=index_path).build_index(incremental=False)
+    codes = []
+    for target in _sample(MappingLoaderAgent(MAPPING_PATH).get_all_targets(), QUERY_SAMPLE):
+        with open(os.path.join(MIGRATED_DIR, target), "r", encoding="utf-8") as f:
+            codes.append(f.read())
+
+    def run():
+        agent = ReferencePromoterAgent(os.path.join(REFERENCE_DIR, "migrated"), index_path=index_path,
+                                       chunk_index_path=os.path.join(scratch, "chunk_index.json"))
+        return {"queries": len(agent.get_similar_files_batch(codes))}
+    return run
+
+
+@contextmanager
+def _workspace(corpus_dir, mutates):
+    """cwd inside the corpus (or a throwaway copy of it) plus an empty scratch dir for indexes and stores."""
+    previous = os.getcwd()
+    temp = tempfile.mkdtemp(prefix="bench_")
+    workspace = corpus_dir
+    if mutates:
+        workspace = os.path.join(temp, "workspace")
+        shutil.copytree(corpus_dir, workspace)
+    scratch = os.path.join(temp, "scratch")
+    os.makedirs(scratch)
+    os.chdir(workspace)
+    try:
+        yield workspace, scratch
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(temp, ignore_errors=True)
+
+
+def _run_once(corpus_dir, fn, mutates, trace_memory):
+    with _workspace(corpus_dir, mutates) as (workspace, scratch), open(os.devnull, "w") as devnull:
+        with redirect_stdout(devnull):
+            run = fn(workspace, scratch)
+            if trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            details = run()
+            seconds = time.perf_counter() - start
+            peak = 0
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+    return seconds, peak, details
+
+
+def run_benchmark(name, corpus_dir, repeat):
+    """
+    Times `repeat` runs, then measures peak Python heap in one extra traced run (tracemalloc slows
+    the code down, so it is kept out of the timings). Files parsed in SymbolIndex's process pool are
+    not part of that peak.
+    Only a missing optional dependency skips a benchmark; any other exception is reported as an error.
+    :return: {"seconds", "min_seconds", "peak_mb", "files", "ms_per_file", "details"}, {"skipped": reason}
+             or {"error": reason}
+    """
+    fn, mutates, items = BENCHMARKS[name]
+    try:
+        timings = []
+        for _ in range(repeat):
+            seconds, _, details = _run_once(corpus_dir, fn, mutates, trace_memory=False)
+            timings.append(seconds)
+        _, peak, _ = _run_once(corpus_dir, fn, mutates, trace_memory=True)
+    except BenchmarkSkipped as e:
+        return {"skipped": e.args[0] if e.args else "unavailable"}
+    except ImportError as e:
+        return {"skipped": f"{type(e).__name__}: {e}"}
+    except Exception as e:
+        traceback.print_exc()
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    if items:
+        files = details[items]
+    else:
+        with open(os.path.join(corpus_dir, "corpus.json"), "r", encoding="utf-8") as f:
+            files = json.load(f)["files"]
+    median = statistics.median(timings)
+    return {
+        "seconds": round(median, 4),
+        "min_seconds": round(min(timings), 4),
+        "peak_mb": round(peak / (1024 * 1024), 2),
+        "files": files,
+        "ms_per_file": round(median * 1000 / max(1, files), 4),
+        "details": details,
+    }
+
+
+def ensure_corpus(corpus_root, size, density, cycles, seed):
+    files = parse_size(size)
+    corpus_dir = os.path.join(corpus_root, f"{files}_d{density}_c{cycles}_s{seed}")
+    if not os.path.exists(os.path.join(corpus_dir, "corpus.json")):
+        print(f"🏗️  Generating {files}-file corpus in {corpus_dir}...")
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+        CorpusGenerator(corpus_dir, files=files, density=density, cycles=cycles, seed=seed).generate()
+    return corpus_dir, str(files)
+
+
+def compare(results, baseline, tolerance, compare_time=True):
+    """
+    :param compare_time: False when the baseline was recorded on another machine; only peak memory is compared.
+    :return: List of regression messages (time or peak memory above baseline by more than tolerance).
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if "seconds" not in current or not previous or "seconds" not in previous:
+            continue
+        if compare_time and current["seconds"] > previous["seconds"] * (1 + tolerance) and \
+                current["seconds"] - previous["seconds"] > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{name}: {previous['seconds']}s → {current['seconds']}s")
+        if previous["peak_mb"] and current["peak_mb"] > previous["peak_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: {previous['peak_mb']} MB → {current['peak_mb']} MB peak")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile agents on synthetic corpora")
+    parser.add_argument("--sizes", nargs="+", default=["1k"], help="Corpus sizes: 1k, 10k, 100k or a number")
+    parser.add_argument("--agents", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--density", type=float, default=2.0)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR, help="Where generated corpora are kept for reuse")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown/growth before failing (0.25 = 25%%)")
+    parser.add_argument("--output", help="Also write the results as JSON here")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    machine = machine_info()
+    same_machine = baseline.get("machine") == machine
+    if baseline and not same_machine:
+        print(f"⚠️  Baseline was recorded on {baseline.get('machine') or 'an unrecorded machine'}, this is {machine}: "
+              f"comparing peak memory only")
+
+    all_results, regressions, errors = {}, [], []
+    for size in args.sizes:
+        corpus_dir, key = ensure_corpus(os.path.abspath(args.corpus_dir), size, args.density, args.cycles, args.seed)
+        results = {}
+        print(f"\n📏 Corpus of {key} files")
+        for name in args.agents:
+            result = run_benchmark(name, corpus_dir, args.repeat)
+            results[name] = result
+            if "error" in result:
+                print(f"  ❌ {name:<30} failed ({result['error']})")
+                errors.append(f"[{key}] {name}: {result['error']}")
+            elif "skipped" in result:
+                print(f"  ⏭️  {name:<30} skipped ({result['skipped']})")
+            else:
+                print(f"  ⏱️  {name:<30} {result['seconds']:>9.3f}s  {result['peak_mb']:>8.1f} MB peak  "
+                      f"{result['ms_per_file']:.3f} ms/file  {result['details']}")
+        all_results[key] = results
+        if key in baseline:
+            regressions += [f"[{key}] {message}" for message in compare(results, baseline[key], args.tolerance, same_machine)]
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(all_results, f, indent=2)
+
+    if errors:
+        print("\n❌ Benchmarks crashed:")
+        for message in errors:
+            print(f" - {message}")
+        sys.exit(1)  # never saved as a baseline either
+
+    if args.save_baseline:
+        if not same_machine:
+            baseline = {}  # timings from two machines must not be mixed in one baseline
+        baseline.update(all_results)
+        baseline["machine"] = machine
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+
+    if regressions:
+        print("\n❌ Scaling regressions against baseline:")
+        for message in regressions:
+            print(f" - {message}")
+        sys.exit(1)
+    print("\n✅ No regressions against baseline." if baseline else "\nℹ️  No baseline yet (use --save-baseline).")
+
+
+if __name__ == "__main__":
+    main()
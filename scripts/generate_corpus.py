@@ -0,0 +1,268 @@
+# scripts/generate_corpus.py
+
+import os
+import json
+import random
+import argparse
+
+BASE_PACKAGE = "com.acme"
+DOMAINS = ["Order", "Customer", "Invoice", "Payment", "Inventory", "Shipment", "Account", "Product", "Catalog",
+           "Pricing", "Discount", "Ledger", "Audit", "Report", "Notification", "User", "Role", "Session", "Tax",
+           "Warehouse", "Supplier", "Contract", "Claim", "Policy", "Quote", "Refund", "Subscription", "Ticket"]
+LAYERS = [
+    # (layer, share of files, Spring annotation)
+    ("controller", 0.15, "@RestController"),
+    ("service", 0.35, "@Service"),
+    ("repository", 0.25, "@Repository"),
+    ("model", 0.25, None),
+]
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+FRAMEWORK_CLASSES = {
+    "BaseService": "public abstract class BaseService {\n    protected void audit(String action) {\n    }\n}\n",
+    "BaseRepository": "public abstract class BaseRepository<T> {\n    protected T load(String id) {\n        return null;\n    }\n}\n",
+    "AuditLogger": "public class AuditLogger {\n    public void log(String message) {\n    }\n}\n",
+}
+
+
+def parse_size(value):
+    if value in SIZES:
+        return SIZES[value]
+    return int(value[:-1]) * 1000 if value.lower().endswith("k") else int(value)
+
+
+def _field(name):
+    return name[0].lower() + name[1:]
+
+
+def _typo(name):
+    """Swaps two adjacent letters in the domain part, the kind of slip CrossReferenceResolver must fix."""
+    i = next((i for i in range(1, len(name) - 2) if name[i].isalpha() and name[i + 1].isalpha() and name[i] != name[i + 1]), None)
+    return name if i is None else name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+class CorpusGenerator:
+    """
+    Writes a synthetic migration workspace with the same layout as the repo root:
+    legacy_codebase/ (EJB session beans), migrated_codebase/ (Spring classes in controller → service →
+    repository → model layers), reference_pairs/{legacy,migrated}/, enterprise_framework_codebase/ and
+    data/mapping.json.
+    Injection edges only point down the layers (or to later services), so the dependency graph is
+    acyclic except for exactly `cycles` planted service cycles of two or three classes.
+    """
+
+    def __init__(self, out_dir, files=1000, density=2.0, cycles=5, reference_pairs=None, mismatch_rate=0.01,
+                 missing_import_rate=0.05, typo_rate=0.01, seed=0):
+        self.out_dir = out_dir
+        self.files = files
+        self.density = density
+        self.cycles = cycles
+        self.reference_pairs = reference_pairs if reference_pairs is not None else max(10, files // 20)
+        self.mismatch_rate = mismatch_rate
+        self.missing_import_rate = missing_import_rate
+        self.typo_rate = typo_rate
+        self.random = random.Random(seed)
+
+    def _plan(self):
+        classes = []
+        for layer, share, annotation in LAYERS:
+            count = max(1, int(self.files * share))
+            for i in range(count):
+                domain = DOMAINS[i % len(DOMAINS)]
+                name = f"{domain}{layer.capitalize()}{i // len(DOMAINS) or ''}"
+                classes.append({
+                    "name": name,
+                    "layer": layer,
+                    "annotation": annotation,
+                    "package": f"{BASE_PACKAGE}.{domain.lower()}.{layer}",
+                    "deps": [],
+                })
+        return classes
+
+    def _wire(self, classes):
+        by_layer = {}
+        for cls in classes:
+            by_layer.setdefault(cls["layer"], []).append(cls)
+        order = [layer for layer, _, _ in LAYERS]
+
+        for cls in classes:
+            if cls["layer"] == "model":
+                continue
+            below = by_layer[order[order.index(cls["layer"]) + 1]]
+            count = max(1, int(self.random.expovariate(1.0 / self.density)))
+            for _ in range(count):
+                dep = self.random.choice(below)
+                if dep is not cls and dep not in cls["deps"]:
+                    cls["deps"].append(dep)
+
+        services = by_layer["service"]
+        for i, service in enumerate(services):
+            # A few service → later service edges: deeper, still acyclic
+            if self.random.random() < 0.2 and i + 1 < len(services):
+                dep = services[self.random.randrange(i + 1, len(services))]
+                if dep not in service["deps"]:
+                    service["deps"].append(dep)
+
+        # Plant cycles among services not touched by another cycle
+        pool = list(range(len(services)))
+        self.random.shuffle(pool)
+        planted = 0
+        while planted < self.cycles and len(pool) >= 3:
+            size = 2 if planted % 2 == 0 else 3
+            members = sorted(pool[:size])
+            del pool[:size]
+            ring = [services[i] for i in members]
+            for a, b in zip(ring, ring[1:] + ring[:1]):
+                if b not in a["deps"]:
+                    a["deps"].append(b)
+            planted += 1
+        return planted
+
+    def _migrated_source(self, cls):
+        imports = {"org.springframework.beans.factory.annotation.Autowired", "java.util.List", "java.util.ArrayList"}
+        if cls["annotation"]:
+            imports.add({
+                "@RestController": "org.springframework.web.bind.annotation.RestController",
+                "@Service": "org.springframework.stereotype.Service",
+                "@Repository": "org.springframework.stereotype.Repository",
+            }[cls["annotation"]])
+        if cls["layer"] == "service":
+            imports.add(f"{BASE_PACKAGE}.framework.BaseService")
+
+        fields, calls = [], []
+        for dep in cls["deps"]:
+            type_name = dep["name"]
+            roll = self.random.random()
+            if roll < self.typo_rate:
+                type_name = _typo(type_name)  # unresolved, no import
+            elif roll >= self.typo_rate + self.missing_import_rate and dep["package"] != cls["package"]:
+                imports.add(f"{dep['package']}.{dep['name']}")
+            fields.append(f"    @Autowired\n    private {type_name} {_field(dep['name'])};\n")
+            calls.append(f"        {_field(dep['name'])}.process(id);\n")
+
+        if cls["layer"] == "model":
+            fields = ["    private String id;\n", "    private String name;\n", "    private long version;\n"]
+
+        lines = [f"package {cls['package']};\n\n"]
+        lines += [f"import {imp};\n" for imp in sorted(imports)]
+        lines.append("\n")
+        if cls["annotation"]:
+            lines.append(f"{cls['annotation']}\n")
+        extends = " extends BaseService" if cls["layer"] == "service" else ""
+        lines.append(f"public class {cls['name']}{extends} {{\n\n")
+        lines += fields
+        lines.append("\n")
+        if cls["layer"] == "model":
+            for field, type_name in (("id", "String"), ("name", "String"), ("version", "long")):
+                getter = field[0].upper() + field[1:]
+                lines.append(f"    public {type_name} get{getter}() {{\n        return {field};\n    }}\n\n")
+                lines.append(f"    public void set{getter}({type_name} {field}) {{\n        this.{field} = {field};\n    }}\n\n")
+        else:
+            lines.append("    public List<String> process(String id) {\n")
+            lines.append("        List<String> results = new ArrayList<>();\n")
+            lines += calls
+            lines.append("        results.add(id);\n        return results;\n    }\n\n")
+            lines.append(f"    public String describe() {{\n        return \"{cls['name']}\";\n    }}\n")
+        lines.append("}\n")
+        return "".join(lines)
+
+    def _legacy_source(self, cls):
+        name = f"{cls['name']}Bean"
+        lines = [
+            f"package {BASE_PACKAGE}.legacy.{cls['package'].split('.')[2]};\n\n",
+            "import javax.ejb.SessionBean;\nimport javax.ejb.SessionContext;\nimport javax.naming.InitialContext;\n\n",
+            f"public class {name} implements SessionBean {{\n\n",
+            "    private SessionContext context;\n\n",
+        ]
+        for dep in cls["deps"]:
+            lines.append(f"    private {dep['name']}Home {_field(dep['name'])}Home;\n")
+        lines.append("\n    public void ejbCreate() {\n        try {\n")
+        lines.append("            InitialContext ctx = new InitialContext();\n")
+        for dep in cls["deps"]:
+            lines.append(f"            {_field(dep['name'])}Home = ({dep['name']}Home) ctx.lookup(\"java:comp/env/ejb/{dep['name']}\");\n")
+        lines.append("        } catch (Exception e) {\n            throw new RuntimeException(e);\n        }\n    }\n\n")
+        lines.append("    public void setSessionContext(SessionContext context) {\n        this.context = context;\n    }\n}\n")
+        return f"{name}.java", "".join(lines)
+
+    @staticmethod
+    def _write(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def generate(self):
+        """:return: Summary of what was written."""
+        classes = self._plan()
+        planted = self._wire(classes)
+        mapping, mismatches = [], 0
+        legacy_by_domain = {}
+
+        for index, cls in enumerate(classes):
+            package_dir = cls["package"].replace(".", "/")
+            file_name = f"{cls['name']}.java"
+            if cls["layer"] != "model" and self.random.random() < self.mismatch_rate:
+                file_name = f"{cls['name']}Impl.java"  # FileNameClassNameValidator renames these
+                mismatches += 1
+            target = f"{package_dir}/{file_name}"
+            migrated = self._migrated_source(cls)
+            self._write(os.path.join(self.out_dir, "migrated_codebase", target), migrated)
+
+            domain_key = cls["package"].split(".")[2]
+            if cls["layer"] == "model" and legacy_by_domain.get(domain_key):
+                # DTOs were nested in the session bean: one legacy file → several targets
+                legacy_by_domain[domain_key]["targetPath"].append(target)
+                continue
+
+            legacy_name, legacy = self._legacy_source(cls)
+            source = f"{BASE_PACKAGE.replace('.', '/')}/legacy/{domain_key}/{legacy_name}"
+            self._write(os.path.join(self.out_dir, "legacy_codebase", source), legacy)
+            entry = {"sourcePath": [source], "targetPath": [target]}
+            mapping.append(entry)
+            if cls["layer"] == "service":
+                legacy_by_domain[domain_key] = entry
+
+            if index % max(1, len(classes) // self.reference_pairs) == 0:
+                self._write(os.path.join(self.out_dir, "reference_pairs", "legacy", source), legacy)
+                self._write(os.path.join(self.out_dir, "reference_pairs", "migrated", target), migrated)
+
+        for name, body in FRAMEWORK_CLASSES.items():
+            self._write(os.path.join(self.out_dir, "enterprise_framework_codebase", "com/acme/framework", f"{name}.java"),
+                        f"package {BASE_PACKAGE}.framework;\n\n{body}")
+
+        os.makedirs(os.path.join(self.out_dir, "data"), exist_ok=True)
+        with open(os.path.join(self.out_dir, "data", "mapping.json"), "w", encoding="utf-8") as f:
+            json.dump(mapping, f, indent=2)
+
+        summary = {
+            "files": len(classes),
+            "mapping_entries": len(mapping),
+            "cycles": planted,
+            "mismatches": mismatches,
+            "edges": sum(len(c["deps"]) for c in classes),
+        }
+        with open(os.path.join(self.out_dir, "corpus.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic legacy/migrated/reference corpus + mapping.json")
+    parser.add_argument("out_dir")
+    parser.add_argument("--files", default="1k", help="Migrated file count: 1k, 10k, 100k or a number (default: 1k)")
+    parser.add_argument("--density", type=float, default=2.0, help="Average injected dependencies per class")
+    parser.add_argument("--cycles", type=int, default=5, help="Service dependency cycles to plant")
+    parser.add_argument("--reference-pairs", type=int, default=None, help="Reference pairs (default: 5%% of files)")
+    parser.add_argument("--mismatch-rate", type=float, default=0.01, help="Share of files not named after their class")
+    parser.add_argument("--missing-import-rate", type=float, default=0.05)
+    parser.add_argument("--typo-rate", type=float, default=0.01, help="Share of injected types with a misspelled name")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(args.out_dir, files=parse_size(args.files), density=args.density, cycles=args.cycles,
+                                reference_pairs=args.reference_pairs, mismatch_rate=args.mismatch_rate,
+                                missing_import_rate=args.missing_import_rate, typo_rate=args.typo_rate, seed=args.seed)
+    summary = generator.generate()
+    print(f"✅ Corpus written to {args.out_dir}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
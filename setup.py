@@ -8,6 +8,7 @@ setup(
     install_requires=[
         "fire",
         "openai",
+        "numpy",
         "sentence-transformers",
         "scikit-learn",
         "javalang",
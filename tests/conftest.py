@@ -0,0 +1,10 @@
+# tests/conftest.py
+
+import pytest
+import utils.symbol_index as symbol_index
+
+
+@pytest.fixture(autouse=True)
+def symbol_index_dir(tmp_path, monkeypatch):
+    """Shared symbol indexes are saved at exit; keep the ones tests create out of data/symbol_index."""
+    monkeypatch.setattr(symbol_index, "INDEX_DIR", str(tmp_path / "symbol_index"))
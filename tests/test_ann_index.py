@@ -0,0 +1,57 @@
+# tests/test_ann_index.py
+
+import os
+import numpy as np
+import pytest
+from utils.ann_index import IVFIndex
+from utils.embedding_store import EmbeddingStore, normalize_rows
+
+
+def _clustered(n, dim=32, clusters=64, seed=0):
+    """Unit vectors around random centres, like embeddings of related code chunks."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    points = centres[rng.integers(clusters, size=n)] + 0.35 * rng.normal(size=(n, dim))
+    return normalize_rows(points.astype(np.float32))
+
+
+def _recall(index, matrix, queries, top_k=10, n_probe=16):
+    hits = 0
+    for query in queries:
+        exact = np.argsort(-(matrix @ query))[:top_k]
+        found, _ = index.search(query, top_k=top_k, n_probe=n_probe)
+        hits += len(set(found.tolist()) & set(exact.tolist()))
+    return hits / (top_k * len(queries))
+
+
+def test_recall_at_10_against_brute_force():
+    matrix = _clustered(6000)
+    index = IVFIndex.build(matrix)
+    queries = _clustered(50, seed=1)
+
+    assert index.centroids.shape[0] > 1
+    assert _recall(index, matrix, queries) >= 0.9
+    assert _recall(index, matrix, queries, n_probe=index.centroids.shape[0]) == 1.0
+
+
+def test_saved_index_searches_the_store_matrix(tmp_path):
+    matrix = _clustered(3000)
+    store = EmbeddingStore(str(tmp_path / "chunks"))
+    store.save(matrix, [{"path": f"R{i}.java"} for i in range(len(matrix))])
+    ivf_dir = store.base_path + ".ivf"
+    IVFIndex.build(matrix).save(ivf_dir)
+    IVFIndex.build(matrix, n_lists=8).save(ivf_dir)  # overwriting goes through a temp dir
+
+    assert sorted(os.listdir(tmp_path)) == ["chunks.ivf", "chunks.manifest.json", "chunks.npy"]
+    assert "vectors.npy" not in os.listdir(ivf_dir)
+
+    stored, _ = store.load(mmap=True)
+    loaded = IVFIndex.load(ivf_dir, stored)
+    query = _clustered(1, seed=2)[0]
+    ids, scores = loaded.search(query, top_k=5, n_probe=8)
+    assert loaded.centroids.shape[0] == 8
+    assert ids.tolist() == np.argsort(-(matrix @ query))[:5].tolist()
+    assert np.allclose(scores, matrix[ids] @ query)
+
+    with pytest.raises(ValueError):
+        IVFIndex.load(ivf_dir, stored[:-1])
@@ -0,0 +1,79 @@
+# tests/test_batch_runner.py
+
+import os
+from agents.batch_runner import BatchRunnerAgent, default_batch_paths
+from agents.fix_and_compile import FixAndCompileAgent
+from agents.fix_history_logger import FixHistoryLogger
+from agents.logger_refactor_agent import LoggerRefactorAgent
+from agents.swagger_completer_agent import SwaggerCompleterAgent
+from agents.test_generator import TestGeneratorAgent
+from llm.batch import LocalBatchExecutor
+
+TARGET = "com/acme/OrderController.java"
+CONTROLLER = """package com.acme;
+
+@RestController
+public class OrderController {
+    @GetMapping("/orders")
+    public String list() {
+        System.out.println("listing orders");
+        return "orders";
+    }
+}
+"""
+
+
+class FakeStitcher:
+    def stitch_context(self, target, reserved_tokens=0):
+        return ""
+
+
+def _runner(tmp_path):
+    migrated, output = tmp_path / "migrated", tmp_path / "output"
+    (migrated / "com" / "acme").mkdir(parents=True)
+    (migrated / TARGET).write_text(CONTROLLER, encoding="utf-8")
+    return BatchRunnerAgent(
+        FakeStitcher(),
+        FixAndCompileAgent(None, str(tmp_path / "legacy"), str(migrated), str(output)),
+        TestGeneratorAgent(None, str(output)),
+        SwaggerCompleterAgent(None, str(output)),
+        LoggerRefactorAgent(None, str(output)),
+        FixHistoryLogger(str(tmp_path / "history")),
+    )
+
+
+def _round_trip(runner, stage, batch_dir):
+    requests_path, results_path = default_batch_paths(stage, batch_dir)
+    collected = runner.collect([TARGET], stage, requests_path)
+    succeeded, failed = LocalBatchExecutor(client=None, workers=1).execute(requests_path, results_path)
+    assert (succeeded, failed) == (collected, 0)
+    return runner.ingest(results_path, requests_path)
+
+
+def test_offline_round_trip_applies_each_stage(tmp_path):
+    runner, batch_dir = _runner(tmp_path), str(tmp_path / "batch")
+
+    assert _round_trip(runner, "fix", batch_dir) == {"applied": 1, "failed": {}}
+    fixed = (tmp_path / "output" / TARGET).read_text(encoding="utf-8")
+    assert "class OrderController" in fixed
+    assert os.path.exists(runner.history_logger.history_path(TARGET))
+
+    assert _round_trip(runner, "post", batch_dir) == {"applied": 2, "failed": {}}
+    test_code = (tmp_path / "test_cases" / "OrderControllerTest.java").read_text(encoding="utf-8")
+    assert "class OrderControllerTest" in test_code and "@Test" in test_code
+    assert "class OrderController" in (tmp_path / "output" / TARGET).read_text(encoding="utf-8")
+
+    assert _round_trip(runner, "logger", batch_dir) == {"applied": 1, "failed": {}}
+    refactored = (tmp_path / "output" / TARGET).read_text(encoding="utf-8")
+    assert "System.out" not in refactored and "logger.info(" in refactored
+
+
+def test_missing_results_are_reported(tmp_path):
+    runner, batch_dir = _runner(tmp_path), str(tmp_path / "batch")
+    requests_path, results_path = default_batch_paths("fix", batch_dir)
+    runner.collect([TARGET], "fix", requests_path)
+    open(results_path, "w").close()
+
+    report = runner.ingest(results_path, requests_path)
+    assert report["applied"] == 0
+    assert list(report["failed"].values()) == ["no result"]
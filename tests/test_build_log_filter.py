@@ -0,0 +1,60 @@
+# tests/test_build_log_filter.py
+
+from utils.build_log_filter import BuildLogFilter
+
+LOG = """/work/output/src/main/java/com/acme/order/Mapper.java:3: error: cannot find symbol
+    Order order;
+    ^
+/work/output/src/main/java/com/acme/invoice/Mapper.java:7: error: ';' expected
+    int x
+         ^
+2 errors"""
+
+
+def test_same_named_classes_in_other_packages_are_kept_apart():
+    order = BuildLogFilter.filter_log_for_file(LOG, "com/acme/order/Mapper.java", context_lines=2)
+    invoice = BuildLogFilter.filter_log_for_file(LOG, "src/main/java/com/acme/invoice/Mapper.java", context_lines=2)
+    assert "order/Mapper.java:3" in order and "invoice" not in order
+    assert "invoice/Mapper.java:7" in invoice and "order/Mapper" not in invoice
+
+
+def test_file_without_errors_gets_nothing():
+    assert BuildLogFilter.filter_log_for_file(LOG, "com/acme/other/Mapper.java") == ""
+
+
+JAVAC = """/work/src/com/acme/A.java:3: error: cannot find symbol
+    Order order;
+    ^
+  symbol:   class Order
+  location: class A
+/work/src/com/acme/B.java:7: warning: [deprecation] Date(String) in Date has been deprecated
+        new Date("x");
+        ^
+/work/src/com/acme/A.java:9: error: ';' expected
+    int x
+         ^
+/opt/lib/Gen.java:1: error: class Gen is public, should be declared in a file named Gen.java
+Note: Some input files use unchecked or unsafe operations.
+3 errors
+1 warning"""
+
+
+def test_parse_diagnostics_reads_kind_position_and_text():
+    diagnostics = BuildLogFilter.parse_diagnostics(JAVAC)
+
+    assert [(d["file"], d["line"], d["column"], d["kind"]) for d in diagnostics] == [
+        ("/work/src/com/acme/A.java", 3, 5, "error"),
+        ("/work/src/com/acme/B.java", 7, 9, "warning"),
+        ("/work/src/com/acme/A.java", 9, 10, "error"),
+        ("/opt/lib/Gen.java", 1, None, "error"),
+    ]
+    assert diagnostics[0]["message"] == "cannot find symbol"
+    assert diagnostics[0]["text"].endswith("  location: class A")
+    assert "Note:" not in diagnostics[3]["text"] and "errors" not in diagnostics[3]["text"]
+
+
+def test_group_by_file_is_relative_to_base_dir_only_inside_it():
+    grouped = BuildLogFilter.group_by_file(BuildLogFilter.parse_diagnostics(JAVAC), base_dir="/work/src")
+
+    assert sorted(grouped) == ["/opt/lib/Gen.java", "com/acme/A.java", "com/acme/B.java"]
+    assert [d["line"] for d in grouped["com/acme/A.java"]] == [3, 9]
@@ -0,0 +1,152 @@
+# tests/test_build_scheduler.py
+
+import os
+import threading
+from agents.build_scheduler import BuildSchedulerAgent
+from agents.retry_agent import RetryAgent
+
+# File contents the fake build understands
+OK, ERR, PARSE, SILENT = "class Ok {}", "ERR", "PARSE", "SILENT"
+
+
+class FakeValidator:
+    """Builds like javac: parse errors hide attribution errors, silent failures leave no diagnostic."""
+
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+        self.lock = threading.RLock()
+        self.log = ""
+
+    def _contents(self):
+        for root, _, files in os.walk(self.project_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, "r", encoding="utf-8") as f:
+                    yield path, f.read()
+
+    def run_build(self):
+        contents = list(self._contents())
+        parse = [p for p, c in contents if c == PARSE]
+        errors = [p for p, c in contents if c == ERR]
+        if parse:
+            self.log = "\n".join(f"{p}:1: error: ';' expected" for p in parse)
+        elif errors:
+            self.log = "\n".join(f"{p}:1: error: cannot find symbol" for p in errors)
+        elif any(c == SILENT for _, c in contents):
+            self.log = "FAILURE: Build failed with an exception."
+        else:
+            self.log = "BUILD SUCCESSFUL"
+            return True
+        return False
+
+    def get_last_build_log(self):
+        return self.log
+
+
+def _scheduler(tmp_path, fixes):
+    scheduler = BuildSchedulerAgent(FakeValidator(str(tmp_path)))
+    for target in fixes:
+        scheduler._apply(target, OK)
+    scheduler.snapshot(list(fixes))
+    for target, content in fixes.items():
+        scheduler._apply(target, content)
+    return scheduler
+
+
+def test_attributed_errors_need_a_single_build(tmp_path):
+    scheduler = _scheduler(tmp_path, {"a/A.java": ERR, "a/B.java": OK})
+    results = scheduler.validate(["a/A.java", "a/B.java"])
+
+    assert results["a/A.java"] and results["a/B.java"] == ""
+    assert scheduler.builds == 1
+
+
+def test_parse_errors_do_not_vouch_for_unmentioned_files(tmp_path):
+    fixes = {"a/P.java": PARSE, "a/E.java": ERR, "a/O.java": OK}
+    scheduler = _scheduler(tmp_path, fixes)
+    results = scheduler.validate(list(fixes))
+
+    assert results["a/P.java"] and results["a/E.java"]
+    assert results["a/O.java"] == ""
+    assert all(scheduler._read(t) == c for t, c in fixes.items())
+
+
+def test_bisection_builds_halves_without_known_failures(tmp_path):
+    fixes = {"a/P.java": PARSE, "a/S.java": SILENT, "a/O1.java": OK, "a/O2.java": OK, "a/O3.java": OK}
+    scheduler = _scheduler(tmp_path, fixes)
+    results = scheduler.validate(list(fixes))
+
+    assert results["a/P.java"] and results["a/S.java"]
+    assert all(results[t] == "" for t in ("a/O1.java", "a/O2.java", "a/O3.java"))
+    assert all(scheduler._read(t) == c for t, c in fixes.items())
+
+
+class FakeFixAgent:
+    def __init__(self, output_dir, broken):
+        self.output_dir = output_dir
+        self.broken = broken
+
+    def fix_file(self, target, stitched_context, build_errors):
+        if target == self.broken:
+            raise RuntimeError("provider exploded")
+        return {"success": True, "fixed_code": OK}
+
+
+class FakeStitcher:
+    def __init__(self, migrated_dir):
+        self.migrated_dir = migrated_dir
+
+    def stitch_context(self, target, reserved_tokens=0):
+        return ""
+
+
+class FakeLogger:
+    def __init__(self):
+        self.logged = []
+
+    def log(self, target, result):
+        self.logged.append(target)
+
+
+def test_one_raising_target_does_not_abort_the_batch(tmp_path):
+    targets = ["a/A.java", "a/B.java", "a/C.java"]
+    scheduler = _scheduler(tmp_path, {t: OK for t in targets})
+    logger = FakeLogger()
+    results = RetryAgent(max_retries=1).retry_fix_batch(
+        targets, FakeFixAgent(str(tmp_path), "a/B.java"), scheduler.validator, FakeStitcher(str(tmp_path)),
+        None, None, logger, scheduler=scheduler)
+
+    assert results["a/A.java"]["success"] and results["a/C.java"]["success"]
+    assert not results["a/B.java"]["success"]
+    assert "provider exploded" in results["a/B.java"]["fix_log"]["exception"]
+    assert "a/B.java" in logger.logged
+
+
+class WritingFixAgent:
+    """Writes its answer into the project like FixAndCompileAgent; `broken` never compiles."""
+
+    def __init__(self, scheduler, broken):
+        self.output_dir = scheduler.project_dir
+        self.scheduler = scheduler
+        self.broken = broken
+        self.calls = 0
+
+    def fix_file(self, target, stitched_context, build_errors):
+        self.calls += 1
+        content = ERR if target == self.broken else OK
+        self.scheduler._apply(target, content)
+        return {"success": True, "fixed_code": content}
+
+
+def test_final_batch_attempt_is_validated(tmp_path):
+    targets = ["a/A.java", "a/B.java"]
+    scheduler = _scheduler(tmp_path, {t: OK for t in targets})
+    fix_agent = WritingFixAgent(scheduler, "a/B.java")
+    results = RetryAgent(max_retries=2).retry_fix_batch(
+        targets, fix_agent, scheduler.validator, FakeStitcher(str(tmp_path)), None, None, FakeLogger(),
+        scheduler=scheduler)
+
+    assert results["a/A.java"]["success"]
+    assert results["a/B.java"]["success"] is False
+    assert "cannot find symbol" in results["a/B.java"]["fix_log"]["build_errors"]
+    assert fix_agent.calls == 4  # A once, B on both attempts and the final wiring check
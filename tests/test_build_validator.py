@@ -0,0 +1,90 @@
+# tests/test_build_validator.py
+
+import io
+import pytest
+import agents.build_validator as build_validator
+from agents.build_validator import BuildValidatorAgent
+
+
+class FakeGradle:
+    """Records every gradlew invocation; Popen builds print `output` and exit with `returncode`."""
+
+    def __init__(self, output="", returncode=0):
+        self.output = output
+        self.returncode = returncode
+        self.popen_calls = []
+        self.run_calls = []
+
+    def popen(self, command, cwd=None, **kwargs):
+        self.popen_calls.append((command, cwd, kwargs))
+        gradle = self
+
+        class Process:
+            stdout = io.StringIO(gradle.output)
+
+            def wait(self):
+                return gradle.returncode
+        return Process()
+
+    def run(self, command, cwd=None, **kwargs):
+        self.run_calls.append((command, cwd))
+
+
+@pytest.fixture
+def gradle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the build log path is relative, as in the pipeline
+    gradle = FakeGradle()
+    monkeypatch.setattr(build_validator.subprocess, "Popen", gradle.popen)
+    monkeypatch.setattr(build_validator.subprocess, "run", gradle.run)
+    return gradle
+
+
+@pytest.mark.parametrize("mode, command", [
+    ("full", ["./gradlew", "clean", "build"]),
+    ("incremental", ["./gradlew", "build", "--daemon"]),
+    ("compile", ["./gradlew", "compileJava", "--daemon"]),
+])
+def test_each_mode_runs_its_gradle_command(gradle, mode, command):
+    validator = BuildValidatorAgent("output/project", mode=mode)
+    assert validator.run_build() is True
+
+    [(called, cwd, kwargs)] = gradle.popen_calls
+    assert called == command and cwd == "output/project"
+    assert kwargs["stderr"] == build_validator.subprocess.STDOUT
+    assert len(validator.build_durations) == 1
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        BuildValidatorAgent("output/project", mode="parallel")
+
+
+def test_build_output_is_streamed_into_the_log(gradle, capsys):
+    gradle.output = "> Task :compileJava FAILED\nA.java:3: error: cannot find symbol\n"
+    gradle.returncode = 1
+    validator = BuildValidatorAgent("output/project", stream_log=True)
+
+    assert validator.run_build() is False
+    assert validator.get_last_build_log() == gradle.output
+    assert "   │ A.java:3: error: cannot find symbol" in capsys.readouterr().out
+
+
+def test_log_is_not_echoed_unless_asked(gradle, capsys):
+    gradle.output = "BUILD SUCCESSFUL\n"
+    BuildValidatorAgent("output/project").run_build()
+    assert "│" not in capsys.readouterr().out
+
+
+def test_daemon_lifecycle_only_outside_full_mode(gradle):
+    full = BuildValidatorAgent("output/project")
+    full.warm_up()
+    full.stop_daemon()
+    assert gradle.run_calls == []
+
+    incremental = BuildValidatorAgent("output/project", mode="incremental")
+    incremental.warm_up()
+    incremental.stop_daemon()
+    assert gradle.run_calls == [
+        (["./gradlew", "help", "--daemon", "-q"], "output/project"),
+        (["./gradlew", "--stop"], "output/project"),
+    ]
@@ -0,0 +1,28 @@
+# tests/test_compilation_scanner.py
+
+from agents.compilation_scanner_agent import CompilationScannerAgent
+
+SHARD = """{root}/com/acme/A.java:9: error: ';' expected
+    int x
+         ^
+{root}/com/acme/A.java:3: error: cannot find symbol
+    Order order;
+    ^
+{root}/com/acme/B.java:7: warning: [deprecation] Date(String) in Date has been deprecated
+        new Date("x");
+        ^
+2 errors
+1 warning"""
+
+
+def test_report_keeps_one_stderr_per_file_with_errors(tmp_path):
+    root = str(tmp_path / "src")
+    scanner = CompilationScannerAgent(source_root=root, log_dir=str(tmp_path / "logs"))
+    # Two shards that both pulled A.java in via -sourcepath report its errors twice
+    report = scanner._build_report("\n".join([SHARD.format(root=root)] * 2))
+
+    assert list(report) == ["com/acme/A.java"]
+    entry = report["com/acme/A.java"]
+    assert set(entry) == {"stderr", "diagnostics"}
+    assert entry["stderr"].startswith(f"{root}/com/acme/A.java:3: error: cannot find symbol")
+    assert [(d["line"], d["column"]) for d in entry["diagnostics"]] == [(3, 5), (9, 10)]
@@ -0,0 +1,16 @@
+# tests/test_context_stitcher.py
+
+import json
+from agents.context_stitcher import ContextStitcherAgent
+
+
+def test_manifests_of_same_named_targets_do_not_collide(tmp_path):
+    stitcher = ContextStitcherAgent(str(tmp_path), str(tmp_path), manifest_dir=str(tmp_path / "context"),
+                                    relationship_store=False)
+    manifest = {"budget": 10, "used": 5, "included": [], "dropped": []}
+    stitcher._record_manifest("com/acme/order/Mapper.java", manifest)
+    stitcher._record_manifest("com/acme/invoice/Mapper.java", manifest)
+
+    for target in ("com/acme/order/Mapper.java", "com/acme/invoice/Mapper.java"):
+        with open(stitcher.manifest_path(target), "r", encoding="utf-8") as f:
+            assert json.load(f)["target"] == target
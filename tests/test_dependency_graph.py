@@ -0,0 +1,87 @@
+# tests/test_dependency_graph.py
+
+import random
+from utils.dependency_graph import (ClassDependencyGraph, reachable, strongly_connected_components,
+                                    topological_levels)
+from utils.symbol_index import SymbolIndex
+
+
+def _reference_components(graph):
+    """Quadratic SCCs from mutual reachability, to check Tarjan against."""
+    successors = lambda n: graph.get(n, ())
+    closure = {n: reachable(n, successors) for n in graph}
+    return {frozenset(m for m in graph if m in closure[n] and n in closure[m]) for n in graph}
+
+
+def test_components_match_mutual_reachability_on_random_graphs():
+    rng = random.Random(7)
+    for _ in range(50):
+        nodes = list(range(rng.randint(1, 30)))
+        graph = {n: [rng.choice(nodes) for _ in range(rng.randint(0, 3))] for n in nodes}
+        components = strongly_connected_components(nodes, lambda n: graph[n])
+        assert {frozenset(c) for c in components} == _reference_components(graph)
+
+        # Reverse topological order: every edge leaving a component points to one listed earlier
+        position = {n: i for i, c in enumerate(components) for n in c}
+        assert all(position[m] <= position[n] for n in nodes for m in graph[n])
+
+
+def test_long_chain_does_not_hit_the_recursion_limit():
+    size = 20_000
+    components = strongly_connected_components(range(size), lambda n: [n + 1] if n + 1 < size else [])
+    assert components == [[n] for n in reversed(range(size))]
+
+
+def test_levels_collapse_cycles_and_ignore_outside_nodes():
+    graph = {"service": ["repo", "dto", "jdk"], "repo": ["dto"], "a": ["b"], "b": ["a", "dto"], "dto": []}
+    levels = topological_levels(list(graph), lambda n: graph.get(n, ()))
+    assert [sorted(sorted(c) for c in level) for level in levels] == [
+        [["dto"]], [["a", "b"], ["repo"]], [["service"]]]
+
+
+def _write(root, name, body):
+    (root / f"{name}.java").write_text(f"package app;\n\npublic class {name} {{\n{body}\n}}\n", encoding="utf-8")
+
+
+def _field(type_name):
+    return f"    private {type_name} {type_name.lower()};"
+
+
+def _components(graph):
+    return {frozenset(c) for c in graph.components.values()}
+
+
+def test_recheck_tracks_new_and_broken_cycles_like_a_rebuild(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _write(src, "A", _field("B"))
+    _write(src, "B", _field("C"))
+    _write(src, "C", "")
+    index = SymbolIndex(str(src), index_path=str(tmp_path / "symbols.json")).build(workers=1)
+    graph = ClassDependencyGraph(index).build()
+    assert graph.cycles() == []
+
+    _write(src, "C", _field("A"))
+    index.update_file("C.java")
+    cycles = graph.recheck("C.java")
+    assert cycles == [{"classes": ["app.A", "app.B", "app.C"], "cycle": ["app.A", "app.B", "app.C", "app.A"]}]
+    assert _components(graph) == _components(ClassDependencyGraph(index).build())
+
+    _write(src, "B", "")
+    index.update_file("B.java")
+    assert graph.recheck("B.java") == []
+    assert _components(graph) == _components(ClassDependencyGraph(index).build())
+
+
+def test_recheck_resolves_references_to_a_newly_added_class(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _write(src, "A", _field("D"))
+    index = SymbolIndex(str(src), index_path=str(tmp_path / "symbols.json")).build(workers=1)
+    graph = ClassDependencyGraph(index).build()
+    assert graph.edges["app.A"] == set()
+
+    _write(src, "D", _field("A"))
+    index.update_file("D.java")
+    assert [c["classes"] for c in graph.recheck("D.java")] == [["app.A", "app.D"]]
+    assert graph.edges["app.A"] == {"app.D"}
@@ -0,0 +1,38 @@
+# tests/test_fake_server.py
+
+import pytest
+from llm.fake_server import FakeLLMServer, fake_completion
+from llm.llm_client import get_llm_client
+
+BROKEN = "package a;\n\npublic class A {\n    public int size() { return 0; }\n}"
+PROMPT = f"Fix the class.\n\n[BROKEN FILE]\n{BROKEN}\n---\n"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeLLMServer(port=0).start()  # ephemeral port
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("LLM_BASE_URL", server.base_url)
+    monkeypatch.setenv("LLM_CACHE", "off")
+    yield server
+    server.stop()
+
+
+def test_plain_and_streamed_requests_through_the_client_stack(server):
+    client = get_llm_client()
+    request = {"model": "gpt-4o", "messages": [{"role": "user", "content": PROMPT}]}
+
+    response = client.chat.completions.create(**request)
+    assert response.choices[0].message.content == fake_completion(PROMPT)
+    assert response.choices[0].finish_reason == "stop"
+    assert response.usage.completion_tokens > 0
+
+    chunks = list(client.chat.completions.create(**request, stream=True))
+    streamed = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+    assert streamed == fake_completion(PROMPT)
+    assert BROKEN in streamed
+    assert chunks[-1].choices[0].finish_reason == "stop"
+
+    stats = server.stats()
+    assert stats["requests"] == stats["completed"] == 2
+    assert stats["errors"] == stats["throttled"] == stats["in_flight"] == 0
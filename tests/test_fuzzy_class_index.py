@@ -0,0 +1,38 @@
+# tests/test_fuzzy_class_index.py
+
+import difflib
+from utils.fuzzy_class_index import FuzzyClassIndex
+
+NAMES = ["OrderService", "OrderRepository", "OrderController", "InvoiceService", "CustomerService",
+         "PaymentGateway", "OrderLineDto", "AuditLogger"]
+
+
+class FakeSymbolIndex:
+    def __init__(self, names):
+        self.version = 1
+        self.index = {name: [f"com.acme.{name.lower()}.{name}"] for name in names}
+
+
+def test_misspelt_names_resolve_like_difflib():
+    index = FuzzyClassIndex(FakeSymbolIndex(NAMES))
+    for query in ["OrdreService", "InvoiceServce", "CustomerSrevice", "PaymentGatway", "AuditLoger"]:
+        expected = difflib.get_close_matches(query, NAMES, n=1, cutoff=0.7)
+        assert index.best(query)["name"] == expected[0]
+
+
+def test_top_k_matches_full_scoring():
+    index = FuzzyClassIndex(FakeSymbolIndex(NAMES))
+    found = [r["name"] for r in index.search("OrderServic", top_k=3)]
+    expected = sorted((n for n in NAMES if difflib.SequenceMatcher(None, n, "OrderServic").ratio() >= 0.7),
+                      key=lambda n: -difflib.SequenceMatcher(None, n, "OrderServic").ratio())[:3]
+    assert found == expected
+
+
+def test_index_follows_symbol_index_changes():
+    symbols = FakeSymbolIndex(NAMES)
+    index = FuzzyClassIndex(symbols)
+    assert index.best("ShipmentServce") is None
+    symbols.index = {**symbols.index, "ShipmentService": ["com.acme.ShipmentService"]}
+    symbols.version += 1
+    assert index.best("ShipmentServce")["fqcn"] == "com.acme.ShipmentService"
+    assert index.best("nothing like it") is None
@@ -0,0 +1,87 @@
+# tests/test_incremental_planner.py
+
+import json
+from types import SimpleNamespace
+from agents.incremental_planner import IncrementalPlannerAgent
+from agents.mapping_loader import MappingLoaderAgent
+from utils.symbol_index import SymbolIndex
+
+TARGETS = ["app/A.java", "app/B.java", "app/C.java", "app/D.java"]
+
+
+def _java(name, injected=None):
+    field = f"    private {injected} dep;\n" if injected else ""
+    return f"package app;\n\npublic class {name} {{\n{field}}}\n"
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _planner(tmp_path, monkeypatch):
+    # Reference paths are relative to the working directory, as in the pipeline
+    monkeypatch.chdir(tmp_path)
+    sources = {"app/A.java": "B", "app/B.java": "C", "app/C.java": None, "app/D.java": None}
+    for target, injected in sources.items():
+        name = target[4:-5]
+        _write(tmp_path / "migrated" / target, _java(name, injected))
+        _write(tmp_path / "legacy" / f"{name}.java", _java(name))
+        _write(tmp_path / "out" / target, _java(name, injected))
+    _write(tmp_path / "reference_pairs" / "migrated" / "refs" / "Ref.java", "class Ref {}")
+    _write(tmp_path / "mapping.json", json.dumps([{"sourcePath": t[4:], "targetPath": t} for t in TARGETS]))
+
+    symbols = SymbolIndex(str(tmp_path / "migrated"), index_path=str(tmp_path / "symbols.json")).build(workers=1)
+    stitcher = SimpleNamespace(token_budget=0, part_modes={}, reference_chunks=False,
+                               references={"app/D.java": ["refs/Ref.java"]})
+    planner = IncrementalPlannerAgent(MappingLoaderAgent(str(tmp_path / "mapping.json")), str(tmp_path / "migrated"),
+                                      str(tmp_path / "legacy"), stitcher, str(tmp_path / "out"), symbol_index=symbols,
+                                      store_path=str(tmp_path / "fingerprints.json"))
+    for target in TARGETS:
+        planner.record(target)
+    planner.save()
+    return planner
+
+
+def test_unchanged_targets_are_not_planned(tmp_path, monkeypatch):
+    planner = _planner(tmp_path, monkeypatch)
+    assert planner.plan(TARGETS) == {}
+    assert planner.plan(TARGETS + ["app/New.java"]) == {"app/New.java": ["never fixed"]}
+
+
+def test_dependents_are_planned_transitively(tmp_path, monkeypatch):
+    planner = _planner(tmp_path, monkeypatch)
+    _write(tmp_path / "migrated" / "app" / "C.java", _java("C") + "// edited\n")
+
+    assert planner.plan(TARGETS) == {
+        "app/A.java": ["depends on changed app/C.java via app/B.java"],
+        "app/B.java": ["depends on changed app/C.java"],
+        "app/C.java": ["migrated file changed"],
+    }
+
+
+def test_references_come_from_the_promoter_without_a_token_budget(tmp_path, monkeypatch):
+    planner = _planner(tmp_path, monkeypatch)
+    assert planner.fingerprints["app/D.java"]["references"] == ["refs/Ref.java"]
+
+    _write(tmp_path / "reference_pairs" / "migrated" / "refs" / "Ref.java", "class Ref { int changed; }")
+    assert planner.plan(TARGETS) == {"app/D.java": ["chosen references changed"]}
+
+
+def test_resumed_targets_keep_the_fingerprint_of_their_fix(tmp_path, monkeypatch):
+    planner = _planner(tmp_path, monkeypatch)
+    stored = planner.fingerprints["app/C.java"]
+    _write(tmp_path / "migrated" / "app" / "C.java", _java("C") + "// edited\n")
+    planner.record_resumed("app/C.java")
+    assert planner.fingerprints["app/C.java"] is stored
+
+    del planner.fingerprints["app/D.java"]
+    planner.record_resumed("app/D.java")
+    assert planner.plan(["app/D.java"]) == {}
+
+
+def test_fingerprints_survive_a_reload(tmp_path, monkeypatch):
+    planner = _planner(tmp_path, monkeypatch)
+    reloaded = IncrementalPlannerAgent(planner.mapping_agent, planner.migrated_dir, planner.legacy_dir,
+                                       planner.stitcher, planner.output_dir, store_path=planner.store_path)
+    assert reloaded.fingerprints == planner.fingerprints
@@ -0,0 +1,93 @@
+# tests/test_llm_cache.py
+
+from types import SimpleNamespace
+from llm.llm_cache import CachedLLMClient, LLMResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "Fix OrderService"}]
+
+
+class CountingClient:
+    def __init__(self, finish_reason="stop"):
+        self.finish_reason = finish_reason
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if kwargs.get("stream"):
+            return iter([self._chunk("class A {}", None), self._chunk(None, self.finish_reason)])
+        choice = SimpleNamespace(finish_reason=self.finish_reason,
+                                 message=SimpleNamespace(content=f"answer {self.calls}"))
+        return SimpleNamespace(id=f"r{self.calls}", model=kwargs["model"], choices=[choice], usage=None)
+
+    @staticmethod
+    def _chunk(content, finish_reason):
+        return SimpleNamespace(id="s", model="gpt-4o", choices=[
+            SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)])
+
+
+def _request(**overrides):
+    return {"model": "gpt-4o", "temperature": 0.2, "messages": MESSAGES, **overrides}
+
+
+def test_key_is_stable_and_covers_model_temperature_and_messages():
+    assert cache_key(_request()) == cache_key(dict(reversed(list(_request().items()))))
+    assert cache_key(_request()) == cache_key(_request(messages=[dict(m) for m in MESSAGES]))
+    keys = {cache_key(_request()), cache_key(_request(model="gpt-4o-mini")), cache_key(_request(temperature=0.0)),
+            cache_key(_request(messages=[{"role": "user", "content": "Fix InvoiceService"}]))}
+    assert len(keys) == 4
+
+
+def test_hits_misses_and_streams_share_entries(tmp_path):
+    client = CountingClient()
+    cached = CachedLLMClient(client, cache=LLMResponseCache(str(tmp_path)))
+
+    first = cached.chat.completions.create(**_request())
+    second = cached.chat.completions.create(**_request())
+    replayed = "".join(c.choices[0].delta.content or "" for c in cached.chat.completions.create(**_request(), stream=True))
+
+    assert client.calls == 1
+    assert second.cached and second.choices[0].message.content == first.choices[0].message.content == replayed
+    assert cached.stats()["hits"] == 2 and cached.stats()["misses"] == 1
+
+
+def test_truncated_answers_are_not_cached(tmp_path):
+    client = CountingClient(finish_reason="length")
+    cached = CachedLLMClient(client, cache=LLMResponseCache(str(tmp_path)))
+    for _ in range(2):
+        cached.chat.completions.create(**_request())
+        list(cached.chat.completions.create(**_request(temperature=0.0), stream=True))
+
+    assert client.calls == 4
+    assert cached.stats()["entries"] == 0
+
+
+def test_bypass_skips_reads_but_still_stores(tmp_path):
+    cache = LLMResponseCache(str(tmp_path))
+    client = CountingClient()
+    CachedLLMClient(client, cache=cache, bypass=True).chat.completions.create(**_request())
+    CachedLLMClient(client, cache=cache, bypass=True).chat.completions.create(**_request())
+    assert client.calls == 2 and cache.stats()["hits"] == 0
+
+    assert CachedLLMClient(client, cache=cache).chat.completions.create(**_request()).cached
+    assert client.calls == 2
+
+
+def test_lru_eviction_keeps_recently_used_entries_within_the_bound(tmp_path):
+    entry = {"content": "x" * 200}
+    probe = LLMResponseCache(str(tmp_path / "probe"))
+    probe.put("probe", entry)
+    size = probe.stats()["bytes"]
+
+    cache = LLMResponseCache(str(tmp_path / "cache"), max_bytes=3 * size)
+    for key in ("a1", "b2", "c3"):
+        cache.put(key, entry)
+    assert cache.get("a1") is not None  # a1 is now the most recently used
+    cache.put("d4", entry)
+
+    assert cache.get("b2") is None
+    assert all(cache.get(key) is not None for key in ("a1", "c3", "d4"))
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] <= 3 * size
+
+    reopened = LLMResponseCache(str(tmp_path / "cache"), max_bytes=3 * size)
+    assert reopened.stats()["entries"] == 3
@@ -0,0 +1,115 @@
+# tests/test_main.py
+
+import threading
+import pytest
+
+pytest.importorskip("sentence_transformers")  # main imports the reference promoter
+
+import main  # noqa: E402
+from agents.fix_history_logger import FixHistoryLogger  # noqa: E402
+from agents.retry_agent import RetryAgent  # noqa: E402
+
+
+class FixedBuildValidator:
+    """The build fails with an error in target for every build while `broken` is set."""
+
+    def __init__(self, project_dir, target, broken):
+        self.project_dir = project_dir
+        self.target = target
+        self.broken = broken
+        self.lock = threading.RLock()
+
+    def run_build(self):
+        return not self.broken
+
+    def get_last_build_log(self):
+        return f"{self.project_dir}/{self.target}:1: error: cannot find symbol" if self.broken else ""
+
+
+class AnsweringFixAgent:
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def fix_file(self, target, stitched_context, build_errors):
+        return {"success": True, "fixed_code": "class A {}"}
+
+
+class FakeStitcher:
+    def __init__(self, migrated_dir):
+        self.migrated_dir = migrated_dir
+
+    def stitch_context(self, target, reserved_tokens=0):
+        return ""
+
+
+class RecordingPlanner:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, target):
+        self.recorded.append(target)
+
+    def record_resumed(self, target):
+        self.recorded.append(target)
+
+
+class PostProcessor:
+    def __init__(self):
+        self.ran = []
+
+    def run(self, target):
+        self.ran.append(target)
+
+
+def _agents(tmp_path, broken):
+    post = PostProcessor()
+    return {
+        "retry": RetryAgent(max_retries=2),
+        "fix": AnsweringFixAgent(str(tmp_path)),
+        "validator": FixedBuildValidator(str(tmp_path), "a/A.java", broken),
+        "stitcher": FakeStitcher(str(tmp_path)),
+        "fixer": None,
+        "dep_validator": None,
+        "logger": FixHistoryLogger(str(tmp_path / "history")),
+        "planner": RecordingPlanner(),
+        "journal": main.RunJournal(str(tmp_path), path=str(tmp_path / "journal.jsonl")),
+        "tester": type("Tester", (), {"generate_test_case": post.run})(),
+        "swagger": type("Swagger", (), {"add_swagger_annotations": post.run})(),
+        "logger_refactor": type("LoggerRefactor", (), {"inject_logger": post.run})(),
+    }, post
+
+
+def test_exhausted_retries_are_not_fingerprinted(tmp_path):
+    agents, post = _agents(tmp_path, broken=True)
+    result = main.process_target("a/A.java", agents)
+
+    assert result["success"] is False
+    assert agents["planner"].recorded == [] and post.ran == []
+
+
+def test_validated_fix_is_fingerprinted(tmp_path):
+    agents, post = _agents(tmp_path, broken=False)
+    result = main.process_target("a/A.java", agents)
+
+    assert main.fix_validated(result)
+    assert agents["planner"].recorded == ["a/A.java"]
+    assert post.ran == ["a/A.java"] * 3
+
+
+def test_failed_fix_is_journaled_as_failed_and_resumed(tmp_path):
+    agents, _ = _agents(tmp_path, broken=True)
+    main.process_target("a/A.java", agents)
+
+    resumed = main.RunJournal(str(tmp_path), path=agents["journal"].path, resume=True)
+    assert not resumed.finished("a/A.java", "fix")
+    assert resumed.pending(["a/A.java"]) == ["a/A.java"]
+
+
+def test_unvalidated_answer_is_not_journaled_as_fixed(tmp_path):
+    agents, post = _agents(tmp_path, broken=False)
+    agents["retry"] = type("Retry", (), {"retry_fix": lambda self, *a, **k: {"success": True, "fixed_code": "x"}})()
+    main.process_target("a/A.java", agents)
+
+    resumed = main.RunJournal(str(tmp_path), path=agents["journal"].path, resume=True)
+    assert not resumed.finished("a/A.java", "fix")
+    assert post.ran == []
@@ -0,0 +1,61 @@
+# tests/test_mapping_loader.py
+
+import json
+import pytest
+from agents.mapping_loader import MappingLoaderAgent, iter_mapping_entries
+
+ENTRIES = [
+    {"sourcePath": "legacy/OrderDao.java", "targetPath": ["order/OrderRepository.java", "order/Order.java"]},
+    {"sourcePath": ["legacy/Invoice.java", "legacy/InvoiceHelper.java"], "targetPath": "invoice/Invoice.java",
+     "notes": "Déjà vu: \"quoted\", [brackets], {braces} and commas, inside strings"},
+    {"sourcePath": "legacy/OrderDao.java", "targetPath": "order/OrderService.java", "nested": {"a": [1, {"b": []}]}},
+]
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "mapping.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 20])
+def test_streamed_entries_match_json_load(tmp_path, chunk_size):
+    path = _write(tmp_path, json.dumps(ENTRIES, indent=2, ensure_ascii=False))
+    assert list(iter_mapping_entries(path, chunk_size=chunk_size)) == ENTRIES
+
+
+@pytest.mark.parametrize("text", ["", "  \n", "[]", " [ \n ] "])
+def test_empty_mappings_yield_nothing(tmp_path, text):
+    assert list(iter_mapping_entries(_write(tmp_path, text), chunk_size=3)) == []
+
+
+@pytest.mark.parametrize("text,message", [
+    ('{"sourcePath": "a"}', "must contain a JSON array"),
+    ('[{"sourcePath": "a"}, ', "unterminated JSON array"),
+])
+def test_malformed_mappings_raise(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_mapping_entries(_write(tmp_path, text), chunk_size=4))
+
+
+def test_truncated_entry_raises(tmp_path):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_mapping_entries(_write(tmp_path, '[{"sourcePath": "a", "targ'), chunk_size=4))
+
+
+def test_loader_indexes_keep_mapping_order(tmp_path):
+    loader = MappingLoaderAgent(_write(tmp_path, json.dumps(ENTRIES)))
+
+    assert loader.get_all_targets() == ["order/OrderRepository.java", "order/Order.java",
+                                        "invoice/Invoice.java", "order/OrderService.java"]
+    assert loader.get_targets_by_source("legacy/OrderDao.java") == ["order/OrderRepository.java", "order/Order.java",
+                                                                    "order/OrderService.java"]
+    assert loader.get_sources_by_target("invoice/Invoice.java") == ["legacy/Invoice.java", "legacy/InvoiceHelper.java"]
+    assert loader.get_source_for_target("order/Order.java") == "legacy/OrderDao.java"
+    assert loader.get_related_targets("order/Order.java") == ["order/OrderRepository.java"]
+    assert loader.get_related_targets("invoice/Invoice.java") == []
+
+
+def test_missing_mapping_file_loads_empty(tmp_path):
+    loader = MappingLoaderAgent(str(tmp_path / "absent.json"))
+    assert loader.get_mapping() == [] and loader.get_all_targets() == []
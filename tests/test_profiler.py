@@ -0,0 +1,44 @@
+# tests/test_profiler.py
+
+import os
+import tracemalloc
+from utils.profiler import MEMORY_SAMPLES, StageProfiler
+from utils.telemetry import telemetry
+
+
+def test_tracemalloc_runs_only_inside_measured_spans(tmp_path):
+    assert not tracemalloc.is_tracing()
+    profiler = StageProfiler({"stitch"}, output_dir=str(tmp_path), interval_ms=1).start()
+    try:
+        assert not tracemalloc.is_tracing()
+        with telemetry.span("fix"):
+            assert not tracemalloc.is_tracing()  # not a selected stage
+        with telemetry.span("stitch"):
+            assert tracemalloc.is_tracing()
+            kept = [bytearray(1024) for _ in range(64)]
+        assert not tracemalloc.is_tracing()
+
+        for _ in range(MEMORY_SAMPLES):
+            with telemetry.span("stitch"):
+                pass
+        with telemetry.span("stitch"):
+            assert not tracemalloc.is_tracing()  # the stage used up its measured calls
+    finally:
+        written = profiler.stop()
+
+    assert not tracemalloc.is_tracing() and kept
+    assert os.path.join(str(tmp_path), "stitch.alloc.txt") in written
+    with open(os.path.join(str(tmp_path), "stitch.alloc.txt"), "r", encoding="utf-8") as f:
+        assert "test_profiler.py" in f.read()
+
+
+def test_tracing_started_elsewhere_is_left_running(tmp_path):
+    tracemalloc.start()
+    try:
+        profiler = StageProfiler({"stitch"}, output_dir=str(tmp_path)).start()
+        with telemetry.span("stitch"):
+            pass
+        profiler.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,101 @@
+# tests/test_rate_limiter.py
+
+import time
+import threading
+from types import SimpleNamespace
+from openai import APIStatusError
+from llm.rate_limiter import TokenBucket, AIMDController, RateLimitedLLMClient
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(0)
+    assert all(bucket.acquire(10_000) == 0.0 for _ in range(100))
+
+
+def test_bucket_waits_for_the_refill():
+    bucket = TokenBucket(600)  # 10 units per second, starts full
+    bucket.acquire(600)
+    waited = bucket.acquire(2)
+    assert 0.1 < waited < 1.0
+
+
+def test_oversized_request_still_gets_through():
+    bucket = TokenBucket(60, capacity=5)
+    assert bucket.acquire(50) < 0.1
+    assert bucket.tokens < 1
+
+
+def test_adjust_gives_back_and_charges_within_capacity():
+    bucket = TokenBucket(60)
+    bucket.acquire(60)
+    bucket.adjust(40)
+    assert 39 < bucket.tokens <= 41
+    bucket.adjust(-1_000)
+    assert bucket.tokens == -60
+
+
+def test_aimd_grows_additively_and_halves_once_per_burst():
+    controller = AIMDController(initial=4, maximum=8)
+    started = [controller.acquire() for _ in range(4)]
+    for marker in started:
+        controller.release(marker)
+    assert 4.8 < controller.limit < 5.0  # +1/limit per success
+
+    burst = [controller.acquire() for _ in range(3)]
+    for marker in burst:
+        controller.release(marker, succeeded=False, throttled=True)
+    assert 2.4 < controller.limit < 2.5  # one cut for the whole burst
+
+    controller.release(controller.acquire(), succeeded=False, throttled=True)
+    controller.release(controller.acquire(), succeeded=False, throttled=True)
+    assert controller.limit == 1  # never below the minimum
+    assert controller.in_flight == 0
+
+
+def test_aimd_blocks_at_the_limit():
+    controller = AIMDController(initial=1)
+    marker = controller.acquire()
+    entered = threading.Event()
+
+    def second():
+        controller.release(controller.acquire())
+        entered.set()
+
+    worker = threading.Thread(target=second)
+    worker.start()
+    assert not entered.wait(0.1)
+    controller.release(marker)
+    assert entered.wait(1.0)
+    worker.join()
+
+
+class Throttled(APIStatusError):
+    def __init__(self):
+        Exception.__init__(self, "429 Too Many Requests")
+        self.status_code = 429
+        self.response = None
+
+
+class FlakyClient:
+    def __init__(self, throttles):
+        self.throttles = throttles
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.throttles:
+            raise Throttled()
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=10), choices=[])
+
+
+def test_client_retries_throttles_and_cuts_concurrency():
+    client = RateLimitedLLMClient(FlakyClient(throttles=2), rpm=6000, tpm=600_000, base_delay=0.0)
+    start = time.monotonic()
+    client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+
+    metrics = client.metrics()
+    assert time.monotonic() - start < 1.0
+    assert metrics["retries"] == 2 and metrics["throttle_events"] == 2
+    assert metrics["requests"] == 1 and metrics["tokens"] == 10
+    assert metrics["concurrency_limit"] < 4
@@ -0,0 +1,75 @@
+# tests/test_retry_agent.py
+
+import json
+import threading
+from agents.fix_history_logger import FixHistoryLogger
+from agents.retry_agent import RetryAgent
+
+
+class BrokenBuildValidator:
+    """Every build fails with an error in each file it is told about."""
+
+    def __init__(self, project_dir, failing):
+        self.project_dir = project_dir
+        self.failing = failing
+        self.lock = threading.RLock()
+        self.builds = 0
+
+    def run_build(self):
+        self.builds += 1
+        return not self.failing
+
+    def get_last_build_log(self):
+        return "\n".join(f"{self.project_dir}/{t}:1: error: cannot find symbol" for t in self.failing)
+
+
+class AnsweringFixAgent:
+    """Always gets an answer from the LLM, which is all fix_file's success means."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.calls = 0
+
+    def fix_file(self, target, stitched_context, build_errors):
+        self.calls += 1
+        return {"success": True, "fixed_code": "class A {}"}
+
+
+class FakeStitcher:
+    def __init__(self, migrated_dir):
+        self.migrated_dir = migrated_dir
+
+    def stitch_context(self, target, reserved_tokens=0):
+        return ""
+
+
+def _retry(tmp_path, failing):
+    validator = BrokenBuildValidator(str(tmp_path), failing)
+    fix_agent = AnsweringFixAgent(str(tmp_path))
+    result = RetryAgent(max_retries=3).retry_fix("a/A.java", fix_agent, validator, FakeStitcher(str(tmp_path)),
+                                                 None, None, FixHistoryLogger(str(tmp_path / "history")))
+    return result, fix_agent, validator
+
+
+def test_final_attempt_is_validated_by_a_build(tmp_path):
+    result, fix_agent, validator = _retry(tmp_path, failing=["a/A.java"])
+
+    assert result["success"] is False
+    assert "cannot find symbol" in result["fix_log"]["build_errors"]
+    assert fix_agent.calls == 4 and validator.builds == 4
+
+
+def test_clean_build_succeeds_on_the_first_attempt(tmp_path):
+    result, fix_agent, validator = _retry(tmp_path, failing=[])
+    assert result["success"] is True
+    assert fix_agent.calls == 1 and validator.builds == 1
+
+
+def test_history_of_same_named_classes_does_not_collide(tmp_path):
+    logger = FixHistoryLogger(str(tmp_path))
+    for target in ("com/acme/order/Mapper.java", "com/acme/invoice/Mapper.java"):
+        logger.log(target, {"success": True})
+
+    for target in ("com/acme/order/Mapper.java", "com/acme/invoice/Mapper.java"):
+        with open(logger.history_path(target), "r", encoding="utf-8") as f:
+            assert json.load(f)["file"] == target
@@ -0,0 +1,75 @@
+# tests/test_run_journal.py
+
+import json
+import threading
+from utils.run_journal import DONE_STAGE, RunJournal
+
+
+def _journal(tmp_path, resume=False):
+    return RunJournal(str(tmp_path / "out"), path=str(tmp_path / "logs" / "journal.jsonl"), resume=resume)
+
+
+def _write_output(tmp_path, target, content):
+    path = tmp_path / "out" / target
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def test_resume_skips_finished_stages_and_counts_attempts(tmp_path):
+    _write_output(tmp_path, "a/A.java", "class A {}")
+    journal = _journal(tmp_path)
+    journal.record("a/A.java", "fix", ok=False)
+    journal.record("a/A.java", "fix")
+    journal.record("a/A.java", DONE_STAGE)
+    journal.record("a/B.java", "fix", ok=False)
+    assert not journal.finished("a/A.java", DONE_STAGE)  # only a resumed journal skips anything
+
+    resumed = _journal(tmp_path, resume=True)
+    assert resumed.finished("a/A.java", "fix") and resumed.finished("a/A.java", DONE_STAGE)
+    assert not resumed.finished("a/B.java", "fix")
+    assert resumed.pending(["a/A.java", "a/B.java", "a/C.java"]) == ["a/B.java", "a/C.java"]
+    assert resumed.record("a/B.java", "fix")["attempt"] == 2
+
+
+def test_fresh_journal_discards_previous_progress(tmp_path):
+    _journal(tmp_path).record("a/A.java", DONE_STAGE)
+    _journal(tmp_path)
+    assert _journal(tmp_path, resume=True).pending(["a/A.java"]) == ["a/A.java"]
+
+
+def test_changed_output_restarts_the_target(tmp_path):
+    _write_output(tmp_path, "a/A.java", "class A {}")
+    _journal(tmp_path).record("a/A.java", DONE_STAGE)
+    _write_output(tmp_path, "a/A.java", "class A { int edited; }")
+
+    resumed = _journal(tmp_path, resume=True)
+    assert resumed.pending(["a/A.java"]) == ["a/A.java"]
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = _journal(tmp_path)
+    journal.record("a/A.java", DONE_STAGE)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"target": "a/B.java", "stage": "do')
+
+    resumed = _journal(tmp_path, resume=True)
+    assert resumed.pending(["a/A.java", "a/B.java"]) == ["a/B.java"]
+
+
+def test_concurrent_writers_leave_one_whole_line_per_record(tmp_path):
+    journals = [_journal(tmp_path, resume=True) for _ in range(2)]  # two handles, as two processes would hold
+
+    def work(journal, worker):
+        for i in range(100):
+            journal.record(f"w{worker}/T{i}.java", DONE_STAGE)
+
+    threads = [threading.Thread(target=work, args=(journals[w % 2], w)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(journals[0].path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 400
+    assert len({r["target"] for r in records}) == 400
@@ -0,0 +1,52 @@
+# tests/test_streaming.py
+
+from llm.streaming import ClassNameValidator, LeadingCodeValidator, RepetitionValidator
+
+CHUNK_SIZES = (1, 3, 7, 64, 10_000)
+
+PREAMBLE_ANSWER = (
+    "Here's the updated class that compiles cleanly:\n"
+    "```java\n"
+    "package a;\n"
+    "\n"
+    "/* The class Legacy was renamed */\n"
+    "// class Helper is gone too\n"
+    "import java.util.List;\n"
+    "\n"
+    "public class OrderService {\n"
+    "    private List<String> orders;\n"
+    "}\n"
+    "```\n"
+)
+
+
+def _feed(validator, text, size):
+    for start in range(0, len(text), size):
+        reason = validator.feed(text[start:start + size])
+        if reason:
+            return reason
+    return None
+
+
+def test_preamble_fence_and_comments_do_not_count_as_declarations():
+    for size in CHUNK_SIZES:
+        assert _feed(ClassNameValidator("OrderService"), PREAMBLE_ANSWER, size) is None
+        assert _feed(LeadingCodeValidator(), PREAMBLE_ANSWER, size) is None
+
+
+def test_wrong_class_after_preamble_is_rejected():
+    answer = PREAMBLE_ANSWER.replace("public class OrderService", "public class InvoiceService")
+    for size in CHUNK_SIZES:
+        assert _feed(ClassNameValidator("OrderService"), answer, size) == \
+            "declares InvoiceService instead of OrderService"
+
+
+def test_prose_answer_is_rejected_by_the_leading_code_check():
+    answer = "Sure, I changed the class so that it compiles.\npublic class OrderService {}\n"
+    for size in CHUNK_SIZES:
+        assert _feed(LeadingCodeValidator(), answer, size).startswith("output does not start with Java code")
+
+
+def test_repeated_block_aborts():
+    answer = "package a;\n" + "    System.out.println(\"looping forever\");\n" * 10
+    assert _feed(RepetitionValidator(), answer, 5) == "block of 1 line(s) repeated 5 times"
@@ -0,0 +1,115 @@
+# tests/test_symbol_index.py
+
+import threading
+import utils.symbol_index as symbol_index
+from utils.symbol_index import SymbolIndex, extract_symbols, _extract_symbols_regex
+
+SERVICE = """package com.acme.order;
+
+import java.util.List;
+import com.acme.common.*;
+import static org.junit.Assert.assertTrue;
+
+@Service
+public class OrderService extends BaseService implements Auditable {
+    @Autowired
+    private OrderRepository repository;
+
+    public OrderService(Clock clock) {}
+
+    public List<Order> findAll(String customer, int limit) {
+        return Mapper.toOrders(repository.findAll());
+    }
+
+    static class Cache {}
+}
+"""
+
+
+def _write(root, rel_path, text):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_extract_symbols_reads_declarations_and_references():
+    record = extract_symbols(SERVICE)
+
+    assert record["parsed"] and record["package"] == "com.acme.order"
+    assert record["imports"] == ["java.util.List", "com.acme.common.*"]
+    service, cache = record["types"]
+    assert (service["qualified_name"], service["kind"]) == ("OrderService", "class")
+    assert service["annotations"] == ["Service"]
+    assert service["extends"] == ["BaseService"] and service["implements"] == ["Auditable"]
+    assert service["fields"] == [{"name": "repository", "type": "OrderRepository", "annotations": ["Autowired"],
+                                  "modifiers": ["private"]}]
+    assert service["methods"][0]["params"] == ["String", "int"]
+    assert service["constructors"] == [{"params": ["Clock"], "annotations": []}]
+    assert cache["qualified_name"] == "OrderService.Cache"
+    assert {"OrderRepository", "Order", "Clock", "Mapper"} <= set(record["referenced_types"])
+
+
+def test_unparsable_code_falls_back_to_regex():
+    broken = SERVICE.replace("return Mapper", "return = Mapper")
+    record = extract_symbols(broken)
+
+    assert record == _extract_symbols_regex(broken)
+    assert not record["parsed"] and record["package"] == "com.acme.order"
+    assert [t["name"] for t in record["types"]] == ["OrderService", "Cache"]
+    assert {"name": "repository", "type": "OrderRepository", "annotations": [], "modifiers": []} in record["types"][0]["fields"]
+    assert "OrderRepository" in record["referenced_types"]
+
+
+def test_rebuild_only_parses_changed_files(tmp_path, monkeypatch):
+    root = tmp_path / "src"
+    _write(root, "a/A.java", "package a;\npublic class A {}\n")
+    _write(root, "a/B.java", "package a;\npublic class B {}\n")
+    SymbolIndex(str(root), index_path=str(tmp_path / "index.json")).build(workers=1)
+
+    parsed = []
+    original = symbol_index._parse_file
+    monkeypatch.setattr(symbol_index, "_parse_file", lambda item: parsed.append(item[0]) or original(item))
+    _write(root, "a/B.java", "package a;\npublic class B { int changed; }\n")
+    (root / "a" / "A.java").unlink()
+    rebuilt = SymbolIndex(str(root), index_path=str(tmp_path / "index.json")).build(workers=1)
+
+    assert parsed == ["a/B.java"]
+    assert rebuilt.index == {"B": ["a.B"]}
+    assert rebuilt.file_symbols("a/B.java")["types"][0]["fields"][0]["name"] == "changed"
+
+
+def test_updates_are_saved_on_close(tmp_path):
+    root = tmp_path / "src"
+    _write(root, "a/A.java", "package a;\npublic class A {}\n")
+    index = SymbolIndex(str(root), index_path=str(tmp_path / "index.json")).build(workers=1)
+
+    _write(root, "a/C.java", "package a;\npublic class C {}\n")
+    index.update_file("a/C.java")
+    index.close()
+
+    assert SymbolIndex(str(root), index_path=str(tmp_path / "index.json")).resolve("C") == "a.C"
+
+
+def test_lookups_survive_concurrent_invalidation(tmp_path):
+    root = tmp_path / "src"
+    _write(root, "a/A.java", "package a;\npublic class A {}\n")
+    index = SymbolIndex(str(root), index_path=str(tmp_path / "index.json")).build(workers=1)
+    failures, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                index.resolve("A")
+                list(index.classes())
+            except Exception as e:
+                failures.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for _ in range(200):
+        index.update_file("a/A.java")
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert failures == []
@@ -0,0 +1,105 @@
+# tests/test_telemetry.py
+
+import os
+import json
+import pytest
+from types import SimpleNamespace
+import llm.instrumented_client as instrumented_client
+from llm.instrumented_client import InstrumentedLLMClient
+from utils.telemetry import Telemetry
+from utils.token_counter import count_tokens
+
+MESSAGES = [{"role": "user", "content": "Fix this class"}]
+
+
+class UsageClient:
+    """Answers with a fixed usage block, or streams two chunks."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        if kwargs.get("stream"):
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text), finish_reason=None)])
+                         for text in ("class A", " {}")])
+        return SimpleNamespace(cached=kwargs.get("model") == "cached", choices=[],
+                               usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=500))
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = Telemetry()
+    monkeypatch.setattr(instrumented_client, "telemetry", recorder)
+    monkeypatch.setenv("LLM_PROMPT_COST_PER_1K", "0.002")
+    monkeypatch.setenv("LLM_COMPLETION_COST_PER_1K", "0.01")
+    return recorder
+
+
+def test_counters_go_to_the_innermost_span():
+    recorder = Telemetry()
+    with recorder.bind_target("a/A.java"):
+        with recorder.span("fix"):
+            with recorder.span("stitch"):
+                recorder.count("references", 3)
+            assert recorder.current_stage() == "fix"
+            recorder.count("attempts")
+        with pytest.raises(RuntimeError):
+            with recorder.span("test"):
+                raise RuntimeError("boom")
+
+    assert [(stage, target, ok) for stage, target, _, _, ok in recorder.spans] == [
+        ("stitch", "a/A.java", True), ("fix", "a/A.java", True), ("test", "a/A.java", False)]
+    stages = recorder.summary()["stages"]
+    assert stages["stitch"]["counters"] == {"references": 3}
+    assert stages["fix"]["counters"] == {"attempts": 1}
+    assert stages["fix"]["total_seconds"] >= stages["stitch"]["total_seconds"]
+    assert stages["test"]["errors"] == 1
+    assert recorder.current_stage() is None
+
+
+def test_llm_tokens_and_cost_are_charged_to_the_calling_stage(recorder):
+    client = InstrumentedLLMClient(UsageClient())
+    with recorder.bind_target("a/A.java"), recorder.span("fix"):
+        client.chat.completions.create(model="gpt-4o", messages=MESSAGES)
+        client.chat.completions.create(model="cached", messages=MESSAGES)
+        list(client.chat.completions.create(model="gpt-4o", messages=MESSAGES, stream=True))
+
+    counters = recorder.summary()["stages"]["fix"]["counters"]
+    streamed_prompt, streamed_completion = count_tokens("Fix this class"), count_tokens("class A {}")
+    assert counters["llm_requests"] == 3
+    assert counters["llm_cache_hits"] == 1 and counters["llm_cache_misses"] == 2
+    assert counters["llm_prompt_tokens"] == 1000 + streamed_prompt
+    assert counters["llm_completion_tokens"] == 500 + streamed_completion
+    assert counters["llm_cost_usd"] == pytest.approx(
+        (1000 + streamed_prompt) * 0.002 / 1000 + (500 + streamed_completion) * 0.01 / 1000)
+    assert recorder.summary()["stages"]["llm"]["count"] == 3
+    assert recorder.summary()["targets"]["a/A.java"]["counters"]["llm_requests"] == 3
+
+
+def test_reports_are_written_as_jsonl_and_prometheus(tmp_path):
+    recorder = Telemetry()
+    with recorder.bind_target('a/"Quoted".java'), recorder.span("fix"):
+        recorder.count("llm_prompt_tokens", 42)
+
+    jsonl_path, prom_path = recorder.write_report(str(tmp_path))
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["type"] for r in records] == ["span", "counter", "stage", "target"]
+    assert records[0]["target"] == 'a/"Quoted".java' and records[0]["ok"] is True
+    assert records[2]["counters"] == {"llm_prompt_tokens": 42}
+
+    with open(prom_path, "r", encoding="utf-8") as f:
+        prometheus = f.read().splitlines()
+    assert 'migration_stage_duration_seconds_count{stage="fix"} 1' in prometheus
+    assert 'migration_stage_errors_total{stage="fix"} 0' in prometheus
+    assert "# TYPE migration_llm_prompt_tokens_total counter" in prometheus
+    assert 'migration_llm_prompt_tokens_total{stage="fix"} 42' in prometheus
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(["metrics.prom", os.path.basename(jsonl_path)])
+
+
+def test_disabled_telemetry_records_nothing(tmp_path):
+    recorder = Telemetry(enabled=False)
+    with recorder.span("fix"):
+        recorder.count("llm_requests")
+    assert recorder.spans == [] and recorder.counters == {}
+    assert recorder.write_report(str(tmp_path)) is None
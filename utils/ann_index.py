@@ -0,0 +1,153 @@
+# utils/ann_index.py
+
+import os
+import json
+import shutil
+import numpy as np
+
+EXACT_SEARCH_THRESHOLD = 2048   # below this many vectors a single list (exact search) is fastest
+ASSIGN_BLOCK_SIZE = 65536
+DEFAULT_N_PROBE = 16
+
+
+def default_list_count(n_vectors):
+    if n_vectors < EXACT_SEARCH_THRESHOLD:
+        return 1
+    return int(min(65536, max(1, 4 * np.sqrt(n_vectors))))
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over unit-normalized vectors (cosine = dot product).
+    Vectors are clustered with spherical k-means; a query only scores the `n_probe` lists whose
+    centroids are closest to it. The index stores row ids only: vectors are read from the matrix it
+    was built over (the chunk EmbeddingStore, memory-mapped), so nothing is kept twice on disk.
+    """
+
+    def __init__(self, centroids, offsets, ids, vectors=None):
+        self.centroids = centroids   # (L, D) float32
+        self.offsets = offsets       # (L + 1,) int64, list l spans ids[offsets[l]:offsets[l + 1]]
+        self.ids = ids               # (N,) int64, matrix rows grouped by list (ascending within a list)
+        self.vectors = vectors       # (N, D) float32 matrix the ids index into; None if only loaded for its centroids
+
+    def __len__(self):
+        return int(self.ids.shape[0])
+
+    @staticmethod
+    def train_centroids(vectors, n_lists, iterations=10, sample_size=None, seed=0):
+        rng = np.random.default_rng(seed)
+        n = vectors.shape[0]
+        sample_size = min(n, sample_size or max(n_lists * 64, 10000))
+        sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = IVFIndex._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty lists with random sample points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        return centroids
+
+    @staticmethod
+    def _assign(vectors, centroids):
+        assignment = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], ASSIGN_BLOCK_SIZE):
+            block = np.asarray(vectors[start:start + ASSIGN_BLOCK_SIZE], dtype=np.float32)
+            assignment[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+        return assignment
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, centroids=None, iterations=10):
+        """
+        Builds the index. Pass previously trained `centroids` to skip k-means and only re-assign vectors.
+        """
+        n = vectors.shape[0]
+        if centroids is None:
+            n_lists = min(n_lists or default_list_count(n), n)
+            if n_lists <= 1:
+                centroids = np.zeros((1, vectors.shape[1]), dtype=np.float32)
+            else:
+                centroids = cls.train_centroids(vectors, n_lists, iterations=iterations)
+
+        assignment = cls._assign(vectors, centroids) if centroids.shape[0] > 1 else np.zeros(n, dtype=np.int64)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=centroids.shape[0])
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids.astype(np.float32), offsets, order.astype(np.int64), vectors)
+
+    def search(self, query, top_k=10, n_probe=DEFAULT_N_PROBE):
+        """
+        :return: (ids, scores) of the top_k most similar stored vectors, best first.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        n_lists = self.centroids.shape[0]
+        if n_lists == 1:
+            probe = [0]
+        else:
+            n_probe = min(n_probe, n_lists)
+            centroid_scores = self.centroids @ query
+            probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        candidate_ids, candidate_scores = [], []
+        for lst in probe:
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if end > start:
+                rows = np.asarray(self.ids[start:end])
+                candidate_scores.append(np.asarray(self.vectors[rows], dtype=np.float32) @ query)
+                candidate_ids.append(rows)
+
+        if not candidate_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        ids = np.concatenate(candidate_ids)
+        scores = np.concatenate(candidate_scores)
+        k = min(top_k, scores.shape[0])
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return ids[best], scores[best]
+
+    def save(self, directory):
+        """Writes the index atomically: into a temp directory first, which is then renamed into place."""
+        tmp_dir, old_dir = directory + ".tmp", directory + ".old"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "centroids.npy"), self.centroids)
+        np.save(os.path.join(tmp_dir, "offsets.npy"), self.offsets)
+        np.save(os.path.join(tmp_dir, "ids.npy"), self.ids)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"lists": int(self.centroids.shape[0]), "size": len(self)}, f)
+
+        if os.path.exists(directory):
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, vectors=None, mmap=True):
+        """
+        :param vectors: The (N, D) matrix the index was built over, e.g. the chunk store's memmap.
+                        Without it the index can be inspected (centroids, size) but not searched.
+        """
+        mode = "r" if mmap else None
+        index = cls(
+            np.load(os.path.join(directory, "centroids.npy")),
+            np.load(os.path.join(directory, "offsets.npy")),
+            np.load(os.path.join(directory, "ids.npy"), mmap_mode=mode),
+            vectors,
+        )
+        if vectors is not None and vectors.shape[0] != len(index):
+            raise ValueError(f"ANN index {directory} covers {len(index)} rows but the matrix has {vectors.shape[0]}")
+        return index
+
+    @staticmethod
+    def exists(directory):
+        return os.path.exists(os.path.join(directory, "meta.json"))
@@ -0,0 +1,97 @@
+# utils/build_log_filter.py
+
+import os
+import re
+
+# javac / Gradle compileJava format: /path/to/Foo.java:12: error: cannot find symbol
+DIAGNOSTIC_PATTERN = re.compile(r"^(?P<file>.+?\.java):(?P<line>\d+): (?P<kind>error|warning): (?P<message>.*)$")
+SUMMARY_PATTERN = re.compile(r"^\d+ (errors?|warnings?)$|^Note: ")
+CARET_PATTERN = re.compile(r"^(?P<indent>\s*)\^\s*$")
+SOURCE_ROOT = "src/main/java/"
+
+
+class BuildLogFilter:
+    @staticmethod
+    def filter_log_for_file(build_log, target_path, context_lines=3):
+        """
+        Extracts the compiler output that belongs to a single target file.
+        :param build_log: Full Gradle/javac output.
+        :param target_path: Target path relative to the project (e.g. src/main/java/.../Foo.java).
+        :param context_lines: Lines kept after each matching diagnostic (source excerpt + caret).
+        :return: The matching lines joined by newlines, or "" if the file has no errors.
+        """
+        if not build_log:
+            return ""
+
+        normalized = target_path.replace("\\", "/")
+        # Match on the package path, not the bare file name: same-named classes in other packages
+        # (built by parallel workers) must not lend each other their errors
+        relative = normalized.split(SOURCE_ROOT, 1)[-1].lstrip("/")
+        lines = build_log.splitlines()
+        selected = []
+        remaining = 0
+
+        for line in lines:
+            candidate = line.replace("\\", "/")
+            if f"/{relative}:" in candidate or candidate.startswith(f"{relative}:"):
+                selected.append(line)
+                remaining = context_lines
+            elif remaining > 0:
+                selected.append(line)
+                remaining -= 1
+
+        return "\n".join(selected)
+
+    @staticmethod
+    def parse_diagnostics(build_log):
+        """
+        Parses javac-style diagnostics into structured records.
+        :return: List of dicts with file, line, column (from the caret line, or None),
+                 kind ("error"/"warning"), message and the raw text block of the diagnostic.
+        """
+        diagnostics = []
+        current = None
+
+        for line in (build_log or "").splitlines():
+            match = DIAGNOSTIC_PATTERN.match(line)
+            if match:
+                current = {
+                    "file": match.group("file"),
+                    "line": int(match.group("line")),
+                    "column": None,
+                    "kind": match.group("kind"),
+                    "message": match.group("message").strip(),
+                    "text": [line]
+                }
+                diagnostics.append(current)
+                continue
+
+            if current is None or SUMMARY_PATTERN.match(line.strip()):
+                current = None
+                continue
+
+            current["text"].append(line)
+            caret = CARET_PATTERN.match(line)
+            if caret and current["column"] is None:
+                current["column"] = len(caret.group("indent")) + 1
+
+        for diagnostic in diagnostics:
+            diagnostic["text"] = "\n".join(diagnostic["text"])
+        return diagnostics
+
+    @staticmethod
+    def group_by_file(diagnostics, base_dir=None):
+        """
+        Groups parsed diagnostics per file. With base_dir, keys are made relative to it
+        (files outside base_dir keep their path as reported).
+        """
+        grouped = {}
+        root = os.path.abspath(base_dir) if base_dir else None
+        for diagnostic in diagnostics:
+            path = diagnostic["file"]
+            if root:
+                absolute = os.path.abspath(path)
+                if absolute.startswith(root + os.sep):
+                    path = os.path.relpath(absolute, root)
+            grouped.setdefault(path, []).append(diagnostic)
+        return grouped
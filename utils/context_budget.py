@@ -0,0 +1,76 @@
+# utils/context_budget.py
+
+from utils.token_counter import count_tokens, truncate_to_tokens, DEFAULT_MODEL
+
+MIN_PART_TOKENS = 200  # a part cut below this is dropped instead of truncated
+TRUNCATION_MARKER = "\n// ... truncated to fit the context budget ...\n"
+
+
+def context_part(label, path, text, priority, score=0.0, mode="full", original_tokens=None, compact=None):
+    """
+    One candidate piece of prompt context.
+    :param priority: lower is more important (0 = target and its legacy source)
+    :param score: relevance within the same priority, higher first
+    :param mode: "full" or "skeleton" (bodies elided); original_tokens is the full size of a skeleton part
+    :param compact: optional callable returning a skeleton of text, tried before truncating a full part
+    """
+    return {"label": label, "path": path, "text": text, "priority": priority, "score": score,
+            "mode": mode, "original_tokens": original_tokens, "compact": compact}
+
+
+def fill_budget(parts, budget, model=DEFAULT_MODEL):
+    """
+    Fills a token budget with the best-ranked parts. Parts are taken by (priority, score); a part
+    that no longer fits is first replaced by its skeleton (if it has one), then truncated if enough
+    room is left, otherwise dropped. Included parts keep their original order in the output.
+    :return: (list of included texts, manifest dict with what was included and dropped)
+    """
+    ranked = sorted(range(len(parts)), key=lambda i: (parts[i]["priority"], -parts[i]["score"], i))
+    remaining = budget
+    chosen = {}
+    manifest = {"budget": budget, "used": 0, "included": [], "dropped": []}
+    marker_tokens = count_tokens(TRUNCATION_MARKER, model)
+
+    for i in ranked:
+        part = parts[i]
+        text, mode = part["text"], part.get("mode", "full")
+        tokens = count_tokens(text, model)
+        original_tokens = part.get("original_tokens") or tokens
+        entry = {"label": part["label"], "path": part["path"], "priority": part["priority"]}
+
+        if tokens > remaining and mode == "full" and part.get("compact"):
+            skeleton = part["compact"]()
+            if skeleton:
+                text, mode, tokens = skeleton, "skeleton", count_tokens(skeleton, model)
+
+        if tokens <= remaining:
+            chosen[i] = text
+            manifest["included"].append({**entry, "mode": mode, "tokens": tokens, "original_tokens": original_tokens})
+            remaining -= tokens
+        elif remaining - marker_tokens >= MIN_PART_TOKENS:
+            text = truncate_to_tokens(text, remaining - marker_tokens, model) + TRUNCATION_MARKER
+            used = count_tokens(text, model)
+            chosen[i] = text
+            manifest["included"].append({**entry, "mode": f"{mode}+truncated", "tokens": used,
+                                         "original_tokens": original_tokens})
+            remaining = max(0, remaining - used)
+        else:
+            manifest["dropped"].append({**entry, "mode": mode, "tokens": tokens, "reason": "over budget"})
+
+    manifest["used"] = budget - remaining
+    manifest["compression"] = compression_stats(manifest["included"])
+    return [chosen[i] for i in sorted(chosen)], manifest
+
+
+def compression_stats(included):
+    """Token savings of the skeleton parts among the included manifest entries."""
+    skeletons = [p for p in included if p["mode"].startswith("skeleton")]
+    original = sum(p["original_tokens"] for p in skeletons)
+    compressed = sum(p["tokens"] for p in skeletons)
+    return {
+        "skeleton_parts": len(skeletons),
+        "original_tokens": original,
+        "skeleton_tokens": compressed,
+        "saved_tokens": original - compressed,
+        "ratio": round(compressed / original, 3) if original else 1.0,
+    }
@@ -0,0 +1,315 @@
+# utils/dependency_graph.py
+
+import os
+from collections import deque
+
+INJECTION_ANNOTATIONS = {"Autowired", "Inject", "Resource"}
+
+
+def strongly_connected_components(nodes, successors):
+    """
+    Iterative Tarjan: every strongly connected component of the graph, in reverse topological
+    order (a component is listed before any component that depends on it). Linear in nodes + edges
+    and free of Python's recursion limit.
+    :param nodes: iterable of node ids
+    :param successors: callable node -> iterable of neighbour ids (neighbours outside `nodes` are ignored)
+    :return: list of components, each a list of node ids
+    """
+    nodes = list(nodes)
+    members = set(nodes)
+    index_of = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        index_of[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+
+        while work:
+            node, neighbours = work[-1]
+            advanced = False
+            for nxt in neighbours:
+                if nxt not in members:
+                    continue
+                if nxt not in index_of:
+                    index_of[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(successors(nxt))))
+                    advanced = True
+                    break
+                if nxt in on_stack and index_of[nxt] < low[node]:
+                    low[node] = index_of[nxt]
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def topological_levels(nodes, successors):
+    """
+    Groups the condensation of the graph into dependency levels: level 0 holds the components
+    depending on nothing (inside `nodes`), level n those whose deepest dependency is on level n - 1.
+    Cycles are collapsed first, so every member of a strongly connected component shares a level.
+    :return: list of levels, each a list of components (lists of node ids)
+    """
+    components = strongly_connected_components(nodes, successors)
+    component_of = {node: i for i, component in enumerate(components) for node in component}
+    levels, level_of = [], {}
+    # Tarjan lists a component after everything it depends on, so one pass settles every level
+    for i, component in enumerate(components):
+        deps = {component_of[nxt] for node in component for nxt in successors(node) if nxt in component_of}
+        deps.discard(i)
+        level = 1 + max((level_of[d] for d in deps), default=-1)
+        level_of[i] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(component)
+    return levels
+
+
+def shortest_cycle(start, successors, within=None):
+    """
+    Shortest cycle through `start` (BFS), optionally restricted to the node set `within`.
+    :return: [start, ..., start], or None if start is not on a cycle.
+    """
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for nxt in successors(node):
+            if within is not None and nxt not in within:
+                continue
+            if nxt == start:
+                path = [node]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])
+                return path[::-1] + [start]
+            if nxt not in parent:
+                parent[nxt] = node
+                queue.append(nxt)
+    return None
+
+
+def reachable(start, successors):
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for nxt in successors(queue.popleft()):
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+    return seen
+
+
+def injected_types(declared):
+    """Type names a class depends on through instance fields, constructor parameters and injected setters."""
+    names = [f["type"] for f in declared.get("fields", []) if "static" not in f.get("modifiers", [])]
+    for ctor in declared.get("constructors", []):
+        names.extend(ctor.get("params", []))
+    for method in declared.get("methods", []):
+        if INJECTION_ANNOTATIONS.intersection(method.get("annotations", [])):
+            names.extend(method.get("params", []))
+    return [n for n in names if n and n.split(".")[-1][:1].isupper()]
+
+
+class ClassDependencyGraph:
+    """
+    FQCN -> FQCN injection graph over a SymbolIndex. Type names are resolved the way javac would
+    see them: types declared in the same file, explicit imports, the same package, then wildcard
+    imports; anything that resolves outside the indexed project (JDK, libraries) is dropped.
+    Components are kept up to date incrementally by recheck(rel_path) after a single file changes.
+    With references=True every type a file mentions counts as a dependency, not only injected ones
+    (what compile order cares about, as opposed to bean wiring).
+    """
+
+    def __init__(self, symbol_index, references=False):
+        self.symbol_index = symbol_index
+        self.references = references
+        self.edges = {}
+        self.reverse = {}
+        self.file_classes = {}
+        self.file_names = {}
+        self.referenced_by = {}  # simple type name -> files mentioning it, for re-resolution on add/remove
+        self.component_of = {}
+        self.components = {}
+        self._next_component = 0
+
+    # ---- resolution --------------------------------------------------------------------
+
+    def _resolve(self, name, record, local_types, known):
+        if name in local_types:
+            return local_types[name]
+        if name in known:
+            return name
+        head, _, rest = name.partition(".")
+        package = record.get("package", "")
+        for imp in record.get("imports", []):
+            if not imp.endswith(".*") and imp.rsplit(".", 1)[-1] == head:
+                candidate = imp + ("." + rest if rest else "")
+                return candidate if candidate in known else None
+        candidate = f"{package}.{name}" if package else name
+        if candidate in known:
+            return candidate
+        for imp in record.get("imports", []):
+            if imp.endswith(".*"):
+                candidate = f"{imp[:-2]}.{name}"
+                if candidate in known:
+                    return candidate
+        return None
+
+    def _file_edges(self, rel_path, known):
+        record = self.symbol_index.file_symbols(rel_path) or {}
+        package = record.get("package", "")
+        declared = {}
+        for type_record in record.get("types", []):
+            fqcn = f"{package}.{type_record['qualified_name']}" if package else type_record["qualified_name"]
+            declared[fqcn] = type_record
+        local_types = {t["name"]: fqcn for fqcn, t in declared.items()}
+        local_types.update({t["qualified_name"]: fqcn for fqcn, t in declared.items()})
+
+        edges, names = {}, set()
+        for fqcn, type_record in declared.items():
+            targets = set()
+            type_names = injected_types(type_record)
+            if self.references:
+                type_names = type_names + record.get("referenced_types", [])
+            for name in type_names:
+                names.add(name.split(".")[-1])
+                resolved = self._resolve(name, record, local_types, known)
+                if resolved is not None:
+                    targets.add(resolved)
+            edges[fqcn] = targets
+        return edges, names
+
+    # ---- graph maintenance -------------------------------------------------------------
+
+    def _set_file(self, rel_path, known):
+        for fqcn in self.file_classes.pop(rel_path, ()):
+            for target in self.edges.pop(fqcn, ()):
+                self.reverse.get(target, set()).discard(fqcn)
+        for name in self.file_names.pop(rel_path, ()):
+            self.referenced_by.get(name, set()).discard(rel_path)
+
+        edges, names = self._file_edges(rel_path, known)
+        self.file_classes[rel_path] = set(edges)
+        for fqcn, targets in edges.items():
+            self.edges[fqcn] = targets
+            self.reverse.setdefault(fqcn, set())
+            for target in targets:
+                self.reverse.setdefault(target, set()).add(fqcn)
+        self.file_names[rel_path] = names
+        for name in names:
+            self.referenced_by.setdefault(name, set()).add(rel_path)
+
+    def _successors(self, node):
+        return self.edges.get(node, ())
+
+    def _predecessors(self, node):
+        return self.reverse.get(node, ())
+
+    def _store_components(self, components):
+        for component in components:
+            cid = self._next_component
+            self._next_component += 1
+            self.components[cid] = component
+            for node in component:
+                self.component_of[node] = cid
+
+    def build(self):
+        """(Re)builds the whole graph and its strongly connected components."""
+        self.edges, self.reverse, self.file_classes, self.file_names, self.referenced_by = {}, {}, {}, {}, {}
+        self.component_of, self.components = {}, {}
+        known = {fqcn for fqcn, _, _ in self.symbol_index.classes()}
+        for rel_path in list(self.symbol_index.files):
+            self._set_file(rel_path, known)
+        self._store_components(strongly_connected_components(sorted(self.edges), self._successors))
+        return self
+
+    def recheck(self, rel_path):
+        """
+        Refreshes the graph after one file changed (already re-indexed in the symbol index) and
+        recomputes only the components that change can touch: the old components of the affected
+        classes plus everything now both reachable from and reaching them.
+        :return: Cycles among the affected components.
+        """
+        rel_path = rel_path.replace(os.sep, "/")
+        known = {fqcn for fqcn, _, _ in self.symbol_index.classes()}
+        before = set(self.file_classes.get(rel_path, ()))
+
+        self._set_file(rel_path, known)
+        after = self.file_classes.get(rel_path, set())
+        changed = before | after
+
+        # Added or removed classes can change how other files' type names resolve
+        dirty_files = set()
+        for fqcn in before ^ after:
+            dirty_files |= self.referenced_by.get(fqcn.rsplit(".", 1)[-1], set())
+        for other in dirty_files - {rel_path}:
+            changed |= self.file_classes.get(other, set())
+            self._set_file(other, known)
+            changed |= self.file_classes.get(other, set())
+
+        affected = set()
+        for node in changed:
+            cid = self.component_of.get(node)
+            if cid is not None:
+                affected.update(self.components.get(cid, ()))
+            if node in self.edges:
+                affected |= reachable(node, self._successors) & reachable(node, self._predecessors)
+        # Old components merged into a new cycle are wholly inside `affected`; drop them all
+        for node in affected:
+            cid = self.component_of.pop(node, None)
+            if cid is not None:
+                self.components.pop(cid, None)
+        live = sorted(n for n in affected if n in self.edges)
+
+        new_components = strongly_connected_components(live, self._successors)
+        self._store_components(new_components)
+        return self._cycles(new_components)
+
+    # ---- reporting ---------------------------------------------------------------------
+
+    def _is_cyclic(self, component):
+        return len(component) > 1 or component[0] in self.edges.get(component[0], ())
+
+    def _cycles(self, components):
+        cycles = []
+        for component in components:
+            if not self._is_cyclic(component):
+                continue
+            members = set(component)
+            start = min(component)
+            cycles.append({
+                "classes": sorted(component),
+                "cycle": shortest_cycle(start, self._successors, within=members),
+            })
+        cycles.sort(key=lambda c: c["classes"])
+        return cycles
+
+    def cycles(self):
+        """Every cyclic strongly connected component with a shortest witness cycle through its first class."""
+        return self._cycles(self.components.values())
@@ -0,0 +1,85 @@
+# utils/embedding_store.py
+
+import os
+import json
+import numpy as np
+
+MATRIX_SUFFIX = ".npy"
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def normalize_rows(matrix):
+    """Returns a float32 copy of matrix with every row scaled to unit L2 norm (zero rows stay zero)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+class EmbeddingStore:
+    """
+    Binary embedding index: a pre-normalized float32 matrix in `<base>.npy` (memory-mapped on load)
+    plus a small JSON manifest `<base>.manifest.json` listing the file path of each row.
+    """
+
+    def __init__(self, base_path):
+        # Accept either the legacy JSON index path or a bare base path
+        self.base_path = base_path[:-5] if base_path.endswith(".json") else base_path
+        self.matrix_path = self.base_path + MATRIX_SUFFIX
+        self.manifest_path = self.base_path + MANIFEST_SUFFIX
+
+    def exists(self):
+        return os.path.exists(self.matrix_path) and os.path.exists(self.manifest_path)
+
+    def is_stale(self, source_path):
+        """True if source_path (e.g. a legacy JSON index) is newer than the binary store."""
+        if not self.exists():
+            return True
+        return os.path.getmtime(source_path) > os.path.getmtime(self.manifest_path)
+
+    def load(self, mmap=True):
+        """
+        :return: (matrix, manifest) where matrix is an (N, D) float32 array (read-only memmap if mmap=True).
+        """
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        matrix = np.load(self.matrix_path, mmap_mode="r" if mmap else None)
+        if matrix.shape[0] != len(manifest.get("entries", [])):
+            raise ValueError(f"Embedding store is inconsistent: {matrix.shape[0]} rows vs "
+                             f"{len(manifest.get('entries', []))} manifest entries")
+        return matrix, manifest
+
+    def save(self, matrix, entries, **metadata):
+        """Writes matrix + manifest atomically (temp files, then rename)."""
+        os.makedirs(os.path.dirname(self.matrix_path) or ".", exist_ok=True)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+        tmp_matrix = self.matrix_path + ".tmp.npy"
+        np.save(tmp_matrix, matrix)
+        manifest = {"dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0, **metadata, "entries": entries}
+        tmp_manifest = self.manifest_path + ".tmp"
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_manifest, self.manifest_path)
+
+    def convert_from_json(self, json_path):
+        """Converts a legacy `{path: {"embedding": [...]}}` JSON index into the binary format."""
+        with open(json_path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+
+        paths, vectors = [], []
+        for file_path, data in legacy.items():
+            embedding = data.get("embedding")
+            if embedding:
+                paths.append(file_path)
+                vectors.append(embedding)
+
+        if not vectors:
+            return False
+
+        self.save(normalize_rows(vectors), [{"path": p} for p in paths])
+        return True
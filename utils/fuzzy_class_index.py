@@ -0,0 +1,177 @@
+# utils/fuzzy_class_index.py
+
+import difflib
+import threading
+
+GRAM_SIZE = 3
+CANDIDATE_DICE = 0.5  # trigram overlap needed before a name is scored with SequenceMatcher
+CANDIDATE_POOL = 64  # names gathered from the rarest grams before scoring
+CANDIDATE_LIMIT = 32
+
+
+def _grams(name):
+    padded = f"  {name.lower()} "
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def _popcount(value):
+    return value.bit_count() if hasattr(value, "bit_count") else bin(value).count("1")
+
+
+def package_proximity(package, fqcn):
+    """Share of leading package segments fqcn has in common with `package` (1.0 = same package)."""
+    theirs = fqcn.rsplit(".", 1)[0].split(".") if "." in fqcn else []
+    ours = package.split(".") if package else []
+    if not ours and not theirs:
+        return 1.0
+    common = 0
+    for a, b in zip(ours, theirs):
+        if a != b:
+            break
+        common += 1
+    return common / max(len(ours), len(theirs))
+
+
+class FuzzyClassIndex:
+    """
+    Trigram inverted lists over the simple class names of a SymbolIndex. Lookups only score the
+    names sharing enough trigrams with the query (rarest grams first), so they do not scale with
+    the number of classes. The index follows the symbol index incrementally: only names that
+    appeared or disappeared since the last lookup are added to or removed from the postings.
+    """
+
+    def __init__(self, symbol_index):
+        self.symbol_index = symbol_index
+        self.postings = {}  # gram -> set of names
+        self.grams = {}  # name -> set of grams
+        self.masks = {}  # name -> int bitmask of its grams, so overlaps are one AND + popcount
+        self.gram_bits = {}  # gram -> bit position (never reused)
+        self.fqcns = {}  # name -> [fqcn]
+        self._version = None
+        self._lock = threading.RLock()
+
+    def _mask(self, grams, assign=False):
+        mask = 0
+        for gram in grams:
+            bit = self.gram_bits.get(gram)
+            if bit is None:
+                if not assign:
+                    continue  # a gram no indexed name has can't add to an overlap
+                bit = self.gram_bits[gram] = len(self.gram_bits)
+            mask |= 1 << bit
+        return mask
+
+    def _add(self, name):
+        grams = _grams(name)
+        self.grams[name] = grams
+        self.masks[name] = self._mask(grams, assign=True)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(name)
+
+    def _remove(self, name):
+        self.masks.pop(name, None)
+        for gram in self.grams.pop(name, ()):
+            names = self.postings.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.postings[gram]
+
+    def sync(self):
+        with self._lock:
+            version = self.symbol_index.version
+            if self._version == version:
+                return
+            current = self.symbol_index.index
+            for name in [n for n in self.grams if n not in current]:
+                self._remove(name)
+            for name in current:
+                if name not in self.grams:
+                    self._add(name)
+            self.fqcns = current
+            self._version = version
+
+    def _candidates(self, query_grams, length, cutoff):
+        needed = max(1, int(CANDIDATE_DICE * len(query_grams) / (2 - CANDIDATE_DICE)))
+        lists = sorted((self.postings.get(g, ()) for g in query_grams), key=len)
+        # A name sharing `needed` grams must appear in at least one of the rarest len - needed + 1 lists
+        # Common grams (e.g. from a shared "Service" suffix) come last and are skipped once the pool is full
+        candidates = set()
+        for names in lists[:len(lists) - needed + 1]:
+            if len(candidates) >= CANDIDATE_POOL:
+                break
+            candidates.update(names)
+
+        # SequenceMatcher.ratio() is at most 2 * shorter / (both lengths), so names too much shorter
+        # or longer than the query can never reach the cutoff
+        shortest = length * cutoff / (2 - cutoff)
+        longest = length * (2 - cutoff) / cutoff if cutoff else float("inf")
+        query_size = len(query_grams)
+        query_mask = self._mask(query_grams)
+        scored = []
+        for name in candidates:
+            if not shortest <= len(name) <= longest:
+                continue
+            dice = 2 * _popcount(query_mask & self.masks[name]) / (query_size + len(self.grams[name]))
+            if dice >= CANDIDATE_DICE:
+                scored.append((dice, name))
+        scored.sort(reverse=True)
+        return [name for _, name in scored[:CANDIDATE_LIMIT]]
+
+    def search(self, name, package="", top_k=5, cutoff=0.7):
+        """
+        Best matching classes for a (possibly misspelt) simple class name.
+        :param package: package of the referencing file; same-named classes closer to it rank first
+        :return: list of {"name", "fqcn", "score", "proximity"}, best first
+        """
+        self.sync()
+        with self._lock:
+            if name in self.grams:
+                names = [name]
+            else:
+                names = self._candidates(_grams(name), len(name), cutoff)
+            fqcns = self.fqcns
+
+        matcher = difflib.SequenceMatcher(b=name)
+        bounded = []
+        for candidate in names:
+            matcher.set_seq1(candidate)
+            bound = matcher.quick_ratio()
+            if bound >= cutoff:
+                bounded.append((bound, candidate))
+        # quick_ratio() bounds ratio() from above: once it drops below the k-th best score found,
+        # no remaining candidate can enter the top k, so the expensive ratio() calls stop there
+        bounded.sort(key=lambda item: -item[0])
+        results = []
+        scores = []
+        for bound, candidate in bounded:
+            if len(scores) >= top_k and bound < scores[top_k - 1]:
+                break
+            matcher.set_seq1(candidate)
+            score = matcher.ratio()
+            if score < cutoff:
+                continue
+            scores.append(score)
+            scores.sort(reverse=True)
+            for fqcn in fqcns.get(candidate, []):
+                results.append({"name": candidate, "fqcn": fqcn, "score": score,
+                                "proximity": package_proximity(package, fqcn)})
+        results.sort(key=lambda r: (-r["score"], -r["proximity"], r["fqcn"]))
+        return results[:top_k]
+
+    def best(self, name, package="", cutoff=0.7):
+        found = self.search(name, package=package, top_k=1, cutoff=cutoff)
+        return found[0] if found else None
+
+
+_INDEXES = {}
+_INDEXES_GUARD = threading.Lock()
+
+
+def get_fuzzy_class_index(symbol_index):
+    """Returns the shared FuzzyClassIndex for a SymbolIndex (built once per run, then kept in sync)."""
+    with _INDEXES_GUARD:
+        key = id(symbol_index)
+        if key not in _INDEXES or _INDEXES[key].symbol_index is not symbol_index:
+            _INDEXES[key] = FuzzyClassIndex(symbol_index)
+        return _INDEXES[key]
@@ -0,0 +1,65 @@
+# utils/java_chunker.py
+
+from utils.java_source import JavaSource
+
+# Keep chunks within what MiniLM-sized embedding models actually read
+MAX_CHUNK_CHARS = 4000
+
+
+def chunk_java_source(code, max_chars=MAX_CHUNK_CHARS):
+    """
+    Splits a Java file into class-level and method-level chunks.
+    The class chunk holds the type header, annotations and fields (everything before the first member);
+    every method and constructor becomes its own chunk.
+    Falls back to a single whole-file chunk when the code does not parse.
+    :return: list of dicts with kind, name, class_name, start_line, end_line and text.
+    """
+    try:
+        source = JavaSource(code)
+    except Exception:
+        return [_chunk("file", None, None, 1, code.count("\n") + 1, code, max_chars)]
+
+    declarations = source.declarations()
+    chunks = []
+    for i, decl in enumerate(declarations):
+        if decl["kind"] == "class":
+            # The class chunk stops where its first member (method, constructor or nested type) starts
+            following = declarations[i + 1] if i + 1 < len(declarations) else None
+            header_end = following["start"] if following and following["start"] < decl["end"] else decl["end"]
+            text = code[decl["start"]:header_end].rstrip()
+        else:
+            text = code[decl["start"]:decl["end"]]
+        end_offset = decl["start"] + len(text)
+
+        chunks.append(_chunk(
+            decl["kind"],
+            decl["name"],
+            decl["class_name"],
+            source.line_of(decl["start"]),
+            source.line_of(max(decl["start"], end_offset - 1)),
+            text,
+            max_chars
+        ))
+
+    if not chunks:
+        return [_chunk("file", None, None, 1, code.count("\n") + 1, code, max_chars)]
+    return chunks
+
+
+def embedding_text(chunk):
+    """Text actually embedded for a chunk: a `Class.member` header followed by the (truncated) code."""
+    label = chunk["class_name"] or ""
+    if chunk["kind"] in ("method", "constructor"):
+        label = f"{label}.{chunk['name']}"
+    return f"// {chunk['kind']} {label}\n{chunk['text']}"
+
+
+def _chunk(kind, name, class_name, start_line, end_line, text, max_chars):
+    return {
+        "kind": kind,
+        "name": name,
+        "class_name": class_name,
+        "start_line": start_line,
+        "end_line": end_line,
+        "text": text[:max_chars],
+    }
@@ -0,0 +1,54 @@
+# utils/java_skeleton.py
+
+import re
+from utils.java_source import JavaSource
+
+BODY_PLACEHOLDER = "{ ... }"
+COMMENT_PATTERN = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+BLANK_LINES_PATTERN = re.compile(r"\n[ \t]*(?=\n)")
+TRAILING_SPACE_PATTERN = re.compile(r"[ \t]+\n")
+
+
+def _clean_gap(gap):
+    # Text between two tokens is only whitespace and comments
+    if "/" in gap:
+        gap = COMMENT_PATTERN.sub("", gap)
+    return BLANK_LINES_PATTERN.sub("", gap)
+
+
+def skeletonize(code):
+    """
+    Reduces a Java file to its API surface: package, imports, annotations, type headers, fields and
+    constructor/method signatures. Method and constructor bodies become `{ ... }` and comments are dropped.
+    :return: Skeleton source, or None if the code does not parse.
+    """
+    try:
+        source = JavaSource(code)
+    except Exception:
+        return None
+
+    # Outermost bodies only: methods of local/anonymous classes disappear with their enclosing body
+    bodies = []
+    for decl in source.declarations():
+        if decl["kind"] == "class" or decl["body_start"] is None:
+            continue
+        if bodies and decl["body_start"] < bodies[-1][1]:
+            continue
+        bodies.append((decl["body_start"], decl["body_end"]))
+
+    out = []
+    prev_end = 0
+    body = 0
+    for token, offset in zip(source.tokens, source.offsets):
+        if offset < prev_end:
+            continue  # inside an elided body
+        out.append(_clean_gap(code[prev_end:offset]))
+        if body < len(bodies) and offset == bodies[body][0]:
+            out.append(BODY_PLACEHOLDER)
+            prev_end = bodies[body][1]
+            body += 1
+            continue
+        out.append(code[offset:offset + len(token.value)])
+        prev_end = offset + len(token.value)
+    out.append(_clean_gap(code[prev_end:]))
+    return TRAILING_SPACE_PATTERN.sub("\n", "".join(out)).strip() + "\n"
@@ -0,0 +1,127 @@
+# utils/java_source.py
+
+import bisect
+import javalang
+
+TYPE_DECLARATIONS = (
+    javalang.tree.ClassDeclaration,
+    javalang.tree.InterfaceDeclaration,
+    javalang.tree.EnumDeclaration,
+    javalang.tree.AnnotationDeclaration,
+)
+CALLABLE_DECLARATIONS = (
+    javalang.tree.MethodDeclaration,
+    javalang.tree.ConstructorDeclaration,
+)
+
+
+class JavaSource:
+    """
+    A parsed Java compilation unit that keeps token offsets into the original text,
+    so declarations (types, methods, constructors, fields) can be cut out or rewritten verbatim.
+    Raises javalang's parser/lexer errors if the code does not parse.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.tree = javalang.parse.parse(code)
+        self.tokens = list(javalang.tokenizer.tokenize(code))
+
+        self.line_starts = [0]
+        for i, char in enumerate(code):
+            if char == "\n":
+                self.line_starts.append(i + 1)
+
+        self.offsets = [self._offset(t.position) for t in self.tokens]
+        self._token_at = {(t.position.line, t.position.column): i for i, t in enumerate(self.tokens)}
+
+    def _offset(self, position):
+        return self.line_starts[position.line - 1] + position.column - 1
+
+    def line_of(self, offset):
+        """1-based line number containing the character at offset."""
+        return bisect.bisect_right(self.line_starts, offset)
+
+    def span(self, node):
+        """
+        Character span of a declaration, including its annotations and modifiers.
+        :return: dict with start/end offsets (end exclusive) and body_start/body_end
+                 (offsets of the `{` ... `}` block, or None for abstract/interface methods and fields).
+        """
+        index = self._token_at.get((node.position.line, node.position.column))
+        if index is None:
+            return None
+
+        # Walk back over modifiers and annotations to the previous statement/block boundary
+        start = index
+        parens = 0
+        while start > 0:
+            value = self.tokens[start - 1].value
+            if value == ")":
+                parens += 1
+            elif value == "(":
+                parens -= 1
+            elif parens == 0 and value in (";", "{", "}"):
+                break
+            start -= 1
+
+        # Walk forward to the terminating `;` or the matching `}` of the body
+        parens = braces = 0
+        body_start = None
+        end = index
+        is_field = isinstance(node, javalang.tree.FieldDeclaration)
+        while end < len(self.tokens):
+            value = self.tokens[end].value
+            if value == "(":
+                parens += 1
+            elif value == ")":
+                parens -= 1
+            elif parens == 0 and value == "{":
+                if braces == 0 and body_start is None and not is_field:
+                    body_start = end
+                braces += 1
+            elif parens == 0 and value == "}":
+                braces -= 1
+                if braces == 0 and body_start is not None:
+                    break
+            elif parens == 0 and braces == 0 and value == ";":
+                break
+            end += 1
+
+        end = min(end, len(self.tokens) - 1)
+        end_offset = self.offsets[end] + len(self.tokens[end].value)
+        return {
+            "start": self.offsets[start],
+            "end": end_offset,
+            "body_start": self.offsets[body_start] if body_start is not None else None,
+            "body_end": end_offset if body_start is not None else None,
+        }
+
+    def declarations(self):
+        """
+        Lists type, method and constructor declarations in source order.
+        :return: list of dicts with kind, name, class_name (enclosing type), node and span fields.
+        """
+        results = []
+        for path, node in self.tree:
+            if isinstance(node, TYPE_DECLARATIONS):
+                kind = "class"
+            elif isinstance(node, javalang.tree.ConstructorDeclaration):
+                kind = "constructor"
+            elif isinstance(node, javalang.tree.MethodDeclaration):
+                kind = "method"
+            else:
+                continue
+            if node.position is None:
+                continue
+
+            span = self.span(node)
+            if span is None:
+                continue
+
+            enclosing = [p for p in path if isinstance(p, TYPE_DECLARATIONS)]
+            class_name = node.name if kind == "class" else (enclosing[-1].name if enclosing else None)
+            results.append({"kind": kind, "name": node.name, "class_name": class_name, "node": node, **span})
+
+        results.sort(key=lambda d: d["start"])
+        return results
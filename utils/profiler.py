@@ -0,0 +1,194 @@
+# utils/profiler.py
+
+import os
+import re
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from utils.telemetry import telemetry
+
+PROFILE_DIR = "logs/profile"
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_TOP_N = 25
+MEMORY_SAMPLES = 5          # calls per stage measured with tracemalloc snapshots (each snapshot costs a heap walk)
+TRACEMALLOC_FRAMES = 1
+MAX_STACK_DEPTH = 128
+
+# --profile names → telemetry span stages
+STAGE_GROUPS = {
+    "symbols": ["symbol_index"],
+    "embedding": ["embedding_index", "embedding_query"],
+    "stitch": ["stitch"],
+    "fix": ["fix"],
+    "build": ["build", "batch_validation", "gradle_fix", "gradle_dependencies"],
+    "post": ["test_generation", "swagger", "logger_refactor"],
+}
+
+
+def resolve_stages(selection):
+    """
+    Expands a comma separated --profile selection ("all", group names or raw span stages).
+    :return: Set of span stage names.
+    """
+    stages = set()
+    for name in (selection or "all").split(","):
+        name = name.strip()
+        if name == "all":
+            stages.update(stage for group in STAGE_GROUPS.values() for stage in group)
+        elif name:
+            stages.update(STAGE_GROUPS.get(name, [name]))
+    return stages
+
+
+def _file_name(stage):
+    return re.sub(r"[^\w.-]", "_", stage)
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StageProfiler:
+    """
+    Opt-in profiler driven by telemetry spans, so its overhead lands only on the selected stages.
+    CPU: a sampler thread reads every thread's stack each `interval_ms` and charges it to the innermost
+    selected stage running on that thread; results are collapsed stacks (`stack;frames count`) ready for
+    flamegraph.pl or speedscope. Memory: tracemalloc only runs while one of the first MEMORY_SAMPLES calls
+    of a selected stage is in flight (started on the first such span, stopped when the last one ends);
+    a snapshot diffed across each of those calls gives a top-N table of allocating lines (other threads
+    allocating meanwhile are included). Once every stage has used its samples nothing pays for tracing.
+    """
+
+    def __init__(self, stages, output_dir=PROFILE_DIR, interval_ms=DEFAULT_INTERVAL_MS, top_n=DEFAULT_TOP_N, memory=True):
+        self.stages = set(stages)
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000.0
+        self.top_n = top_n
+        self.memory = memory
+        self.samples = {}          # stage -> Counter(collapsed stack -> samples)
+        self.allocations = {}      # stage -> Counter(location -> bytes), Counter(location -> blocks)
+        self.memory_calls = Counter()
+        self._active = {}          # thread id -> [(stage, snapshot or None)]
+        self._traced_calls = 0     # measured calls in flight; tracemalloc runs while > 0
+        self._owns_tracing = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        telemetry.enabled = True
+        telemetry.add_span_listener(self.on_start, self.on_end)
+        self._thread = threading.Thread(target=self._sample_loop, name="stage-profiler", daemon=True)
+        self._thread.start()
+        print(f"🔬 Profiling stages: {', '.join(sorted(self.stages))}")
+        return self
+
+    def stop(self):
+        """Stops sampling and writes the per-stage files. :return: List of written paths."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        telemetry.remove_span_listener(self.on_start, self.on_end)
+        with self._lock:
+            if self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+            self._traced_calls = 0
+        return self._write()
+
+    def _begin_tracing(self):
+        """Counts one more measured call in flight, starting tracemalloc for the first. Caller holds _lock."""
+        if self._traced_calls == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._owns_tracing = True
+        self._traced_calls += 1
+
+    def _end_tracing(self):
+        """Stops tracemalloc once the last measured call ended, unless someone else started it. Caller holds _lock."""
+        self._traced_calls = max(0, self._traced_calls - 1)
+        if self._traced_calls == 0 and self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def on_start(self, stage):
+        if stage not in self.stages:
+            return
+        snapshot = None
+        if self.memory:
+            with self._lock:
+                measure = self.memory_calls[stage] < MEMORY_SAMPLES
+                self.memory_calls[stage] += 1
+                if measure:
+                    self._begin_tracing()
+                    snapshot = self._snapshot()
+        with self._lock:
+            self._active.setdefault(threading.get_ident(), []).append((stage, snapshot))
+
+    def on_end(self, stage):
+        if stage not in self.stages:
+            return
+        with self._lock:
+            stack = self._active.get(threading.get_ident())
+            if not stack:
+                return
+            _, before = stack.pop()
+        if before is None:
+            return
+
+        with self._lock:
+            after = self._snapshot()
+            self._end_tracing()
+        sizes, counts = self.allocations.setdefault(stage, (Counter(), Counter()))
+        for diff in after.compare_to(before, "lineno"):
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            location = f"{frame.filename}:{frame.lineno}"
+            with self._lock:
+                sizes[location] += diff.size_diff
+                counts[location] += diff.count_diff
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                running = [(tid, stack[-1][0]) for tid, stack in self._active.items() if stack]
+            for tid, stage in running:
+                frame = frames.get(tid)
+                if frame is not None:
+                    self.samples.setdefault(stage, Counter())[_collapse(frame)] += 1
+
+    def _write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        written = []
+        for stage, stacks in sorted(self.samples.items()):
+            path = os.path.join(self.output_dir, f"{_file_name(stage)}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            written.append(path)
+            print(f"🔥 {stage}: {sum(stacks.values())} samples → {path}")
+
+        for stage, (sizes, counts) in sorted(self.allocations.items()):
+            path = os.path.join(self.output_dir, f"{_file_name(stage)}.alloc.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"# Top {self.top_n} allocating lines during the first {min(self.memory_calls[stage], MEMORY_SAMPLES)} "
+                        f"'{stage}' call(s), net growth summed over the calls\n")
+                f.write(f"{'KiB':>12} {'blocks':>10}  location\n")
+                for location, size in sizes.most_common(self.top_n):
+                    f.write(f"{size / 1024:>12.1f} {counts[location]:>10}  {location}\n")
+            written.append(path)
+            print(f"🧮 {stage}: allocation table → {path}")
+        return written
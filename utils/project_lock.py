@@ -0,0 +1,53 @@
+# utils/project_lock.py
+
+import os
+import tempfile
+import threading
+from utils.telemetry import traced
+
+_LOCKS = {}
+_LOCKS_GUARD = threading.Lock()
+_WRITE_LISTENERS = []
+
+
+def project_lock(project_dir):
+    """
+    Returns the process-wide lock that guards builds and writes inside project_dir.
+    Every agent touching the same project directory gets the same (re-entrant) lock.
+    """
+    key = os.path.abspath(project_dir)
+    with _LOCKS_GUARD:
+        if key not in _LOCKS:
+            _LOCKS[key] = threading.RLock()
+        return _LOCKS[key]
+
+
+def on_project_write(callback):
+    """Registers callback(project_dir, full_path), called after every write_project_file()."""
+    _WRITE_LISTENERS.append(callback)
+
+
+@traced("file_write")
+def write_project_file(project_dir, relative_path, content):
+    """
+    Atomically writes a file inside project_dir while holding the project lock,
+    so a concurrent Gradle build never sees a half-written source file.
+    :return: Full path of the written file.
+    """
+    full_path = os.path.join(project_dir, relative_path)
+    directory = os.path.dirname(full_path) or "."
+    with project_lock(project_dir):
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, full_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    for callback in list(_WRITE_LISTENERS):
+        callback(project_dir, full_path)
+    return full_path
@@ -0,0 +1,105 @@
+# utils/relationship_store.py
+
+import os
+import json
+import sqlite3
+import threading
+
+DEFAULT_DB_PATH = "data/relationships.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classes (
+    name TEXT NOT NULL,
+    fqcn TEXT PRIMARY KEY
+);
+CREATE INDEX IF NOT EXISTS idx_classes_name ON classes(name);
+CREATE TABLE IF NOT EXISTS methods (
+    class_name TEXT NOT NULL,
+    method TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_methods_class ON methods(class_name);
+CREATE TABLE IF NOT EXISTS relationships (
+    target_path TEXT PRIMARY KEY,
+    legacy_sources TEXT NOT NULL,
+    related_targets TEXT NOT NULL
+);
+"""
+
+
+class RelationshipStore:
+    """
+    Single SQLite file holding the project-wide class/method index once, plus one compact
+    record per target (legacy sources and co-migrated targets) with point lookups by target path.
+    Connections are per thread, so the store can be shared by parallel workers.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    @staticmethod
+    def exists_at(db_path=DEFAULT_DB_PATH):
+        return os.path.exists(db_path)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def write(self, class_map, method_index, relationships):
+        """
+        Replaces the whole store in one transaction.
+        :param class_map: {simple name: fqcn}
+        :param method_index: {simple name: [method names]}
+        :param relationships: iterable of (target_path, legacy_sources, related_targets)
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM classes")
+            conn.execute("DELETE FROM methods")
+            conn.execute("DELETE FROM relationships")
+            conn.executemany("INSERT OR REPLACE INTO classes(name, fqcn) VALUES (?, ?)",
+                             ((name, fqcn) for name, fqcn in class_map.items()))
+            conn.executemany("INSERT INTO methods(class_name, method) VALUES (?, ?)",
+                             ((name, method) for name, methods in method_index.items() for method in methods))
+            conn.executemany("INSERT OR REPLACE INTO relationships(target_path, legacy_sources, related_targets) VALUES (?, ?, ?)",
+                             ((target, json.dumps(list(sources)), json.dumps(list(related)))
+                              for target, sources, related in relationships))
+
+    def get(self, target_path):
+        """Relationship record for one target, in the shape of the old <Target>_relationship.json (minus the indexes)."""
+        row = self._connection().execute(
+            "SELECT legacy_sources, related_targets FROM relationships WHERE target_path = ?", (target_path,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "targetPath": target_path,
+            "legacySources": json.loads(row[0]),
+            "relatedMigratedTargets": json.loads(row[1]),
+        }
+
+    def fqcn_for(self, class_name):
+        row = self._connection().execute("SELECT fqcn FROM classes WHERE name = ? LIMIT 1", (class_name,)).fetchone()
+        return row[0] if row else None
+
+    def methods_for(self, class_name):
+        rows = self._connection().execute("SELECT method FROM methods WHERE class_name = ?", (class_name,)).fetchall()
+        return [r[0] for r in rows]
+
+    def class_map(self):
+        return dict(self._connection().execute("SELECT name, fqcn FROM classes").fetchall())
+
+    def target_paths(self):
+        return [r[0] for r in self._connection().execute("SELECT target_path FROM relationships ORDER BY target_path")]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,128 @@
+# utils/run_journal.py
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still serialized within the process
+    fcntl = None
+
+JOURNAL_PATH = "logs/run_journal.jsonl"
+DONE_STAGE = "done"
+
+
+def _file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class RunJournal:
+    """
+    Append-only JSONL record of a --migrate-all run: one line per finished stage of each target with
+    its status, attempt count (how often the stage ran for that target, across runs) and the sha256
+    of the target's output file afterwards.
+    Each line is written with a single write() on an O_APPEND descriptor under an exclusive file lock and
+    fsynced, so parallel workers and other processes can share the file and a crash can at most leave
+    a torn last line, which is ignored on load.
+    With resume=True the previous journal is replayed: stages already finished are skipped, unless
+    the output file no longer matches the recorded hash, in which case the target starts over.
+    Without resume the journal is started afresh.
+    """
+
+    def __init__(self, output_dir, path=JOURNAL_PATH, resume=False):
+        self.output_dir = output_dir
+        self.path = path
+        self.resume = resume
+        self._state = {}        # target -> {stage: last record}
+        self._last = {}         # target -> last record
+        self._attempts = {}     # (target, stage) -> count
+        self._checked = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if resume:
+            self._load()
+        else:
+            open(path, "w", encoding="utf-8").close()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from a crashed run
+                self._apply(record)
+        print(f"📒 Journal {self.path}: {len(self._state)} target(s) with recorded progress")
+
+    def _apply(self, record):
+        target, stage = record["target"], record["stage"]
+        self._attempts[(target, stage)] = max(self._attempts.get((target, stage), 0), record.get("attempt", 1))
+        self._state.setdefault(target, {})[stage] = record
+        self._last[target] = record
+
+    def _append(self, line):
+        data = line.encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                # POSIX record lock rather than flock: it is not inherited by forked children (e.g. a
+                # process pool started while a worker thread appends), which would otherwise hold it
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)  # closing releases the lock
+
+    def record(self, target, stage, ok=True):
+        """Appends the outcome of one stage for target. :return: The journal record."""
+        with self._lock:
+            attempt = self._attempts.get((target, stage), 0) + 1
+            record = {
+                "target": target,
+                "stage": stage,
+                "status": "ok" if ok else "failed",
+                "attempt": attempt,
+                "output_hash": _file_hash(os.path.join(self.output_dir, target)),
+                "time": round(time.time(), 3),
+            }
+            self._append(json.dumps(record) + "\n")
+            self._apply(record)
+        return record
+
+    def _verified(self, target):
+        """Drops a target's recorded progress once if its output file changed since the last record."""
+        if target in self._checked:
+            return
+        self._checked.add(target)
+        last = self._last.get(target)
+        if last is None or last["status"] != "ok":
+            return
+        if _file_hash(os.path.join(self.output_dir, target)) != last["output_hash"]:
+            print(f"⚠️ Output of {target} changed since the journal was written; restarting it")
+            self._state.pop(target, None)
+
+    def finished(self, target, stage):
+        """:return: True when resuming and stage already completed successfully for target."""
+        if not self.resume:
+            return False
+        with self._lock:
+            self._verified(target)
+            record = self._state.get(target, {}).get(stage)
+        return record is not None and record["status"] == "ok"
+
+    def pending(self, targets):
+        """:return: targets without a completed run, in their original order."""
+        remaining = [t for t in targets if not self.finished(t, DONE_STAGE)]
+        if len(remaining) < len(targets):
+            print(f"⏩ Resuming: {len(targets) - len(remaining)} completed target(s) skipped, {len(remaining)} to go")
+        return remaining
@@ -0,0 +1,360 @@
+# utils/symbol_index.py
+
+import os
+import re
+import json
+import atexit
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import javalang
+from utils.project_lock import on_project_write
+from utils.telemetry import traced
+
+INDEX_DIR = "data/symbol_index"
+PARALLEL_THRESHOLD = 64  # below this many changed files parsing in-process is faster than a pool
+INDEX_VERSION = 1
+
+TYPE_DECLARATIONS = (
+    javalang.tree.ClassDeclaration,
+    javalang.tree.InterfaceDeclaration,
+    javalang.tree.EnumDeclaration,
+    javalang.tree.AnnotationDeclaration,
+)
+
+
+def _type_name(node):
+    """Dotted name of a javalang type node (`java.util.Map` for a qualified reference), or None."""
+    if node is None:
+        return None
+    name = node.name
+    sub = getattr(node, "sub_type", None)
+    while sub is not None:
+        name += "." + sub.name
+        sub = sub.sub_type
+    return name
+
+
+def _annotations(node):
+    return [a.name for a in (getattr(node, "annotations", None) or [])]
+
+
+def extract_symbols(code):
+    """
+    Extracts the symbols of one compilation unit: package, imports, declared types with their
+    fields/methods/constructors, and every referenced type name.
+    Falls back to regex extraction when javalang cannot parse the code (common for broken LLM output).
+    """
+    try:
+        tree = javalang.parse.parse(code)
+    except Exception:
+        return _extract_symbols_regex(code)
+
+    record = {
+        "parsed": True,
+        "package": tree.package.name if tree.package else "",
+        "imports": [imp.path + (".*" if imp.wildcard else "") for imp in tree.imports if not imp.static],
+        "types": [],
+        "referenced_types": [],
+    }
+
+    for path, node in tree:
+        if not isinstance(node, TYPE_DECLARATIONS):
+            continue
+        outer = [p.name for p in path if isinstance(p, TYPE_DECLARATIONS)]
+        extends = node.extends if isinstance(node.extends, list) else ([node.extends] if getattr(node, "extends", None) else [])
+        record["types"].append({
+            "name": node.name,
+            "qualified_name": ".".join(outer + [node.name]),
+            "kind": type(node).__name__.replace("Declaration", "").lower(),
+            "modifiers": sorted(node.modifiers or []),
+            "annotations": _annotations(node),
+            "extends": [_type_name(t) for t in extends],
+            "implements": [_type_name(t) for t in (getattr(node, "implements", None) or [])],
+            "fields": [
+                {"name": declarator.name, "type": _type_name(field.type), "annotations": _annotations(field),
+                 "modifiers": sorted(field.modifiers or [])}
+                for field in node.fields for declarator in field.declarators
+            ],
+            "methods": [
+                {"name": method.name, "return": _type_name(method.return_type),
+                 "params": [_type_name(p.type) for p in method.parameters],
+                 "annotations": _annotations(method), "modifiers": sorted(method.modifiers or [])}
+                for method in node.methods
+            ],
+            "constructors": [
+                {"params": [_type_name(p.type) for p in ctor.parameters], "annotations": _annotations(ctor)}
+                for ctor in getattr(node, "constructors", None) or []
+            ],
+        })
+
+    referenced = set()
+    nested = set()
+    for _, node in tree.filter(javalang.tree.ReferenceType):
+        if id(node) in nested:
+            continue
+        sub = node.sub_type
+        while sub is not None:
+            nested.add(id(sub))
+            sub = sub.sub_type
+        referenced.add(_type_name(node))
+    for _, node in tree.filter(javalang.tree.MethodInvocation):
+        # Static calls such as Helper.go() reference Helper
+        if node.qualifier and node.qualifier[:1].isupper():
+            referenced.add(node.qualifier)
+    record["referenced_types"] = sorted(referenced)
+    return record
+
+
+TYPE_PATTERN = re.compile(r'\b(public\s+)?(?:(?:abstract|final|static)\s+)*(class|interface|enum)\s+(\w+)')
+FIELD_PATTERN = re.compile(r'(?:private|protected|public)?\s+([A-Z][\w.]*)(?:<[^;=()]*>)?\s+(\w+)\s*(?:=[^;]*)?;')
+METHOD_PATTERN = re.compile(r'([\w.<>\[\]]+)\s+(\w+)\s*\(([^)]*)\)\s*(?:throws\s+[\w.,\s]+)?\{')
+NEW_PATTERN = re.compile(r'\bnew\s+([A-Z][\w.]*)')
+
+
+def _extract_symbols_regex(code):
+    package = re.search(r'package\s+([\w.]+)\s*;', code)
+    imports = re.findall(r'^\s*import\s+(?!static)([\w.]+(?:\.\*)?)\s*;', code, re.MULTILINE)
+    types = []
+    for public, kind, name in TYPE_PATTERN.findall(code):
+        modifiers = ["public"] if public else []
+        types.append({"name": name, "qualified_name": name, "kind": kind, "modifiers": modifiers, "annotations": [],
+                      "extends": [], "implements": [], "fields": [], "methods": [], "constructors": []})
+
+    fields = [{"name": name, "type": type_name, "annotations": [], "modifiers": []}
+              for type_name, name in FIELD_PATTERN.findall(code)]
+    methods = []
+    for return_type, name, params in METHOD_PATTERN.findall(code):
+        if return_type in ("new", "return", "else"):
+            continue
+        param_types = [p.strip().split()[-2] for p in params.split(",") if len(p.strip().split()) >= 2]
+        methods.append({"name": name, "return": return_type, "params": param_types, "annotations": [], "modifiers": []})
+    if types:
+        types[0]["fields"] = fields
+        types[0]["methods"] = methods
+
+    referenced = {f["type"] for f in fields} | set(NEW_PATTERN.findall(code))
+    for method in methods:
+        referenced.update(t for t in method["params"] if t[:1].isupper())
+    return {
+        "parsed": False,
+        "package": package.group(1) if package else "",
+        "imports": imports,
+        "types": types,
+        "referenced_types": sorted(referenced),
+    }
+
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _parse_file(args):
+    """Process-pool worker: (rel_path, full_path) -> (rel_path, record or None)."""
+    rel_path, full_path = args
+    try:
+        with open(full_path, "rb") as f:
+            data = f.read()
+        record = extract_symbols(data.decode("utf-8", errors="replace"))
+        record["hash"] = _hash(data)
+        return rel_path, record
+    except Exception as e:
+        print(f"❌ Failed to index {rel_path}: {e}")
+        return rel_path, None
+
+
+class SymbolIndex:
+    """
+    Project-wide Java symbol table for one source root, built once per run.
+    Per file it stores the package, imports, declared types (fields, methods, constructors,
+    annotations) and referenced types. The table is persisted keyed by content hash, so rebuilds
+    only re-parse changed files, and it is refreshed automatically when a file under the root is
+    rewritten through utils.project_lock.write_project_file. Those refreshes are saved by close(),
+    which runs at interpreter exit.
+    """
+
+    def __init__(self, root_dir, index_path=None):
+        self.root_dir = root_dir
+        slug = re.sub(r"[^\w]+", "_", os.path.normpath(root_dir)).strip("_") or "root"
+        self.index_path = index_path or os.path.join(INDEX_DIR, f"{slug}.json")
+        self.files = {}
+        self.dirty = False
+        self.version = 0  # bumped on every change, so derived indexes know when to refresh
+        self._lock = threading.RLock()
+        self._by_name = None
+        self._by_fqcn = None
+        self._load()
+        on_project_write(self._on_write)
+        atexit.register(self.close)
+
+    # ---- persistence -------------------------------------------------------------------
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data.get("files", {})
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable symbol index {self.index_path}: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            directory = os.path.dirname(self.index_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "root": self.root_dir, "files": self.files}, f)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+
+    def close(self):
+        """Persists changes made by update_file()/move_file() since the last save."""
+        try:
+            self.save()
+        except Exception as e:
+            print(f"❌ Failed to save symbol index {self.index_path}: {e}")
+
+    # ---- building ----------------------------------------------------------------------
+
+    def _collect_files(self):
+        found = {}
+        for root, _, files in os.walk(self.root_dir):
+            for file in files:
+                if file.endswith(".java"):
+                    full_path = os.path.join(root, file)
+                    found[os.path.relpath(full_path, self.root_dir).replace(os.sep, "/")] = full_path
+        return found
+
+    @traced("symbol_index")
+    def build(self, workers=None):
+        """Indexes every .java file under the root, re-parsing only files whose content hash changed."""
+        found = self._collect_files()
+        changed = []
+        for rel_path, full_path in found.items():
+            cached = self.files.get(rel_path)
+            if cached is not None:
+                with open(full_path, "rb") as f:
+                    if _hash(f.read()) == cached.get("hash"):
+                        continue
+            changed.append((rel_path, full_path))
+
+        if len(changed) >= PARALLEL_THRESHOLD and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_parse_file, changed, chunksize=32))
+        else:
+            results = [_parse_file(item) for item in changed]
+
+        with self._lock:
+            removed = [p for p in self.files if p not in found]
+            for rel_path in removed:
+                del self.files[rel_path]
+            for rel_path, record in results:
+                if record is not None:
+                    self.files[rel_path] = record
+            if changed or removed:
+                self.dirty = True
+                self._invalidate()
+        self.save()
+        print(f"🗂️  Symbol index for {self.root_dir}: {len(self.files)} files ({len(changed)} parsed, {len(removed)} removed)")
+        return self
+
+    def update_file(self, rel_path):
+        """Re-indexes one file after it was rewritten (or drops it if it no longer exists)."""
+        rel_path = rel_path.replace(os.sep, "/")
+        full_path = os.path.join(self.root_dir, rel_path)
+        with self._lock:
+            if not os.path.exists(full_path):
+                if self.files.pop(rel_path, None) is not None:
+                    self.dirty = True
+                    self._invalidate()
+                return None
+            _, record = _parse_file((rel_path, full_path))
+            if record is not None:
+                self.files[rel_path] = record
+                self.dirty = True
+                self._invalidate()
+            return record
+
+    def move_file(self, old_rel_path, new_rel_path):
+        with self._lock:
+            record = self.files.pop(old_rel_path.replace(os.sep, "/"), None)
+            if record is not None:
+                self.files[new_rel_path.replace(os.sep, "/")] = record
+                self.dirty = True
+                self._invalidate()
+
+    def _on_write(self, project_dir, full_path):
+        root = os.path.abspath(self.root_dir)
+        full_path = os.path.abspath(full_path)
+        if full_path.endswith(".java") and full_path.startswith(root + os.sep):
+            self.update_file(os.path.relpath(full_path, root))
+
+    # ---- queries -----------------------------------------------------------------------
+
+    def _invalidate(self):
+        self.version += 1
+        self._by_name = None
+        self._by_fqcn = None
+
+    def _ensure_lookups(self):
+        """
+        :return: (by_name, by_fqcn) as of this call; use the returned dicts, since a concurrent
+                 update may reset the attributes right after the lock is released.
+        """
+        with self._lock:
+            if self._by_name is not None:
+                return self._by_name, self._by_fqcn
+            by_name, by_fqcn = {}, {}
+            for rel_path, record in self.files.items():
+                package = record.get("package", "")
+                for declared in record.get("types", []):
+                    fqcn = f"{package}.{declared['qualified_name']}" if package else declared["qualified_name"]
+                    by_name.setdefault(declared["name"], []).append(fqcn)
+                    by_fqcn[fqcn] = (rel_path, declared)
+            self._by_name, self._by_fqcn = by_name, by_fqcn
+            return by_name, by_fqcn
+
+    @property
+    def index(self):
+        """Simple class name -> list of FQCNs declaring it."""
+        return self._ensure_lookups()[0]
+
+    def resolve(self, class_name):
+        """FQCN for a simple class name (first match), or None."""
+        candidates = self.index.get(class_name)
+        return candidates[0] if candidates else None
+
+    def file_for_class(self, fqcn):
+        found = self._ensure_lookups()[1].get(fqcn)
+        return found[0] if found else None
+
+    def type_for_class(self, fqcn):
+        found = self._ensure_lookups()[1].get(fqcn)
+        return found[1] if found else None
+
+    def file_symbols(self, rel_path):
+        return self.files.get(rel_path.replace(os.sep, "/"))
+
+    def classes(self):
+        """Iterates (fqcn, rel_path, type record) for every declared type."""
+        for fqcn, (rel_path, declared) in self._ensure_lookups()[1].items():
+            yield fqcn, rel_path, declared
+
+
+_INDEXES = {}
+_INDEXES_GUARD = threading.Lock()
+
+
+def get_symbol_index(root_dir):
+    """Returns the shared SymbolIndex for root_dir (one instance per root per process)."""
+    key = os.path.abspath(root_dir)
+    with _INDEXES_GUARD:
+        if key not in _INDEXES:
+            _INDEXES[key] = SymbolIndex(root_dir)
+        return _INDEXES[key]
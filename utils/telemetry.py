@@ -0,0 +1,235 @@
+# utils/telemetry.py
+
+import os
+import json
+import math
+import time
+import tempfile
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+REPORT_DIR = "logs/telemetry"
+PROMETHEUS_FILE = "metrics.prom"
+METRIC_PREFIX = "migration"
+QUANTILES = {"p50": 0.5, "p95": 0.95}
+
+_stage = contextvars.ContextVar("telemetry_stage", default=None)
+_target = contextvars.ContextVar("telemetry_target", default=None)
+
+
+def _quantile(sorted_values, q):
+    # Nearest rank: no interpolation, so p95 is always a duration that really happened
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels.items() if v is not None]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Telemetry:
+    """
+    In-process spans and counters for one run. A span costs two perf_counter calls and a list append,
+    so instrumentation stays on by default (TELEMETRY=off turns it into no-ops).
+    Spans and counters are attributed to the target bound with bind_target() and to the innermost
+    stage, so LLM tokens spent inside stitch/fix/test show up under that stage.
+    Span listeners (add_span_listener) get on_start(stage) / on_end(stage) around every span.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.time()
+        self.spans = []        # (stage, target, offset seconds, duration seconds, ok)
+        self.counters = {}     # (name, stage, target) -> value
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_span_listener(self, on_start, on_end):
+        self._listeners.append((on_start, on_end))
+
+    def remove_span_listener(self, on_start, on_end):
+        if (on_start, on_end) in self._listeners:
+            self._listeners.remove((on_start, on_end))
+
+    @contextmanager
+    def bind_target(self, target):
+        token = _target.set(target)
+        try:
+            yield
+        finally:
+            _target.reset(token)
+
+    @staticmethod
+    def current_stage():
+        return _stage.get()
+
+    @staticmethod
+    def current_target():
+        return _target.get()
+
+    @contextmanager
+    def span(self, stage, target=None):
+        if not self.enabled:
+            yield
+            return
+        token = _stage.set(stage)
+        for on_start, _ in self._listeners:
+            on_start(stage)
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            for _, on_end in self._listeners:
+                on_end(stage)
+            _stage.reset(token)
+            self.record_span(stage, duration, ok, target=target, offset=start)
+
+    def record_span(self, stage, duration, ok=True, target=None, offset=None):
+        """Adds a span measured elsewhere (e.g. a stream that finishes after its call returned)."""
+        if not self.enabled:
+            return
+        record = (stage, target or _target.get(), (offset or time.perf_counter()) - _PERF_ORIGIN, duration, ok)
+        with self._lock:
+            self.spans.append(record)
+
+    def count(self, name, amount=1, stage=None, target=None):
+        if not self.enabled or not amount:
+            return
+        key = (name, stage or _stage.get(), target or _target.get())
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def traced(self, stage):
+        """Decorator: runs the function inside a span named stage."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # ---- reporting ---------------------------------------------------------------------
+
+    def summary(self):
+        """:return: {"stages": {stage: stats}, "targets": {target: {stage: seconds, counter: value}}}"""
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+
+        durations, errors, targets = {}, {}, {}
+        for stage, target, _, duration, ok in spans:
+            durations.setdefault(stage, []).append(duration)
+            if not ok:
+                errors[stage] = errors.get(stage, 0) + 1
+            if target is not None:
+                per_target = targets.setdefault(target, {"seconds": {}, "counters": {}})
+                per_target["seconds"][stage] = round(per_target["seconds"].get(stage, 0.0) + duration, 4)
+
+        stages = {}
+        for stage, values in durations.items():
+            values.sort()
+            stages[stage] = {
+                "count": len(values),
+                "errors": errors.get(stage, 0),
+                "total_seconds": round(sum(values), 4),
+                **{key: round(_quantile(values, q), 4) for key, q in QUANTILES.items()},
+                "max": round(values[-1], 4),
+                "counters": {},
+            }
+        for (name, stage, target), value in counters.items():
+            stats = stages.setdefault(stage or "run", {"count": 0, "errors": 0, "total_seconds": 0.0, "p50": 0.0,
+                                                       "p95": 0.0, "max": 0.0, "counters": {}})
+            stats["counters"][name] = stats["counters"].get(name, 0) + value
+            if target is not None:
+                per_target = targets.setdefault(target, {"seconds": {}, "counters": {}})
+                per_target["counters"][name] = per_target["counters"].get(name, 0) + value
+        return {"stages": stages, "targets": targets}
+
+    def _prometheus(self, summary):
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_duration_seconds Wall time per pipeline stage call.",
+            f"# TYPE {METRIC_PREFIX}_stage_duration_seconds summary",
+        ]
+        for stage, stats in sorted(summary["stages"].items()):
+            if not stats["count"]:
+                continue
+            for key, q in QUANTILES.items():
+                lines.append(f"{METRIC_PREFIX}_stage_duration_seconds{_labels(stage=stage, quantile=q)} {stats[key]}")
+            lines.append(f"{METRIC_PREFIX}_stage_duration_seconds_sum{_labels(stage=stage)} {stats['total_seconds']}")
+            lines.append(f"{METRIC_PREFIX}_stage_duration_seconds_count{_labels(stage=stage)} {stats['count']}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_stage_errors_total counter")
+        for stage, stats in sorted(summary["stages"].items()):
+            lines.append(f"{METRIC_PREFIX}_stage_errors_total{_labels(stage=stage)} {stats['errors']}")
+
+        names = sorted({name for stats in summary["stages"].values() for name in stats["counters"]})
+        for name in names:
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            for stage, stats in sorted(summary["stages"].items()):
+                if name in stats["counters"]:
+                    lines.append(f"{METRIC_PREFIX}_{name}_total{_labels(stage=stage)} {round(stats['counters'][name], 6)}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, report_dir=REPORT_DIR):
+        """
+        Writes run_<timestamp>.jsonl (every span, counter, per-stage and per-target summary) and
+        metrics.prom for the node_exporter textfile collector.
+        :return: (jsonl path, prometheus path), or None when disabled.
+        """
+        if not self.enabled:
+            return None
+        os.makedirs(report_dir, exist_ok=True)
+        summary = self.summary()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        jsonl_path = os.path.join(report_dir, f"run_{stamp}.jsonl")
+
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for stage, target, offset, duration, ok in spans:
+                f.write(json.dumps({"type": "span", "stage": stage, "target": target, "offset": round(offset, 4),
+                                    "seconds": round(duration, 6), "ok": ok}) + "\n")
+            for (name, stage, target), value in counters.items():
+                f.write(json.dumps({"type": "counter", "name": name, "stage": stage, "target": target,
+                                    "value": value}) + "\n")
+            for stage, stats in summary["stages"].items():
+                f.write(json.dumps({"type": "stage", "stage": stage, **stats}) + "\n")
+            for target, stats in summary["targets"].items():
+                f.write(json.dumps({"type": "target", "target": target, **stats}) + "\n")
+
+        prom_path = os.path.join(report_dir, PROMETHEUS_FILE)
+        fd, tmp_path = tempfile.mkstemp(dir=report_dir, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self._prometheus(summary))
+        os.replace(tmp_path, prom_path)  # the textfile collector must never see a half-written file
+        return jsonl_path, prom_path
+
+    def print_summary(self):
+        stages = self.summary()["stages"]
+        if not stages:
+            return
+        print("📈 Stage timings (calls, total, p50, p95):")
+        for stage, stats in sorted(stages.items(), key=lambda item: -item[1]["total_seconds"]):
+            counters = ", ".join(f"{k}={round(v, 4) if isinstance(v, float) else v}" for k, v in sorted(stats["counters"].items()))
+            print(f"   {stage:<20} {stats['count']:>6}  {stats['total_seconds']:>9.2f}s  {stats['p50']:>7.3f}s  "
+                  f"{stats['p95']:>7.3f}s  {counters}")
+
+
+_PERF_ORIGIN = time.perf_counter()
+
+telemetry = Telemetry(enabled=os.getenv("TELEMETRY", "on").strip().lower() not in ("0", "off", "false", "no"))
+traced = telemetry.traced
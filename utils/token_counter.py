@@ -0,0 +1,72 @@
+# utils/token_counter.py
+
+import re
+import threading
+
+DEFAULT_MODEL = "gpt-4o"
+FALLBACK_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4  # rough ratio for source code when no tokenizer is available
+
+_ENCODINGS = {}
+_GUARD = threading.Lock()
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def _encoding(model):
+    """tiktoken encoding for model, or None when tiktoken (or its BPE files) is unavailable."""
+    with _GUARD:
+        if model in _ENCODINGS:
+            return _ENCODINGS[model]
+        encoding = None
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+        except Exception as e:
+            print(f"⚠️ tiktoken unavailable ({e}); using an approximate token count.")
+        _ENCODINGS[model] = encoding
+        return encoding
+
+
+def _approximate(text):
+    # Code tokenizes to roughly one token per word/symbol, but never fewer than chars / 4
+    return max(len(_WORD_PATTERN.findall(text)), len(text) // CHARS_PER_TOKEN)
+
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    """
+    Counts the tokens text takes in a prompt for model.
+    :return: Exact count with tiktoken, an upper-leaning estimate otherwise.
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return _approximate(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, model=DEFAULT_MODEL):
+    """
+    Cuts text to at most max_tokens tokens, on a line boundary where possible.
+    :return: The (possibly) shortened text.
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        cut = encoding.decode(tokens[:max_tokens])
+    else:
+        if _approximate(text) <= max_tokens:
+            return text
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+        while cut and _approximate(cut) > max_tokens:
+            cut = cut[:int(len(cut) * 0.9)]
+
+    newline = cut.rfind("\n")
+    return cut[:newline + 1] if newline > 0 else cut
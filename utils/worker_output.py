@@ -0,0 +1,71 @@
+# utils/worker_output.py
+
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+
+TARGET_LOG_DIR = "logs/targets"
+
+
+class TargetOutputRouter:
+    """
+    stdout proxy used when several targets are processed in parallel.
+    Lines printed by a worker thread are written to that target's own log file
+    and echoed to the console with a `[Target]` prefix, so output never interleaves mid-line.
+    """
+
+    def __init__(self, stream=None, log_dir=TARGET_LOG_DIR):
+        self.stream = stream or sys.stdout
+        self.log_dir = log_dir
+        self._local = threading.local()
+        self._console_lock = threading.Lock()
+        os.makedirs(self.log_dir, exist_ok=True)
+
+    @contextmanager
+    def bind(self, target_path):
+        """Routes everything the current thread prints to the log of target_path."""
+        name = os.path.basename(target_path).replace(".java", "")
+        safe_name = re.sub(r"[^\w.-]", "_", target_path)
+        log_file = open(os.path.join(self.log_dir, f"{safe_name}.log"), "w", encoding="utf-8")
+        self._local.label = name
+        self._local.log_file = log_file
+        self._local.buffer = ""
+        try:
+            yield
+        finally:
+            if self._local.buffer:
+                self._emit(self._local.buffer)
+            self._local.label = None
+            self._local.log_file = None
+            self._local.buffer = ""
+            log_file.close()
+
+    def write(self, text):
+        if not getattr(self._local, "log_file", None):
+            with self._console_lock:
+                return self.stream.write(text)
+
+        self._local.log_file.write(text)
+        self._local.buffer += text
+        *lines, self._local.buffer = self._local.buffer.split("\n")
+        for line in lines:
+            self._emit(line)
+        return len(text)
+
+    def _emit(self, line):
+        with self._console_lock:
+            self.stream.write(f"[{self._local.label}] {line}\n")
+
+    def flush(self):
+        log_file = getattr(self._local, "log_file", None)
+        if log_file:
+            log_file.flush()
+        self.stream.flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)